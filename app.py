@@ -1,7 +1,7 @@
 import os
 import logging
 from pathlib import Path
-from flask import send_from_directory, abort
+from flask import abort
 from dash import Dash, html, dcc, Input, Output, State
 import dash_bootstrap_components as dbc
 from dotenv import load_dotenv
@@ -14,8 +14,13 @@ from layout.base import serve_layout, custom_css
 from callbacks.kpi_callbacks import register_kpi_callbacks
 from callbacks.visual_callbacks import register_visual_callbacks
 from callbacks.layout_callbacks import register_layout_callbacks
-from callbacks.export_callbacks import register_export_callbacks, create_export_buttons
+from callbacks.export_callbacks import (
+    register_export_callbacks, register_export_routes, create_export_buttons
+)
+from callbacks.clientside import register_clientside_callbacks
 from components.export_utils import set_export_dir
+from middleware.etag import init_etag_caching
+from middleware.compression import init_compression, send_precompressed
 
 # Initialize the Dash app
 app = Dash(
@@ -91,11 +96,14 @@ def serve_export(user_id, filename):
         if not os.path.exists(os.path.join(user_dir, safe_filename)):
             abort(404)
             
-        return send_from_directory(user_dir, safe_filename, as_attachment=True)
+        return send_precompressed(user_dir, safe_filename, as_attachment=True)
     except Exception as e:
         logging.error(f"Error serving export file: {e}")
         abort(404)
 
+# Streamed CSV downloads of the filtered permits
+register_export_routes(app.server)
+
 # Import and initialize scheduler
 from scheduler.schedule_jobs import start_scheduler
 
@@ -109,8 +117,9 @@ if os.getenv('ENABLE_SCHEDULED_JOBS', 'False').lower() == 'true':
 else:
     logger.info("Scheduled jobs are disabled (ENABLE_SCHEDULED_JOBS=False)")
 
-# Set the layout
-app.layout = serve_layout()
+# Set the layout; Dash calls the function on every page load, so filter
+# options added by the ETL show up without a restart
+app.layout = serve_layout
 
 # Initialize database
 from db.connection import init_db
@@ -126,6 +135,10 @@ try:
     register_visual_callbacks(app)
     logger.info("Successfully registered visual callbacks")
     
+    logger.info("Registering clientside callbacks...")
+    register_clientside_callbacks(app)
+    logger.info("Successfully registered clientside callbacks")
+    
     logger.info("Registering layout callbacks...")
     register_layout_callbacks(app)
     logger.info("Successfully registered layout callbacks")
@@ -145,6 +158,12 @@ except Exception as e:
     logger.error(f"Error registering callbacks: {e}", exc_info=True)
     raise
 
+# Compress responses; installed first so it runs after the other hooks
+init_compression(app.server)
+
+# Answer repeated read-only callback requests with 304 Not Modified
+init_etag_caching(app.server)
+
 # Add external scripts for draggable functionality
 app.scripts.append_script({
     'external_url': 'https://cdnjs.cloudflare.com/ajax/libs/react-grid-layout/1.3.4/react-grid-layout.min.js'
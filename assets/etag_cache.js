@@ -0,0 +1,58 @@
+/*
+ * Revalidates Dash callback responses with ETags (see middleware/etag.py).
+ *
+ * Dash posts callback requests with fetch(), and browsers never revalidate
+ * POST responses. This wrapper remembers the last tagged response per
+ * request body, sends its ETag as If-None-Match and replays the stored body
+ * when the server answers 304 Not Modified.
+ */
+(function () {
+    var MAX_ENTRIES = 200;
+    var responses = new Map();
+    var originalFetch = window.fetch.bind(window);
+
+    function isCallbackRequest(url, options) {
+        return typeof url === "string" &&
+            url.indexOf("_dash-update-component") !== -1 &&
+            options && typeof options.body === "string";
+    }
+
+    window.fetch = function (url, options) {
+        if (!isCallbackRequest(url, options)) {
+            return originalFetch(url, options);
+        }
+
+        var key = url + "\n" + options.body;
+        var cached = responses.get(key);
+        var headers = Object.assign({}, options.headers);
+        if (cached) {
+            headers["If-None-Match"] = cached.etag;
+        }
+
+        return originalFetch(url, Object.assign({}, options, {headers: headers}))
+            .then(function (response) {
+                if (response.status === 304 && cached) {
+                    // Mark as recently used
+                    responses.delete(key);
+                    responses.set(key, cached);
+                    return new Response(cached.body, {
+                        status: 200,
+                        headers: {"Content-Type": "application/json"}
+                    });
+                }
+
+                var etag = response.headers.get("ETag");
+                if (response.status !== 200 || !etag) {
+                    return response;
+                }
+                return response.clone().text().then(function (body) {
+                    responses.delete(key);
+                    responses.set(key, {etag: etag, body: body});
+                    if (responses.size > MAX_ENTRIES) {
+                        responses.delete(responses.keys().next().value);
+                    }
+                    return response;
+                });
+            });
+    };
+})();
@@ -0,0 +1,6 @@
+"""
+Cache package for the Permit Dashboard application.
+
+This package contains the data generation counter and the caches that
+are keyed on it.
+"""
@@ -0,0 +1,269 @@
+"""
+Shared on-disk (L2) cache for query results and serialized figures.
+
+The in-process caches are per worker; this cache lives in a SQLite file next
+to the application database, so every worker process reads what any other
+worker has computed. Entries carry the data generation they were computed
+for and an expiry time, and the file is kept under a size limit by evicting
+the least recently used entries.
+
+Values are pickled. The file is private to the application and must not be
+shared with untrusted writers.
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from cache.generation import get_data_generation
+from db import connection
+
+logger = logging.getLogger(__name__)
+
+# Name of the cache file, created next to the application database
+CACHE_FILENAME = "cache.db"
+
+# Default lifetime of an entry, in seconds
+DEFAULT_TTL = int(os.getenv("DISK_CACHE_TTL", str(6 * 60 * 60)))
+
+# Size limit of the cache file contents, in bytes
+DEFAULT_MAX_BYTES = int(os.getenv("DISK_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# Set to False to turn the shared cache off
+DISK_CACHE_ENABLED = os.getenv("DISK_CACHE_ENABLED", "True").lower() in ("true", "1", "yes")
+
+# Entries written between eviction passes
+EVICT_EVERY_SETS = 100
+
+# Last-access times are only refreshed when older than this, so most hits
+# don't write to the file
+TOUCH_INTERVAL = 60
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries(accessed_at);
+"""
+
+
+class DiskCache:
+    """Size-bounded, generation-aware key/value cache in a SQLite file."""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, ttl: int = DEFAULT_TTL):
+        """
+        Open (or create) a cache file.
+
+        Args:
+            path: Path to the SQLite cache file
+            max_bytes: Total size of cached values before eviction
+            ttl: Default entry lifetime in seconds
+        """
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sets_since_evict = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection to the cache file."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            # WAL lets workers read while another one writes
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(CREATE_TABLE_SQL)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter: str) -> None:
+        """Increment one of the hit/miss/set/eviction counters."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str, generation: Optional[int] = None) -> Optional[Any]:
+        """
+        Look up a key for a data generation.
+
+        Args:
+            key: Cache key
+            generation: Generation the caller computes for (default: the
+                current one)
+
+        Returns:
+            The cached value, or None on a miss, an expired entry or an
+            entry from another data generation
+        """
+        if generation is None:
+            generation = get_data_generation()
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, generation, expires_at, accessed_at FROM cache_entries WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None or row[1] != generation or row[2] <= now:
+                self._count("misses")
+                return None
+
+            if now - row[3] > TOUCH_INTERVAL:
+                conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+
+            value = pickle.loads(row[0])
+        except Exception as e:
+            logger.debug(f"Disk cache read failed for {key}: {e}")
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        return value
+
+    def set(self, key: str, value: Any, generation: int, ttl: Optional[int] = None) -> None:
+        """
+        Store a value for a data generation.
+
+        The generation isn't read here: a value computed before an ETL run
+        bumped it must not be stored as current, so callers pass the
+        generation they read before computing the value.
+
+        Args:
+            key: Cache key
+            value: Picklable value
+            generation: Generation read before the value was computed
+            ttl: Lifetime in seconds (default: the cache's ttl)
+        """
+        now = time.time()
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            if len(blob) > self.max_bytes:
+                return
+
+            conn = self._connect()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO cache_entries
+                    (key, generation, value, size, expires_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, generation, blob, len(blob), now + (ttl or self.ttl), now)
+            )
+            conn.commit()
+        except Exception as e:
+            logger.debug(f"Disk cache write failed for {key}: {e}")
+            return
+
+        self._count("sets")
+        with self._lock:
+            self._sets_since_evict += 1
+            due = self._sets_since_evict >= EVICT_EVERY_SETS
+            if due:
+                self._sets_since_evict = 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Remove expired and outdated entries, then the least recently used
+        ones until the cache fits in max_bytes.
+
+        Returns:
+            int: Number of entries removed
+        """
+        try:
+            conn = self._connect()
+            removed = conn.execute(
+                "DELETE FROM cache_entries WHERE generation != ? OR expires_at <= ?",
+                (get_data_generation(), time.time())
+            ).rowcount
+
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk entries from least recently used until enough is freed
+                excess, keys = total - self.max_bytes, []
+                for key, size in conn.execute(
+                    "SELECT key, size FROM cache_entries ORDER BY accessed_at"
+                ):
+                    keys.append((key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM cache_entries WHERE key = ?", keys)
+                removed += len(keys)
+
+            conn.commit()
+        except Exception as e:
+            logger.warning(f"Disk cache eviction failed: {e}")
+            return 0
+
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        conn = self._connect()
+        conn.execute("DELETE FROM cache_entries")
+        conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        Hit, miss, set and eviction counts are for this process; entry and
+        byte counts are for the shared file.
+
+        Returns:
+            dict: hits, misses, sets, evictions, entries and bytes
+        """
+        entries, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+        ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_caches: Dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """
+    Get the shared cache for the current application database.
+
+    Returns:
+        DiskCache: The cache stored next to the database, or None if the
+        shared cache is disabled
+    """
+    if not DISK_CACHE_ENABLED:
+        return None
+
+    path = str(Path(connection.DB_PATH).with_name(CACHE_FILENAME))
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = DiskCache(path)
+        return _caches[path]
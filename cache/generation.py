@@ -0,0 +1,95 @@
+"""
+Data generation counter shared by all worker processes.
+
+The generation is bumped after every successful ETL run. Caches include it
+in their keys, so anything computed from older data stops matching as soon
+as new data lands. The counter lives in a small file next to the database,
+so reading it costs a ``stat`` call rather than a database query. A second
+counter of the same kind tracks changes to saved dashboard layouts.
+"""
+import os
+import threading
+from pathlib import Path
+
+from db.connection import DB_DIR
+
+# File holding the current generation number
+GENERATION_FILE = Path(DB_DIR) / "data_generation"
+
+# File holding the layout generation, bumped whenever a saved dashboard
+# layout changes
+LAYOUT_GENERATION_FILE = Path(DB_DIR) / "layout_generation"
+
+# Last value read from each counter file, along with the file identity it
+# was read from
+_cached = {}
+_lock = threading.Lock()
+
+
+def _read_counter(path: Path) -> int:
+    """Read a counter file, re-reading it only when the file changed."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return 0
+
+    stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached_stamp, value = _cached.get(path, (None, 0))
+        if stamp != cached_stamp:
+            try:
+                value = int(path.read_text().strip() or 0)
+            except (OSError, ValueError):
+                value = 0
+            _cached[path] = (stamp, value)
+        return value
+
+
+def _bump_counter(path: Path) -> int:
+    """Atomically advance a counter file."""
+    value = _read_counter(path) + 1
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(str(value))
+    os.replace(tmp_path, path)
+    return value
+
+
+def get_data_generation() -> int:
+    """
+    Get the current data generation.
+
+    Returns:
+        int: The generation number, or 0 if no ETL run has completed yet
+    """
+    return _read_counter(GENERATION_FILE)
+
+
+def bump_data_generation() -> int:
+    """
+    Advance the data generation, invalidating every generation-keyed cache.
+
+    Returns:
+        int: The new generation number
+    """
+    return _bump_counter(GENERATION_FILE)
+
+
+def get_layout_generation() -> int:
+    """
+    Get the current layout generation.
+
+    Returns:
+        int: The generation number, or 0 if no layout has changed yet
+    """
+    return _read_counter(LAYOUT_GENERATION_FILE)
+
+
+def bump_layout_generation() -> int:
+    """
+    Advance the layout generation, invalidating cached layout builds in
+    every worker process.
+
+    Returns:
+        int: The new generation number
+    """
+    return _bump_counter(LAYOUT_GENERATION_FILE)
@@ -0,0 +1,122 @@
+"""
+In-process LRU cache and generation-keyed memoization.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from cache.disk import get_disk_cache
+from cache.generation import get_data_generation
+
+
+class LRUCache:
+    """Thread-safe, size-bounded least-recently-used cache."""
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of entries kept before the least
+                recently used one is evicted
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a key, marking it as recently used.
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._entries[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Entry count, hits and misses
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def memoize_by_generation(max_entries: int = 256, shared: bool = True) -> Callable:
+    """
+    Decorator caching a function's results for the current data generation.
+
+    Results are kept in an in-process LRU cache and, if shared, in the
+    on-disk cache that all worker processes read. They are shared between
+    callers and must be treated as read-only. Calls with unhashable
+    arguments bypass the cache.
+
+    Args:
+        max_entries: Maximum number of cached results for the function
+        shared: Also read and write the shared on-disk cache
+
+    Returns:
+        function: Decorator; the wrapped function exposes its LRUCache as
+        ``.cache``
+    """
+    def decorator(func: Callable) -> Callable:
+        cache = LRUCache(max_entries)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            call = (args, tuple(sorted(kwargs.items())))
+            # Read once, before computing: a result computed while an ETL
+            # run bumps the generation belongs to the generation it started in
+            generation = get_data_generation()
+            key = (generation,) + call
+            try:
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)
+
+            result = cache.get(key)
+            if result is not None:
+                return result
+
+            disk = get_disk_cache() if shared else None
+            disk_key = f"{name}:{hashlib.sha1(repr(call).encode('utf-8')).hexdigest()}"
+            result = disk.get(disk_key, generation) if disk else None
+            if result is None:
+                result = func(*args, **kwargs)
+                if disk:
+                    disk.set(disk_key, result, generation)
+
+            cache.set(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,246 @@
+"""
+Cache prewarming driven by observed filter popularity.
+
+Dashboard callbacks record which (year, month, department) combinations
+users select. Usage is anonymous (no user or session is stored) and is
+aggregated per day in the ``filter_usage`` table. After an ETL run publishes
+a new data generation, the most popular combinations are computed up front
+so the first users after a refresh hit warm query and figure caches.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from db.connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Number of filter combinations warmed after each ETL run
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "20"))
+
+# Chart widths the trend figure is warmed for; the live callback rounds the
+# measured width to a multiple of components.downsampling.WIDTH_BUCKET
+PREWARM_TREND_WIDTHS = [
+    int(width) for width in os.getenv("PREWARM_TREND_WIDTHS", "800,1200,1600,2000").split(",")
+]
+
+# Only usage from the last N days counts towards popularity
+POPULARITY_WINDOW_DAYS = 30
+
+# Buffered usage is written once this many selections or seconds accumulate
+FLUSH_EVERY_SELECTIONS = 50
+FLUSH_EVERY_SECONDS = 60
+
+# Filter values are stored as '' rather than NULL so the primary key
+# treats "no filter" as a single value
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS filter_usage (
+    year TEXT NOT NULL DEFAULT '',
+    month TEXT NOT NULL DEFAULT '',
+    dept TEXT NOT NULL DEFAULT '',
+    day TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (year, month, dept, day)
+);
+"""
+
+FilterCombo = Tuple[Optional[str], Optional[str], Optional[str]]
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _normalize(value: Any) -> str:
+    """Stored form of a filter value."""
+    return "" if value in (None, "") else str(value)
+
+
+def _denormalize(value: str) -> Optional[str]:
+    """Filter value as passed to the dashboard queries."""
+    return value or None
+
+
+def record_filter_usage(year=None, month=None, dept=None) -> None:
+    """
+    Record one selection of a filter combination.
+
+    Selections are counted in memory and written in batches, so this is
+    cheap enough to call from every dashboard callback.
+
+    Args:
+        year: Selected year filter value
+        month: Selected month filter value
+        dept: Selected department filter value
+    """
+    global _last_flush
+
+    combo = (_normalize(year), _normalize(month), _normalize(dept))
+    with _pending_lock:
+        _pending[combo] += 1
+        due = (
+            sum(_pending.values()) >= FLUSH_EVERY_SELECTIONS
+            or time.monotonic() - _last_flush >= FLUSH_EVERY_SECONDS
+        )
+
+    if due:
+        flush_filter_usage()
+
+
+def flush_filter_usage() -> int:
+    """
+    Write buffered selections to the filter_usage table.
+
+    Returns:
+        int: Number of distinct combinations written
+    """
+    global _last_flush
+
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+
+    if not pending:
+        return 0
+
+    today = date.today().isoformat()
+    try:
+        with get_connection() as conn:
+            conn.execute(CREATE_TABLE_SQL)
+            conn.executemany(
+                """
+                INSERT INTO filter_usage (year, month, dept, day, hits)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (year, month, dept, day)
+                DO UPDATE SET hits = hits + excluded.hits
+                """,
+                [(y, m, d, today, hits) for (y, m, d), hits in pending.items()]
+            )
+            conn.commit()
+    except Exception as e:
+        # Usage stats are best effort; never fail a request over them
+        logger.warning(f"Failed to record filter usage: {e}")
+        return 0
+
+    return len(pending)
+
+
+def get_popular_filters(
+    limit: int = PREWARM_TOP_N,
+    days: int = POPULARITY_WINDOW_DAYS
+) -> List[FilterCombo]:
+    """
+    Get the most frequently selected filter combinations.
+
+    Args:
+        limit: Maximum number of combinations to return
+        days: Only count selections from the last N days
+
+    Returns:
+        list: (year, month, dept) tuples, most popular first; None means
+        the filter was not set
+    """
+    since = (date.today() - timedelta(days=days)).isoformat()
+    with get_connection() as conn:
+        conn.execute(CREATE_TABLE_SQL)
+        rows = conn.execute(
+            """
+            SELECT year, month, dept, SUM(hits) AS total
+            FROM filter_usage
+            WHERE day >= ?
+            GROUP BY year, month, dept
+            ORDER BY total DESC, year DESC, month, dept
+            LIMIT ?
+            """,
+            (since, limit)
+        ).fetchall()
+
+    return [tuple(_denormalize(v) for v in row[:3]) for row in rows]
+
+
+def prune_filter_usage(days: int = POPULARITY_WINDOW_DAYS) -> int:
+    """
+    Delete usage rows that fall outside the popularity window.
+
+    Args:
+        days: Keep the last N days of usage
+
+    Returns:
+        int: Number of rows deleted
+    """
+    since = (date.today() - timedelta(days=days)).isoformat()
+    with get_connection() as conn:
+        conn.execute(CREATE_TABLE_SQL)
+        deleted = conn.execute("DELETE FROM filter_usage WHERE day < ?", (since,)).rowcount
+        conn.commit()
+    return deleted
+
+
+def warm_view(year=None, month=None, dept=None) -> None:
+    """
+    Populate the query and figure caches for one filter combination.
+
+    Args:
+        year: Year filter value
+        month: Month filter value
+        dept: Department filter value
+    """
+    # Imported here so the ETL can import this module without pulling in
+    # the dashboard components at module load
+    from db.queries import get_kpi_totals, get_status_distribution, get_permit_page, get_permit_trends
+    from components.charts import get_trend_figure, get_status_figure
+    from components.downsampling import get_trend_series
+
+    get_kpi_totals(year, month, dept)
+    # The daily query serves every width and zoom; the downsampled figure
+    # depends on the chart width, so the common widths are warmed
+    get_permit_trends(year, month, dept, granularity="day")
+    for width in PREWARM_TREND_WIDTHS:
+        get_trend_figure(get_trend_series(year, month, dept, width=width))
+    get_status_figure(get_status_distribution(year, month, dept))
+    get_permit_page(year, month, dept)
+
+
+def warm_popular_views(limit: int = PREWARM_TOP_N) -> Dict[str, Any]:
+    """
+    Warm the caches for the unfiltered view and the most popular filters.
+
+    Args:
+        limit: Number of popular combinations to warm
+
+    Returns:
+        dict: Number of views warmed, failures and duration in seconds
+    """
+    start = time.perf_counter()
+    flush_filter_usage()
+    prune_filter_usage()
+
+    # The sidebar's filter options are read on every page load
+    from db.queries import get_filter_options
+    try:
+        for column in ("year", "month", "action_by_dept"):
+            get_filter_options(column)
+    except Exception as e:
+        logger.warning(f"Failed to warm filter options: {e}")
+
+    combos = [(None, None, None)]
+    combos += [c for c in get_popular_filters(limit) if c != (None, None, None)]
+
+    warmed, failed = 0, 0
+    for combo in combos:
+        try:
+            warm_view(*combo)
+            warmed += 1
+        except Exception as e:
+            logger.warning(f"Failed to warm view {combo}: {e}")
+            failed += 1
+
+    duration = time.perf_counter() - start
+    logger.info(f"Warmed {warmed} dashboard views in {duration:.2f} seconds")
+    return {"views": warmed, "failed": failed, "duration_seconds": round(duration, 3)}
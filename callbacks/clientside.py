@@ -0,0 +1,410 @@
+"""
+Clientside (browser) callbacks for pure presentation logic.
+
+Callbacks that only reshape values already on the page run as JavaScript in
+the browser, saving a server round-trip per interaction. Each one is
+registered here together with a Python reference implementation of the same
+logic. Both are built from the shared constants below, and the tests run the
+JavaScript against the Python version to keep them consistent.
+"""
+import json
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dash import Input, Output, State, no_update
+
+from components.downsampling import DEFAULT_CHART_WIDTH
+from layout.layout_manager import (
+    get_layout_components, visibility_store_id, normalize_layout, LAYOUT_COMMIT_DELAY_TICKS
+)
+
+# Month names shown in the month filter, January first
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+# KPI texts shown before data arrives and when the filters match nothing
+KPI_PLACEHOLDER = "—"
+KPI_NO_DATA = "No data"
+
+# Dashboard components whose visibility is tracked, in output order
+COMPONENT_IDS = list(get_layout_components())
+
+# Stands in for dash_clientside.no_update when the JavaScript runs outside
+# the browser (the consistency tests compare it to Python's no_update)
+NO_UPDATE_JS = """
+    var noUpdate = typeof window !== "undefined" && window.dash_clientside ?
+        window.dash_clientside.no_update : null;
+"""
+
+# name -> {"function", "source", "outputs", "inputs"}
+_registry: Dict[str, Dict[str, Any]] = {}
+
+
+def clientside(
+    name: str,
+    outputs: Any,
+    inputs: List[Any],
+    source: str,
+    prevent_initial_call: bool = False
+) -> Callable:
+    """
+    Register a clientside callback and its Python reference implementation.
+
+    Args:
+        name: Unique name of the callback
+        outputs: Callback output, or a list of outputs
+        inputs: Callback inputs and states
+        source: JavaScript function source implementing the callback
+        prevent_initial_call: Don't run when the inputs first appear
+
+    Returns:
+        function: Decorator for the Python reference implementation
+    """
+    def decorator(func: Callable) -> Callable:
+        if name in _registry:
+            raise ValueError(f"Clientside callback '{name}' is already registered")
+        _registry[name] = {
+            "function": func,
+            "source": source,
+            "outputs": outputs,
+            "inputs": inputs,
+            "prevent_initial_call": prevent_initial_call,
+        }
+        return func
+
+    return decorator
+
+
+def get_clientside_callbacks() -> Dict[str, Dict[str, Any]]:
+    """
+    Get all registered clientside callbacks.
+
+    Returns:
+        dict: Registry entries keyed by callback name
+    """
+    return dict(_registry)
+
+
+def register_clientside_callbacks(app) -> None:
+    """
+    Register all clientside callbacks with the Dash app.
+
+    Args:
+        app: The Dash application instance
+    """
+    for entry in _registry.values():
+        app.clientside_callback(
+            entry["source"],
+            entry["outputs"],
+            entry["inputs"],
+            prevent_initial_call=entry["prevent_initial_call"],
+        )
+
+
+@clientside(
+    "month_options",
+    outputs=[Output("filter-month", "options"), Output("filter-month", "disabled")],
+    inputs=[Input("filter-year", "value")],
+    source="""
+    function(selectedYear) {
+        if (!selectedYear) {
+            return [[], true];
+        }
+        var months = %s;
+        return [
+            months.map(function(label, i) {
+                return {label: label, value: String(i + 1).padStart(2, "0")};
+            }),
+            false
+        ];
+    }
+    """ % json.dumps(MONTH_NAMES)
+)
+def month_options(selected_year: Optional[str]) -> Tuple[List[Dict[str, str]], bool]:
+    """
+    Get the month dropdown options for the selected year.
+
+    Args:
+        selected_year: The selected year from the year dropdown
+
+    Returns:
+        tuple: Month options and the dropdown's disabled state
+    """
+    if not selected_year:
+        return [], True
+
+    months = [
+        {"label": month, "value": str(i).zfill(2)}
+        for i, month in enumerate(MONTH_NAMES, 1)
+    ]
+    return months, False
+
+
+@clientside(
+    "kpi_text",
+    outputs=[
+        Output("kpi-total-permits", "children"),
+        Output("kpi-total-valuation", "children"),
+        Output("kpi-department-count", "children"),
+    ],
+    inputs=[Input("kpi-totals", "data")],
+    source="""
+    function(totals) {
+        if (!totals) {
+            return [%(placeholder)s, %(placeholder)s, %(placeholder)s];
+        }
+        if (!totals.total_permits) {
+            return [%(no_data)s, %(placeholder)s, %(placeholder)s];
+        }
+        // toFixed rounds the exact binary value, like Python's format()
+        var group = function(text) {
+            return text.replace(/\\B(?=(\\d{3})+(?!\\d))/g, ",");
+        };
+        var valuation = Number(totals.total_valuation || 0).toFixed(2).split(".");
+        return [
+            group(String(totals.total_permits)),
+            "$" + group(valuation[0]) + "." + valuation[1],
+            String(totals.department_count)
+        ];
+    }
+    """ % {"placeholder": json.dumps(KPI_PLACEHOLDER), "no_data": json.dumps(KPI_NO_DATA)}
+)
+def kpi_text(totals: Optional[Dict[str, Any]]) -> Tuple[str, str, str]:
+    """
+    Format the raw KPI totals for display.
+
+    Args:
+        totals: Totals from get_kpi_totals, or None before they are loaded
+
+    Returns:
+        tuple: Display texts for total permits, total valuation and
+        department count
+    """
+    if not totals:
+        return KPI_PLACEHOLDER, KPI_PLACEHOLDER, KPI_PLACEHOLDER
+
+    if not totals["total_permits"]:
+        return KPI_NO_DATA, KPI_PLACEHOLDER, KPI_PLACEHOLDER
+
+    return (
+        f"{totals['total_permits']:,}",
+        f"${float(totals['total_valuation'] or 0):,.2f}",
+        f"{totals['department_count']}",
+    )
+
+
+@clientside(
+    "session_id",
+    outputs=Output("session-id", "data"),
+    inputs=[Input("url", "pathname"), State("session-id", "data")],
+    source="""
+    function(pathname, sessionId) {
+        if (sessionId) {
+            return sessionId;
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+    """
+)
+def session_id(pathname: Optional[str], current: Optional[str]) -> str:
+    """
+    Get the ID of the browser session, creating one on first load.
+
+    Args:
+        pathname: Current URL path (only used as a trigger)
+        current: ID already stored for the session
+
+    Returns:
+        str: The session ID
+    """
+    return current or uuid.uuid4().hex
+
+
+@clientside(
+    "trend_chart_width",
+    outputs=Output("trend-chart-width", "data"),
+    inputs=[Input("permit-trend-chart", "relayoutData"), State("trend-chart-width", "data")],
+    source="""
+    function(relayoutData, current) {
+        var graph = typeof document !== "undefined" &&
+            document.getElementById("permit-trend-chart");
+        if (!graph || !graph.offsetWidth) {
+            return current || %d;
+        }
+        return graph.offsetWidth;
+    }
+    """ % DEFAULT_CHART_WIDTH
+)
+def trend_chart_width(relayout_data: Optional[Dict[str, Any]], current: Optional[int]) -> int:
+    """
+    Get the trend chart's width in pixels.
+
+    Plotly reports resizes through relayoutData, which triggers a new
+    measurement in the browser. The server can't measure the page, so this
+    reference implementation is the fallback used when the chart isn't
+    rendered.
+
+    Args:
+        relayout_data: Latest relayout event of the chart (only a trigger)
+        current: Width measured previously
+
+    Returns:
+        int: The chart width
+    """
+    return current or DEFAULT_CHART_WIDTH
+
+
+@clientside(
+    "component_visibility",
+    outputs=[Output(visibility_store_id(cid), "data") for cid in COMPONENT_IDS],
+    inputs=[Input("visibility-poll", "n_intervals")]
+    + [State(visibility_store_id(cid), "data") for cid in COMPONENT_IDS],
+    source="""
+    function(nIntervals) {
+        var current = Array.prototype.slice.call(arguments, 1);
+        var ids = %s;
+        var hasDom = typeof document !== "undefined";
+        var noUpdate = typeof window !== "undefined" && window.dash_clientside ?
+            window.dash_clientside.no_update : undefined;
+        return ids.map(function(id, i) {
+            var visible = false;
+            var card = hasDom && document.getElementById("card-" + id);
+            if (card) {
+                var rect = card.getBoundingClientRect();
+                visible = rect.width > 0 && rect.height > 0 &&
+                    rect.bottom > 0 && rect.top < window.innerHeight &&
+                    rect.right > 0 && rect.left < window.innerWidth;
+            }
+            // Unchanged values don't re-trigger the data callbacks
+            return visible === current[i] && noUpdate !== undefined ? noUpdate : visible;
+        });
+    }
+    """ % json.dumps(COMPONENT_IDS)
+)
+def component_visibility(n_intervals: Optional[int], *current: Optional[bool]) -> List[bool]:
+    """
+    Check which dashboard components are on screen.
+
+    In the browser each component's card is measured against the viewport,
+    and only changed values are sent. The server can't see the page, so
+    this reference implementation reports every component as hidden, which
+    is what the browser reports before the grid is rendered.
+
+    Args:
+        n_intervals: Number of polls so far (only a trigger)
+        *current: Visibility stored previously, one value per component
+
+    Returns:
+        list: Visibility of each component, in COMPONENT_IDS order
+    """
+    return [False for _ in COMPONENT_IDS]
+
+
+@clientside(
+    "buffer_layout",
+    outputs=Output("layout-buffer", "data"),
+    inputs=[Input("dashboard-grid", "layout"), State("layout-buffer", "data")],
+    source="""
+    function(layout, buffer) {
+        return {layout: layout, seq: (buffer ? buffer.seq : 0) + 1};
+    }
+    """,
+    prevent_initial_call=True
+)
+def buffer_layout(
+    layout: List[Dict[str, Any]],
+    buffer: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Keep the latest grid layout in the browser.
+
+    The grid reports a new layout on every drag and resize step; only the
+    last one matters, so nothing is sent to the server here.
+
+    Args:
+        layout: Layout reported by the grid
+        buffer: Previously buffered layout
+
+    Returns:
+        dict: The layout and a sequence number identifying the change
+    """
+    return {"layout": layout, "seq": (buffer["seq"] if buffer else 0) + 1}
+
+
+@clientside(
+    "debounce_layout",
+    outputs=[Output("layout-debounce", "data"), Output("layout-pending", "data")],
+    inputs=[
+        Input("layout-commit-timer", "n_intervals"),
+        State("layout-buffer", "data"),
+        State("layout-debounce", "data"),
+        State("layout-saved", "data"),
+    ],
+    source="""
+    function(nIntervals, buffer, debounce, saved) {
+        %(no_update)s
+        if (!buffer || (debounce && debounce.seq === buffer.seq && debounce.done)) {
+            return [noUpdate, noUpdate];
+        }
+        var ticks = debounce && debounce.seq === buffer.seq ? debounce.ticks + 1 : 1;
+        if (ticks < %(delay)d) {
+            return [{seq: buffer.seq, ticks: ticks, done: false}, noUpdate];
+        }
+        var fields = ["x", "y", "w", "h"];
+        var layout = (buffer.layout || []).filter(function(item) {
+            return item.i !== undefined && fields.every(function(k) {
+                return item[k] !== undefined;
+            });
+        }).map(function(item) {
+            return {i: item.i, x: item.x, y: item.y, w: item.w, h: item.h};
+        }).sort(function(a, b) {
+            return a.i < b.i ? -1 : a.i > b.i ? 1 : 0;
+        });
+        var unchanged = saved && JSON.stringify(layout) === JSON.stringify(saved.layout);
+        return [
+            {seq: buffer.seq, ticks: ticks, done: true},
+            unchanged ? noUpdate : {seq: buffer.seq, layout: layout}
+        ];
+    }
+    """ % {"no_update": NO_UPDATE_JS, "delay": LAYOUT_COMMIT_DELAY_TICKS}
+)
+def debounce_layout(
+    n_intervals: Optional[int],
+    buffer: Optional[Dict[str, Any]],
+    debounce: Optional[Dict[str, Any]],
+    saved: Optional[Dict[str, Any]]
+) -> Tuple[Any, Any]:
+    """
+    Release the buffered layout once the grid has been quiet for a while.
+
+    Called on every tick of the commit timer. A layout is handed to the
+    server after LAYOUT_COMMIT_DELAY_TICKS ticks without a newer change,
+    and only if it differs from the last saved layout.
+
+    Args:
+        n_intervals: Number of timer ticks (only a trigger)
+        buffer: Buffered layout and its sequence number
+        debounce: Sequence number being timed, ticks counted and whether it
+            has been handled
+        saved: Last saved layout and its version
+
+    Returns:
+        tuple: New debounce state and the layout to save (no_update for
+        either when unchanged)
+    """
+    if not buffer or (debounce and debounce["seq"] == buffer["seq"] and debounce["done"]):
+        return no_update, no_update
+
+    same = debounce and debounce["seq"] == buffer["seq"]
+    ticks = debounce["ticks"] + 1 if same else 1
+    if ticks < LAYOUT_COMMIT_DELAY_TICKS:
+        return {"seq": buffer["seq"], "ticks": ticks, "done": False}, no_update
+
+    layout = normalize_layout(buffer["layout"])
+    unchanged = saved and layout == saved["layout"]
+    return (
+        {"seq": buffer["seq"], "ticks": ticks, "done": True},
+        no_update if unchanged else {"seq": buffer["seq"], "layout": layout},
+    )
@@ -7,15 +7,23 @@ import logging
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, List, Optional
-import pandas as pd
 from dash import Input, Output, State, html, dcc, ctx, no_update
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
+from flask import Flask, Response, abort, request, stream_with_context
 
+from components.datatable import PERMIT_QUERY_COLUMNS
 from components.export_utils import (
-    export_to_csv, export_to_excel, export_to_pdf, create_zip_archive,
-    mask_sensitive_columns, cleanup_old_exports
+    ARROW_FORMATS, arrow_available, iter_arrow, iter_csv, iter_zip, csv_member, pdf_member,
+    cleanup_old_exports, generate_filename
 )
+from db.filter_query import FilterQueryError, build_where, build_order_by
+from db.queries import PERMIT_TABLE_COLUMNS, iter_permit_rows
+from scheduler.export_jobs import (
+    COMPLETED, FAILED, CANCELLED, QUEUED,
+    submit_export_job, get_export_job, cancel_export_job, recover_export_jobs
+)
+from layout.route_protect import get_current_user
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -28,6 +36,12 @@ EXPORT_BUTTON_IDS = {
     'zip': 'export-zip-btn'
 }
 
+# Formats offered in the export modal; Parquet and Arrow need pyarrow
+EXPORT_FORMATS = ('csv', 'excel', 'pdf', 'zip', 'parquet', 'arrow')
+
+# How often the browser checks on a running export job
+EXPORT_POLL_MS = 1000
+
 # Track registered callbacks to prevent duplicates
 _registered_callbacks = set()
 
@@ -47,6 +61,8 @@ def register_export_callbacks(app, db):
             Output("export-download-link", "href"),
             Output("export-download-link", "style"),
             Output("export-modal", "is_open"),
+            Output("export-job", "data"),
+            Output("export-job-poll", "disabled"),
         ],
         [
             Input(EXPORT_BUTTON_IDS['csv'], "n_clicks"),
@@ -56,8 +72,11 @@ def register_export_callbacks(app, db):
             Input("export-confirm-btn", "n_clicks"),
         ],
         [
-            State("filtered-table", "data"),
-            State("filtered-table", "columns"),
+            State("filter-year", "value"),
+            State("filter-month", "value"),
+            State("filter-department", "value"),
+            State("permit-table", "filter_query"),
+            State("permit-table", "sort_by"),
             State("current-user", "data"),
             State("export-filename", "value"),
             State("export-format", "value"),
@@ -66,92 +85,106 @@ def register_export_callbacks(app, db):
     )
     def handle_export(
         csv_clicks, excel_clicks, pdf_clicks, zip_clicks, confirm_clicks,
-        table_data, table_columns, current_user, filename, export_format
+        year, month, dept, filter_query, sort_by, current_user, filename, export_format
     ):
-        """Handle export button clicks and generate export files."""
+        """
+        Open the export options, or queue an export job on confirmation.
+        
+        Exports are built from the active filters (sidebar and permit table)
+        by a background worker (see scheduler/export_jobs.py); the browser
+        then polls the job until its file is ready.
+        """
         if not current_user or 'id' not in current_user or 'role' not in current_user:
-            return "Error: User not authenticated", "", {"display": "none"}, False
+            return "Error: User not authenticated", "", {"display": "none"}, False, no_update, True
         
         # Get the button that triggered the callback
-        ctx = dash.callback_context
         if not ctx.triggered:
             raise PreventUpdate
             
-        button_id = ctx.triggered[0]["prop_id"].split(".")[0]
+        button_id = ctx.triggered_id
         
         # Handle export preview (when any export button is clicked)
         if button_id in EXPORT_BUTTON_IDS.values():
-            if not table_data:
-                return "No data to export", "", {"display": "none"}, False
-                
             # Show export options modal
             return (
                 "",  # status
                 "",  # download link
                 {"display": "none"},  # download link style
                 True,  # show modal
+                no_update,  # job
+                no_update,  # polling
             )
         
         # Handle export confirmation
         elif button_id == "export-confirm-btn" and confirm_clicks:
-            if not table_data or not filename:
-                return "Error: Missing data or filename", "", {"display": "none"}, False
+            if not filename:
+                return "Error: Missing filename", "", {"display": "none"}, False, no_update, True
+            if export_format not in EXPORT_FORMATS or (
+                    export_format in ARROW_FORMATS and not arrow_available()):
+                return (f"Unsupported format: {export_format}", "", {"display": "none"}, False,
+                        no_update, True)
             
+            filters = {
+                'year': year, 'month': month, 'dept': dept,
+                'filter_query': filter_query, 'sort_by': sort_by,
+            }
             try:
-                # Convert table data to DataFrame
-                df = pd.DataFrame(table_data)
-                
-                # Apply role-based column masking
-                df = mask_sensitive_columns(df, current_user.get('role', 'viewer'))
-                
-                # Generate export
-                user_id = str(current_user['id'])
-                base_name = filename or "export"
-                
-                if export_format == 'csv':
-                    file_path = export_to_csv(df, user_id, base_name)
-                elif export_format == 'excel':
-                    file_path = export_to_excel(df, user_id, base_name)
-                elif export_format == 'pdf':
-                    file_path = export_to_pdf(df, user_id, base_name, f"{base_name.title()} Report")
-                elif export_format == 'zip':
-                    # Create multiple formats and zip them
-                    csv_path = export_to_csv(df, user_id, base_name)
-                    pdf_path = export_to_pdf(df, user_id, base_name, f"{base_name.title()} Report")
-                    file_path = create_zip_archive([csv_path, pdf_path], user_id, base_name)
-                else:
-                    return f"Unsupported format: {export_format}", "", {"display": "none"}, False
-                
-                # Log the export
-                log_export(db, {
-                    'user_id': user_id,
-                    'format': export_format,
-                    'file_path': file_path,
-                    'rows_exported': len(df),
-                    'exported_at': datetime.now().isoformat(),
-                    'metadata': {
-                        'filename': filename,
-                        'columns': list(df.columns),
-                        'role': current_user.get('role')
-                    }
-                })
-                
-                # Return download link
-                download_path = f"/exports/{user_id}/{os.path.basename(file_path)}"
-                return (
-                    "Export completed successfully!",
-                    download_path,
-                    {"display": "inline-block"},
-                    False
+                # Reject unsupported table filters now rather than in the worker
+                build_where(filter_query, PERMIT_TABLE_COLUMNS)
+                build_order_by(sort_by, PERMIT_TABLE_COLUMNS)
+                job_id = submit_export_job(
+                    str(current_user['id']), current_user.get('role', 'viewer'),
+                    export_format, filename, filters
                 )
-                
+            except FilterQueryError as e:
+                return f"Export failed: {str(e)}", "", {"display": "none"}, False, no_update, True
             except Exception as e:
                 logger.error(f"Export failed: {str(e)}", exc_info=True)
-                return f"Export failed: {str(e)}", "", {"display": "none"}, False
+                return f"Export failed: {str(e)}", "", {"display": "none"}, False, no_update, True
+            
+            return "Export queued...", "", {"display": "none"}, False, job_id, False
         
         # Default return if no conditions met
         raise PreventUpdate
     
+    @app.callback(
+        Output("export-status", "children", allow_duplicate=True),
+        Output("export-download-link", "href", allow_duplicate=True),
+        Output("export-download-link", "style", allow_duplicate=True),
+        Output("export-job-poll", "disabled", allow_duplicate=True),
+        Output("export-cancel-job-btn", "style"),
+        Input("export-job-poll", "n_intervals"),
+        State("export-job", "data"),
+        State("current-user", "data"),
+        prevent_initial_call=True,
+    )
+    def poll_export_job(n_intervals, job_id, current_user):
+        """Show the progress of the current export job until it finishes."""
+        if not job_id or not current_user or 'id' not in current_user:
+            return no_update, no_update, no_update, True, {"display": "none"}
+        
+        job = get_export_job(job_id, str(current_user['id']))
+        if job is None:
+            return "Export not found", "", {"display": "none"}, True, {"display": "none"}
+        
+        return export_job_status(job)
+    
+    @app.callback(
+        Output("export-status", "children", allow_duplicate=True),
+        Input("export-cancel-job-btn", "n_clicks"),
+        State("export-job", "data"),
+        State("current-user", "data"),
+        prevent_initial_call=True,
+    )
+    def cancel_export(n_clicks, job_id, current_user):
+        """Cancel the current export job."""
+        if not n_clicks or not job_id or not current_user or 'id' not in current_user:
+            raise PreventUpdate
+        
+        if cancel_export_job(job_id, str(current_user['id'])):
+            return "Cancelling export..."
+        raise PreventUpdate
+    
     # Function to initialize the export system
     def init_export_system():
         # Ensure export directory exists
@@ -163,11 +196,127 @@ def register_export_callbacks(app, db):
             cleanup_old_exports(days=30)
         except Exception as e:
             logger.error(f"Error cleaning up old exports: {e}")
+        
+        # Resume export jobs interrupted by a restart
+        try:
+            recover_export_jobs()
+        except Exception as e:
+            logger.error(f"Error recovering export jobs: {e}")
     
     # Call the initialization function immediately
     init_export_system()
 
 
+def _format_bytes(size: int) -> str:
+    """Human readable file size."""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def export_job_status(job: Dict[str, Any]) -> tuple:
+    """
+    Render an export job for the polling callback.
+    
+    Args:
+        job: Job from get_export_job
+        
+    Returns:
+        tuple: Status children, download link href and style, whether
+        polling stops, and the style of the cancel button
+    """
+    hidden = {"display": "none"}
+    status = job['status']
+    
+    if status == COMPLETED:
+        download_path = f"/exports/{job['user_id']}/{os.path.basename(job['file_path'])}"
+        message = (f"Export completed successfully! {job['rows_written']:,} rows, "
+                   f"{_format_bytes(job['bytes_written'])}")
+        return message, download_path, {"display": "inline-block"}, True, hidden
+    if status == FAILED:
+        return f"Export failed: {job['error']}", "", hidden, True, hidden
+    if status == CANCELLED:
+        return "Export cancelled", "", hidden, True, hidden
+    
+    if status == QUEUED:
+        children = "Export queued..."
+    else:
+        total = job['total_rows']
+        rows = job['rows_written']
+        label = f"{rows:,} of {total:,} rows" if total else f"{rows:,} rows"
+        if job['bytes_written']:
+            label += f" ({_format_bytes(job['bytes_written'])})"
+        children = [
+            html.Div(f"Exporting... {label}", className="small mb-1"),
+            dbc.Progress(value=100 * rows / total if total else 0, striped=True, animated=True),
+        ]
+    return children, "", hidden, False, {"display": "inline-block"}
+
+
+def register_export_routes(server: Flask) -> None:
+    """
+    Add the streaming download routes to the Flask server.
+    
+    ``GET /exports/stream/permits.csv``, ``.zip``, ``.parquet`` and
+    ``.arrow`` take the dashboard filters as query parameters (year, month,
+    dept, and the permit table's filter_query and JSON-encoded sort_by) and
+    stream the matching permits from the database cursor as they are read,
+    so nothing is buffered or written to disk. The ZIP holds the CSV and a
+    PDF report; Parquet and Arrow IPC files are written a row group at a
+    time and need pyarrow.
+    
+    Args:
+        server: The Dash app's Flask server
+    """
+    @server.route('/exports/stream/permits.<any(csv, zip, parquet, arrow):extension>')
+    def stream_permits(extension):
+        """Stream the permits matching the request's filters."""
+        user = get_current_user()
+        if not user:
+            abort(401)
+        if extension in ARROW_FORMATS and not arrow_available():
+            abort(501)
+        
+        try:
+            filters = {
+                'year': request.args.get('year') or None,
+                'month': request.args.get('month') or None,
+                'dept': request.args.get('dept') or None,
+                'filter_query': request.args.get('filter_query') or None,
+                'sort_by': json.loads(request.args.get('sort_by') or '[]'),
+            }
+            chunks = iter_permit_rows(**filters)
+        except (ValueError, TypeError, AttributeError, KeyError) as e:
+            # FilterQueryError is a ValueError, as is invalid JSON
+            logger.warning(f"Rejected export filters: {e}")
+            abort(400)
+        
+        role = user.get('role', 'viewer')
+        filename = generate_filename("permits", extension)
+        if extension == 'csv':
+            body = (text.encode('utf-8') for text in iter_csv(chunks, PERMIT_QUERY_COLUMNS, role))
+            mimetype = 'text/csv'
+        elif extension in ARROW_FORMATS:
+            body = iter_arrow(chunks, PERMIT_QUERY_COLUMNS, extension, role)
+            mimetype = ARROW_FORMATS[extension][1]
+        else:
+            members = [
+                csv_member("permits.csv", chunks, PERMIT_QUERY_COLUMNS, role),
+                pdf_member("permits.pdf", iter_permit_rows(**filters), PERMIT_QUERY_COLUMNS,
+                           str(user.get('user_id', '')), "Permits Report", role),
+            ]
+            body = iter_zip(members)
+            mimetype = 'application/zip'
+        
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+
+
 def log_export(db, export_data):
     """
     Log export operation to the database.
@@ -251,7 +400,10 @@ def create_export_modal():
                                     {"label": "Excel", "value": "excel"},
                                     {"label": "PDF", "value": "pdf"},
                                     {"label": "ZIP (CSV + PDF)", "value": "zip"},
-                                ],
+                                ] + ([
+                                    {"label": "Parquet", "value": "parquet"},
+                                    {"label": "Arrow IPC (Feather)", "value": "arrow"},
+                                ] if arrow_available() else []),
                                 value="csv",
                                 className="mb-2"
                             ),
@@ -304,6 +456,16 @@ def create_export_buttons():
         ]),
         # Status message and download link
         html.Div(id="export-status", className="mt-2"),
+        dbc.Button(
+            "Cancel export",
+            id="export-cancel-job-btn",
+            color="link",
+            size="sm",
+            style={"display": "none"}
+        ),
+        # Current export job, polled until it finishes
+        dcc.Store(id="export-job"),
+        dcc.Interval(id="export-job-poll", interval=EXPORT_POLL_MS, disabled=True),
         html.A(
             id="export-download-link",
             children="Download File",
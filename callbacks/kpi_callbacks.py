@@ -1,26 +1,30 @@
-from dash import Input, Output, callback
+from dash import Input, Output, State, callback
+from dash.exceptions import PreventUpdate
 from db.queries import get_kpi_totals
+from db.cancellation import cancellable
+from layout.layout_manager import visibility_store_id
 
 def register_kpi_callbacks(app):
     @app.callback(
-        Output("kpi-total-permits", "children"),
-        Output("kpi-total-valuation", "children"),
-        Output("kpi-department-count", "children"),
+        Output("kpi-totals", "data"),
         Input("filter-year", "value"),
         Input("filter-month", "value"),
-        Input("filter-department", "value")
+        Input("filter-department", "value"),
+        # The KPIs are only loaded while their card is on screen
+        Input(visibility_store_id("kpi-1"), "data"),
+        # Lets newer filter changes cancel this request (db/cancellation.py)
+        State("session-id", "data")
     )
-    def update_kpis(year, month, department):
-        # Get the totals from the database
-        totals = get_kpi_totals(year, month, department)
+    @cancellable("kpis")
+    def update_kpis(year, month, department, is_visible):
+        if not is_visible:
+            raise PreventUpdate
         
-        # Format the values with appropriate formatting
-        if totals["total_permits"] == 0:
-            return "No data", "—", "—"
-            
-        total_permits = f"{totals['total_permits']:,}"
+        # Get the totals from the database; the KPI texts are formatted
+        # in the browser (see callbacks/clientside.py)
+        totals = get_kpi_totals(year, month, department)
         
-        # Format currency, handling both string and numeric values
+        # Send the valuation as a number, handling both string and numeric values
         valuation = totals['total_valuation']
         if isinstance(valuation, str):
             # Remove any existing currency symbols and commas
@@ -30,7 +34,8 @@ def register_kpi_callbacks(app):
             except (ValueError, TypeError):
                 valuation = 0.0
         
-        total_valuation = f"${valuation:,.2f}" if valuation is not None else "$0.00"
-        dept_count = f"{totals['department_count']}"
-
-        return total_permits, total_valuation, dept_count
+        return {
+            "total_permits": totals["total_permits"],
+            "total_valuation": valuation or 0.0,
+            "department_count": totals["department_count"],
+        }
@@ -1,11 +1,18 @@
 """
 Callbacks for handling dashboard layout changes and persistence.
 """
+import logging
 from typing import Dict, Any, Tuple, List
 from dash import Input, Output, State, callback, ctx, no_update
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
-from layout.layout_manager import build_dashboard_layout, save_dashboard_layout, reset_dashboard_layout
+from components.draggable import create_draggable_grid
+from db.queries import LayoutConflictError
+from layout.layout_manager import (
+    build_dashboard_layout, commit_dashboard_layout, reset_dashboard_layout, normalize_layout
+)
+
+logger = logging.getLogger(__name__)
 
 
 def register_layout_callbacks(app):
@@ -15,46 +22,62 @@ def register_layout_callbacks(app):
     Args:
         app: Dash application instance
     """
+    def loaded(layout_data: Dict[str, Any], message: str, status_class: str) -> Tuple:
+        """Outputs showing a freshly built layout."""
+        return (
+            layout_data["layout"],
+            layout_data["components"],
+            message,
+            status_class,
+            {"version": layout_data["version"], "layout": normalize_layout(layout_data["layout"])}
+        )
+    
     @app.callback(
         [
             Output("dashboard-grid", "layout"),
             Output("dashboard-grid", "children"),
             Output("save-status", "children"),
-            Output("save-status", "className")
+            Output("save-status", "className"),
+            Output("layout-saved", "data")
         ],
         [
             Input("save-layout-btn", "n_clicks"),
             Input("reset-layout-btn", "n_clicks"),
-            Input("dashboard-grid", "layout"),
+            Input("layout-pending", "data"),
             Input("current-user", "modified_timestamp")
         ],
         [
             State("current-user", "data"),
             State("dashboard-grid", "layout"),
-            State("save-status", "className")
+            State("layout-saved", "data")
         ],
         prevent_initial_call=True
     )
     def handle_layout_actions(
         save_clicks: int,
         reset_clicks: int,
-        current_layout: List[Dict[str, Any]],
+        pending: Dict[str, Any],
         user_ts: int,
         user_data: Dict[str, Any],
-        previous_layout: List[Dict[str, Any]],
-        status_class: str
-    ) -> Tuple[List[Dict[str, Any]], List[Any], str, str]:
+        current_layout: List[Dict[str, Any]],
+        saved: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], List[Any], str, str, Dict[str, Any]]:
         """
         Handle layout saving, resetting, and loading.
         
+        Grid changes arrive through ``layout-pending``, which the browser
+        only sets once dragging has stopped (see callbacks/clientside.py).
+        They are saved as a diff against the version the browser last saw;
+        if another window saved in between, its layout is loaded instead.
+        
         Args:
             save_clicks: Number of times save button was clicked
             reset_clicks: Number of times reset button was clicked
-            current_layout: Current grid layout
+            pending: Debounced grid layout waiting to be saved
             user_ts: Timestamp of last user data modification
             user_data: Current user data
-            previous_layout: Previous grid layout
-            status_class: Current status message CSS class
+            current_layout: Current grid layout
+            saved: Last saved layout and its version
             
         Returns:
             Tuple containing:
@@ -62,68 +85,68 @@ def register_layout_callbacks(app):
                 - Grid children components
                 - Status message
                 - Status message CSS class
+                - Saved layout and version
         """
         if not user_data or "user_id" not in user_data:
             raise PreventUpdate
             
         user_id = user_data["user_id"]
         
-        # Handle save button click
-        if ctx.triggered_id == "save-layout-btn":
-            if save_dashboard_layout(user_id, current_layout):
+        # Handle save button click or a debounced grid change
+        if ctx.triggered_id in ("save-layout-btn", "layout-pending"):
+            layout = current_layout if ctx.triggered_id == "save-layout-btn" else pending["layout"]
+            if not layout:
+                raise PreventUpdate
+            try:
+                version = commit_dashboard_layout(
+                    user_id, layout, saved["version"] if saved else None
+                )
+            except LayoutConflictError:
+                return loaded(
+                    build_dashboard_layout(user_id),
+                    "This layout was changed in another window; showing the latest version.",
+                    "text-warning"
+                )
+            except Exception as e:
+                logger.error(f"Error saving layout for {user_id}: {e}")
                 return (
-                    current_layout,
                     no_update,
-                    "Layout saved successfully!",
-                    "text-success"
+                    no_update,
+                    "Failed to save layout. Please try again.",
+                    "text-danger",
+                    no_update
                 )
             return (
                 no_update,
                 no_update,
-                "Failed to save layout. Please try again.",
-                "text-danger"
+                "Layout saved.",
+                "text-success",
+                {"version": version, "layout": normalize_layout(layout)}
             )
             
         # Handle reset button click
         elif ctx.triggered_id == "reset-layout-btn":
             if reset_dashboard_layout(user_id):
                 # Rebuild the layout with defaults
-                layout_data = build_dashboard_layout(user_id)
-                return (
-                    layout_data["layout"],
-                    layout_data["components"],
-                    "Layout reset to default.",
-                    "text-info"
-                )
+                return loaded(build_dashboard_layout(user_id), "Layout reset to default.", "text-info")
             return (
                 no_update,
                 no_update,
                 "Failed to reset layout. Please try again.",
-                "text-danger"
+                "text-danger",
+                no_update
             )
             
         # Handle initial load or user change
-        elif ctx.triggered_id == "current-user.modified_timestamp":
+        elif ctx.triggered_id == "current-user":
             layout_data = build_dashboard_layout(user_id)
-            return (
-                layout_data["layout"],
-                layout_data["components"],
-                "Welcome! Drag and drop to customize your dashboard." if layout_data["is_default"] 
+            return loaded(
+                layout_data,
+                "Welcome! Drag and drop to customize your dashboard." if layout_data["is_default"]
                 else "Your saved layout has been loaded.",
                 "text-muted"
             )
             
-        # Handle layout changes (auto-save could be implemented here)
-        elif ctx.triggered_id == "dashboard-grid.layout":
-            # Optional: Auto-save on layout change
-            # save_dashboard_layout(user_id, current_layout)
-            return (
-                current_layout,
-                no_update,
-                "Drag and drop to rearrange. Don't forget to save your changes!",
-                "text-warning"
-            )
-            
         raise PreventUpdate
     
     @app.callback(
@@ -1,7 +1,16 @@
-from dash import Input, Output, callback, State
-from db.queries import get_permit_trends, get_status_distribution, get_filtered_permits
-from components.charts import build_trend_chart, build_status_chart
-from components.datatable import build_permit_table
+import logging
+from dash import Input, Output, callback, State, ctx
+from dash.exceptions import PreventUpdate
+from db.queries import get_status_distribution, get_permit_page
+from db.filter_query import FilterQueryError, page_count
+from components.downsampling import get_trend_series, zoom_range, is_zoom_reset
+from components.charts import figure_patch
+from components.datatable import permit_table_records, no_data_style
+from cache.prewarm import record_filter_usage
+from db.cancellation import cancellable, raise_if_stale
+from layout.layout_manager import visibility_store_id
+
+logger = logging.getLogger(__name__)
 
 def register_visual_callbacks(app):
     """
@@ -10,77 +19,167 @@ def register_visual_callbacks(app):
     Args:
         app: The Dash application instance
     """
+    filter_inputs = [
+        Input("filter-year", "value"),
+        Input("filter-month", "value"),
+        Input("filter-department", "value"),
+    ]
+    filter_ids = {dependency.component_id for dependency in filter_inputs}
+    
+    # Newer filter changes from the same browser session cancel older
+    # requests of the same callback (see db/cancellation.py)
+    session_state = State("session-id", "data")
+    
+    # Components are only filled while on screen; becoming visible again
+    # brings them up to date with filter changes made while hidden
+    def visibility_input(component_id):
+        return Input(visibility_store_id(component_id), "data")
+    
     @app.callback(
-        [
-            Output("chart-trend-container", "children"),
-            Output("chart-status-container", "children"),
-            Output("table-permits-container", "children"),
-            Output("loading-output-1", "children"),
-        ],
-        [
-            Input("filter-year", "value"),
-            Input("filter-month", "value"),
-            Input("filter-department", "value"),
+        Output("permit-trend-chart", "figure"),
+        filter_inputs + [
+            Input("permit-trend-chart", "relayoutData"),
+            visibility_input("chart-trend"),
         ],
+        State("trend-chart-width", "data"),
+        session_state,
         prevent_initial_call=False,
     )
-    def update_visuals(year, month, dept):
+    @cancellable("trend")
+    def update_trend_chart(year, month, dept, relayout_data, is_visible, width):
         """
-        Update all visual components based on filter selections.
+        Update the trend chart for the selected filters or zoom range.
+        
+        The daily series is downsampled to the chart width. Zooming
+        re-queries only the visible range, at higher resolution.
         
         Args:
             year: Selected year filter value
             month: Selected month filter value
             dept: Selected department filter value
+            relayout_data: Latest zoom/pan event of the chart
+            is_visible: Whether the chart is on screen
+            width: Chart width in pixels, measured in the browser
             
         Returns:
-            tuple: Updated chart and table components
+            Patch: Partial figure update with the new trace arrays
         """
-        # Get data for each component
-        trends_data = get_permit_trends(year, month, dept)
-        status_data = get_status_distribution(year, month, dept)
-        permits_data = get_filtered_permits(year, month, dept)
+        if not is_visible:
+            raise PreventUpdate
         
-        # Build components with the filtered data
-        trend_chart = build_trend_chart(trends_data)
-        status_chart = build_status_chart(status_data)
-        permit_table = build_permit_table(permits_data)
+        visible = None
+        if ctx.triggered_id == "permit-trend-chart":
+            visible = zoom_range(relayout_data)
+            if visible is None and not is_zoom_reset(relayout_data):
+                # Resize, hover mode or y-axis changes don't need new data
+                raise PreventUpdate
+        elif ctx.triggered_id in filter_ids:
+            # Count the selection (anonymously) so popular views get prewarmed;
+            # page loads and the chart scrolling into view are not selections
+            record_filter_usage(year, month, dept)
         
-        # Return components in the correct order
-        return (
-            trend_chart,
-            status_chart,
-            permit_table,
-            "",  # Empty string for loading component
-        )
+        rows = get_trend_series(year, month, dept, width=width, visible=visible)
+        raise_if_stale()
+        
+        patch = figure_patch("trend", rows)
+        if ctx.triggered_id != "permit-trend-chart":
+            # New filters start from the full range instead of the old zoom
+            patch["layout"]["uirevision"] = f"{year}|{month}|{dept}"
+        return patch
+    
+    @app.callback(
+        Output("status-bar-chart", "figure"),
+        filter_inputs + [visibility_input("chart-status")],
+        session_state,
+        prevent_initial_call=False,
+    )
+    @cancellable("status")
+    def update_status_chart(year, month, dept, is_visible):
+        """
+        Update the status distribution chart for the selected filters.
+        
+        Args:
+            year: Selected year filter value
+            month: Selected month filter value
+            dept: Selected department filter value
+            is_visible: Whether the chart is on screen
+            
+        Returns:
+            Patch: Partial figure update with the new trace arrays
+        """
+        if not is_visible:
+            raise PreventUpdate
+        
+        rows = get_status_distribution(year, month, dept)
+        raise_if_stale()
+        return figure_patch("status", rows)
+    
+    # Changing these keeps the table on its current page; any other
+    # trigger (filters, sorting) starts again from the first page
+    paging_props = {"permit-table.page_current", "permit-table.page_size"}
     
     @app.callback(
-        Output("filter-month", "options"),
-        Output("filter-month", "disabled"),
-        Input("filter-year", "value")
+        Output("permit-table", "data"),
+        Output("permit-table", "page_count"),
+        Output("permit-table", "page_current"),
+        Output("permit-table-empty", "style"),
+        filter_inputs + [
+            visibility_input("table-permits"),
+            Input("permit-table", "page_current"),
+            Input("permit-table", "page_size"),
+            Input("permit-table", "filter_query"),
+            Input("permit-table", "sort_by"),
+        ],
+        session_state,
+        prevent_initial_call=False,
     )
-    def update_month_dropdown(selected_year):
+    @cancellable("table")
+    def update_permit_table(year, month, dept, is_visible, page_current, page_size,
+                            filter_query, sort_by):
         """
-        Update month dropdown based on selected year.
+        Update the permit table page for the selected filters.
+        
+        The table's own column filters and sorting are applied in the
+        database, and only the requested page is returned.
         
         Args:
-            selected_year: The selected year from the year dropdown
+            year: Selected year filter value
+            month: Selected month filter value
+            dept: Selected department filter value
+            is_visible: Whether the table is on screen
+            page_current: Zero-based page shown by the table
+            page_size: Rows per page
+            filter_query: The table's column filter expression
+            sort_by: The table's sort columns
             
         Returns:
-            tuple: Updated month options and disabled state
+            tuple: Table records, page count, current page and the style of
+            the no-data message
         """
-        if not selected_year:
-            return [], True
+        if not is_visible:
+            raise PreventUpdate
         
-        # Generate all months (1-12) as options
-        months = [
-            {"label": month, "value": str(i).zfill(2)}
-            for i, month in enumerate([
-                "January", "February", "March", "April", "May", "June",
-                "July", "August", "September", "October", "November", "December"
-            ], 1)
-        ]
+        if not paging_props & set(ctx.triggered_prop_ids):
+            page_current = 0
         
-        return months, False
+        try:
+            page = get_permit_page(
+                year, month, dept, filter_query, sort_by, page_current or 0, page_size or 10
+            )
+        except FilterQueryError as e:
+            logger.warning(f"Unsupported permit table filter: {e}")
+            page = {"rows": [], "total_count": 0}
+        raise_if_stale()
+        
+        records = permit_table_records(page["rows"])
+        return (
+            records,
+            page_count(page["total_count"], page_size or 10),
+            page_current or 0,
+            no_data_style(records),
+        )
+    
+    # The month dropdown options are filled in the browser
+    # (see callbacks/clientside.py)
     
     # Add any additional visual callbacks here as needed
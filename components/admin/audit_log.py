@@ -3,12 +3,14 @@ Audit Log component for the Admin Dashboard.
 
 Provides an interface for administrators to view and search audit logs.
 """
-from dash import html, dcc, Input, Output, State, callback, dash_table, no_update
+from dash import html, dcc, Input, Output, State, callback, ctx, dash_table, no_update
 import dash_bootstrap_components as dbc
 from datetime import datetime, timedelta
 import pandas as pd
+from flask import request
 
-from db.user_queries import get_admin_events, log_admin_event
+from db.filter_query import FilterQueryError, page_count
+from db.user_queries import get_admin_events, get_audit_log_page, log_admin_event
 
 def build_audit_log():
     """Build the audit log interface."""
@@ -96,12 +98,17 @@ def build_audit_log():
                         {"name": "IP Address", "id": "ip_address"}
                     ],
                     data=[],  # Will be populated by callback
-                    filter_action="native",
-                    sort_action="native",
+                    # Filtering, sorting and paging run in the database
+                    # (see db/filter_query.py)
+                    filter_action="custom",
+                    filter_query="",
+                    sort_action="custom",
                     sort_mode="multi",
-                    page_action="native",
+                    sort_by=[],
+                    page_action="custom",
                     page_current=0,
                     page_size=20,
+                    page_count=1,
                     style_table={"overflowX": "auto"},
                     style_cell={
                         'textAlign': 'left',
@@ -165,6 +172,7 @@ def register_callbacks(app):
     """Register callbacks for the audit log component."""
     @app.callback(
         [Output('audit-table', 'data'),
+         Output('audit-table', 'page_count'),
          Output('audit-loading-output', 'children'),
          Output('audit-notification', 'is_open'),
          Output('audit-notification', 'children'),
@@ -175,77 +183,55 @@ def register_callbacks(app):
          Input('audit-date-range', 'end_date'),
          Input('audit-event-type', 'value'),
          Input('audit-user-filter', 'value'),
-         Input('audit-search', 'value')],
+         Input('audit-search', 'value'),
+         Input('audit-table', 'page_current'),
+         Input('audit-table', 'page_size'),
+         Input('audit-table', 'filter_query'),
+         Input('audit-table', 'sort_by')],
         prevent_initial_call=True
     )
-    def load_audit_log(n_clicks, start_date, end_date, event_types, users, search_term):
-        """Load audit log data based on filters."""
-        # Log the admin action
-        log_admin_event(
-            user_id="system",
-            event_type="view_audit_log",
-            target_type="audit_log",
-            ip_address=request.remote_addr if request else None,
-            user_agent=request.user_agent.string if request and hasattr(request, 'user_agent') else None
-        )
-        
+    def load_audit_log(n_clicks, start_date, end_date, event_types, users, search_term,
+                       page_current, page_size, filter_query, sort_by):
+        """Load one page of audit log data based on filters."""
         # Convert dates to datetime objects
-        start_date = pd.to_datetime(start_date).strftime('%Y-%m-%d 00:00:00')
-        end_date = pd.to_datetime(end_date).strftime('%Y-%m-%d 23:59:59')
-        
-        # Build query parameters
-        params = {
-            'start_date': start_date,
-            'end_date': end_date,
-            'event_types': event_types if event_types else None,
-            'user_ids': users if users else None,
-            'search': search_term if search_term else None
-        }
+        start_date = pd.to_datetime(start_date).strftime('%Y-%m-%d 00:00:00') if start_date else None
+        end_date = pd.to_datetime(end_date).strftime('%Y-%m-%d 23:59:59') if end_date else None
         
-        # In a real app, fetch audit data from your database
-        # For now, we'll return sample data
-        sample_data = [
-            {
-                'timestamp': (datetime.now() - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S'),
-                'user_email': 'admin@example.com',
-                'event_type': 'user_updated',
-                'target_type': 'user',
-                'details': 'Updated user role to admin',
-                'ip_address': '192.168.1.1'
-            },
-            {
-                'timestamp': (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S'),
-                'user_email': 'system',
-                'event_type': 'user_created',
-                'target_type': 'user',
-                'details': 'New user registered: test@example.com',
-                'ip_address': '192.168.1.2'
-            },
-            {
-                'timestamp': (datetime.now() - timedelta(days=2)).strftime('%Y-%m-%d %H:%M:%S'),
-                'user_email': 'admin@example.com',
-                'event_type': 'settings_updated',
-                'target_type': 'system',
-                'details': 'Updated system settings',
-                'ip_address': '192.168.1.1'
-            }
-        ]
+        # Filtering, sorting and paging happen in the database
+        try:
+            page = get_audit_log_page(
+                start_date=start_date,
+                end_date=end_date,
+                event_types=event_types if event_types else None,
+                user_ids=users if users else None,
+                search=search_term if search_term else None,
+                filter_query=filter_query,
+                sort_by=sort_by,
+                page_current=page_current or 0,
+                page_size=page_size or 20
+            )
+        except FilterQueryError as e:
+            return ([], 1, "", True, f"Invalid table filter: {e}", "Error", "danger")
         
-        # Apply search filter if provided
-        if search_term:
-            search_term = search_term.lower()
-            sample_data = [
-                entry for entry in sample_data
-                if (search_term in entry['user_email'].lower() or
-                     search_term in entry['event_type'].lower() or
-                     search_term in entry['details'].lower())
-            ]
+        # Log the admin action once per view, not for every page, sort or
+        # filter change; logged after the query so it isn't in its own page
+        if ctx.triggered_id in (None, 'refresh-audit-btn'):
+            log_admin_event(
+                user_id="system",
+                event_type="view_audit_log",
+                target_type="audit_log",
+                ip_address=request.remote_addr if request else None,
+                user_agent=request.user_agent.string if request and hasattr(request, 'user_agent') else None
+            )
         
+        # Paging through the table doesn't need a notification
+        paging = ctx.triggered_id == 'audit-table'
         return (
-            sample_data,
+            page['rows'],
+            page_count(page['total_count'], page_size or 20),
             "",  # Clear loading output
-            True,  # Show notification
-            f"Loaded {len(sample_data)} audit events",
+            not paging,  # Show notification
+            f"Loaded {page['total_count']} audit events",
             "Success",
             "success"
         )
@@ -10,6 +10,7 @@ import json
 import uuid
 
 from db.user_queries import get_user, update_user, log_admin_event
+from layout.layout_manager import invalidate_user_layout
 
 def build_layout_overrides():
     """Build the layout overrides interface."""
@@ -416,6 +417,9 @@ def register_callbacks(app):
                 }
             )
             
+            # Make the user's next page load pick up the override
+            invalidate_user_layout(user_id)
+            
             return [
                 True,  # Show notification
                 f"Layout for user {user_id} has been saved successfully.",
@@ -3,12 +3,14 @@ Session Logs component for the Admin Dashboard.
 
 Provides an interface for administrators to view and manage user sessions.
 """
-from dash import html, dcc, Input, Output, State, callback, dash_table
+from dash import html, dcc, Input, Output, State, callback, ctx, dash_table
 import dash_bootstrap_components as dbc
 from datetime import datetime, timedelta
 import pandas as pd
+from flask import request
 
-from db.user_queries import get_admin_events, log_admin_event
+from db.filter_query import FilterQueryError, page_count
+from db.user_queries import get_admin_events, get_session_page, log_admin_event
 
 def build_session_logs():
     """Build the session logs interface."""
@@ -69,12 +71,17 @@ def build_session_logs():
                         {"name": "Status", "id": "is_active"}
                     ],
                     data=[],
-                    filter_action="native",
-                    sort_action="native",
+                    # Filtering, sorting and paging run in the database
+                    # (see db/filter_query.py)
+                    filter_action="custom",
+                    filter_query="",
+                    sort_action="custom",
                     sort_mode="multi",
-                    page_action="native",
+                    sort_by=[],
+                    page_action="custom",
                     page_current=0,
                     page_size=20,
+                    page_count=1,
                     style_table={"overflowX": "auto"},
                     style_cell={
                         'textAlign': 'left',
@@ -127,6 +134,7 @@ def register_callbacks(app):
     """Register callbacks for the session logs component."""
     @app.callback(
         [Output('sessions-table', 'data'),
+         Output('sessions-table', 'page_count'),
          Output('sessions-loading-output', 'children'),
          Output('sessions-notification', 'is_open'),
          Output('sessions-notification', 'children'),
@@ -135,59 +143,53 @@ def register_callbacks(app):
         [Input('refresh-sessions-btn', 'n_clicks'),
          Input('session-date-range', 'start_date'),
          Input('session-date-range', 'end_date'),
-         Input('session-user-filter', 'value')],
+         Input('session-user-filter', 'value'),
+         Input('sessions-table', 'page_current'),
+         Input('sessions-table', 'page_size'),
+         Input('sessions-table', 'filter_query'),
+         Input('sessions-table', 'sort_by')],
         prevent_initial_call=True
     )
-    def load_sessions(n_clicks, start_date, end_date, user_filter):
-        """Load session data based on filters."""
-        # Log the admin action
-        log_admin_event(
-            user_id="system",
-            event_type="view_sessions",
-            target_type="sessions",
-            ip_address=request.remote_addr if request else None,
-            user_agent=request.user_agent.string if request and hasattr(request, 'user_agent') else None
-        )
-        
+    def load_sessions(n_clicks, start_date, end_date, user_filter,
+                      page_current, page_size, filter_query, sort_by):
+        """Load one page of session data based on filters."""
         # Convert dates to datetime objects
-        start_date = pd.to_datetime(start_date).strftime('%Y-%m-%d 00:00:00')
-        end_date = pd.to_datetime(end_date).strftime('%Y-%m-%d 23:59:59')
+        start_date = pd.to_datetime(start_date).strftime('%Y-%m-%d 00:00:00') if start_date else None
+        end_date = pd.to_datetime(end_date).strftime('%Y-%m-%d 23:59:59') if end_date else None
         
-        # Build query parameters
-        params = {
-            'start_date': start_date,
-            'end_date': end_date,
-            'user_ids': user_filter if user_filter else None
-        }
+        # Filtering, sorting and paging happen in the database
+        try:
+            page = get_session_page(
+                start_date=start_date,
+                end_date=end_date,
+                user_ids=user_filter if user_filter else None,
+                filter_query=filter_query,
+                sort_by=sort_by,
+                page_current=page_current or 0,
+                page_size=page_size or 20
+            )
+        except FilterQueryError as e:
+            return ([], 1, "", True, f"Invalid table filter: {e}", "Error", "danger")
         
-        # In a real app, you would fetch session data from your database
-        # For now, we'll return sample data
-        sample_data = [
-            {
-                'user_email': 'admin@example.com',
-                'login_time': (datetime.now() - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S'),
-                'logout_time': None,
-                'duration': '1h 15m',
-                'ip_address': '192.168.1.1',
-                'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'is_active': 'Active'
-            },
-            {
-                'user_email': 'user@example.com',
-                'login_time': (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S'),
-                'logout_time': (datetime.now() - timedelta(days=1, hours=23)).strftime('%Y-%m-%d %H:%M:%S'),
-                'duration': '15m',
-                'ip_address': '192.168.1.2',
-                'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)',
-                'is_active': 'Inactive'
-            }
-        ]
+        # Log the admin action once per view, not for every page, sort or
+        # filter change; logged after the query so it isn't in its own page
+        if ctx.triggered_id in (None, 'refresh-sessions-btn'):
+            log_admin_event(
+                user_id="system",
+                event_type="view_sessions",
+                target_type="sessions",
+                ip_address=request.remote_addr if request else None,
+                user_agent=request.user_agent.string if request and hasattr(request, 'user_agent') else None
+            )
         
+        # Paging through the table doesn't need a notification
+        paging = ctx.triggered_id == 'sessions-table'
         return (
-            sample_data,
+            page['rows'],
+            page_count(page['total_count'], page_size or 20),
             "",  # Clear loading output
-            True,  # Show notification
-            f"Loaded {len(sample_data)} sessions",
+            not paging,  # Show notification
+            f"Loaded {page['total_count']} sessions",
             "Success",
             "success"
         )
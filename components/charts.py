@@ -1,42 +1,102 @@
-from dash import dcc
+from dash import dcc, Patch
 import plotly.express as px
+import plotly.io as pio
 import pandas as pd
-from typing import List, Tuple, Any
+import hashlib
+import json
+from typing import List, Tuple, Any, Dict
 
-def build_trend_chart(rows: List[Tuple[str, int]]) -> dcc.Graph:
+from cache.disk import get_disk_cache
+from cache.generation import get_data_generation
+from cache.memory import LRUCache
+
+# Serialized figures keyed by (chart kind, data generation, hash of the rows).
+# Values are plain JSON-ready dicts shared between requests; treat them as
+# read-only.
+_figure_cache = LRUCache(max_entries=256)
+
+
+def _figure_key(kind: str, rows: List[Tuple[Any, ...]]) -> Tuple[str, int, str]:
+    """Build the cache key for a chart built from the given rows."""
+    digest = hashlib.sha1(repr(rows).encode("utf-8")).hexdigest()
+    return (kind, get_data_generation(), digest)
+
+
+def _serialize_figure(fig) -> Dict[str, Any]:
     """
-    Build a line chart showing permit trends over time.
-    
-    Args:
-        rows: List of tuples containing (period, count) data
-        
-    Returns:
-        dcc.Graph: A Dash Graph component with the trend chart
+    Serialize a figure to a plain dict of JSON types.
+
+    Dash can send such a dict without re-validating the figure or
+    converting numpy arrays on every response.
     """
-    if not rows:
-        return dcc.Graph(
-            figure=px.line(
-                title="No Data Available",
-                labels={"x": "Period", "y": "Number of Permits"}
-            ).update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='#7FDBFF')
-            )
-        )
-    
+    return json.loads(pio.to_json(fig, validate=False))
+
+
+def _cached_figure(kind: str, rows: List[Tuple[Any, ...]], builder) -> Dict[str, Any]:
+    """
+    Return the serialized figure for the rows.
+
+    Looks in the in-process cache, then in the shared on-disk cache, and
+    only builds the figure if neither has it.
+    """
+    # The key's generation is read before building, and the same one is
+    # stored, so a figure built while an ETL run bumps it isn't stored as new
+    key = _figure_key(kind, rows)
+    generation = key[1]
+    figure = _figure_cache.get(key)
+    if figure is not None:
+        return figure
+
+    disk = get_disk_cache()
+    disk_key = f"figure:{kind}:{key[2]}"
+    figure = disk.get(disk_key, generation) if disk else None
+    if figure is None:
+        figure = _serialize_figure(builder(rows))
+        if disk:
+            disk.set(disk_key, figure, generation)
+
+    _figure_cache.set(key, figure)
+    return figure
+
+
+# Trace properties sent in a partial update, per chart kind. Every figure of
+# a kind has the same single trace, so a filter change only needs to replace
+# these arrays and the title.
+PATCHED_TRACE_PROPERTIES = {
+    "trend": [("x",), ("y",), ("mode",)],
+    "status": [("x",), ("y",), ("marker", "color")],
+}
+
+# Trend points are drawn with markers only up to this many points
+MARKER_MAX_POINTS = 60
+
+# Colors for the known permit statuses
+STATUS_COLORS = {
+    'Approved': '#2ecc71',
+    'Pending': '#f39c12',
+    'Rejected': '#e74c3c',
+    'In Review': '#3498db',
+    'Draft': '#9b59b6'
+}
+
+# Color for statuses without an entry in STATUS_COLORS
+DEFAULT_STATUS_COLOR = '#7FDBFF'
+
+
+def _build_trend_figure(rows: List[Tuple[str, int]]):
+    """Build the permit trend figure from (period, count) rows."""
     df = pd.DataFrame(rows, columns=["Period", "Permits"])
-    
+
     fig = px.line(
-        df, 
-        x="Period", 
-        y="Permits", 
-        title="Permit Volume Over Time",
-        markers=True,
+        df,
+        x="Period",
+        y="Permits",
+        title="Permit Volume Over Time" if rows else "No Data Available",
+        markers=len(rows) <= MARKER_MAX_POINTS,
         line_shape="spline",
         labels={"Period": "Time Period", "Permits": "Number of Permits"}
     )
-    
+
     # Update layout for better visualization
     fig.update_layout(
         plot_bgcolor='rgba(0,0,0,0)',
@@ -46,66 +106,37 @@ def build_trend_chart(rows: List[Tuple[str, int]]) -> dcc.Graph:
         yaxis=dict(showgrid=True, gridwidth=0.5, gridcolor='#2A3F5F', title_font=dict(size=14)),
         hovermode="x unified",
         hoverlabel=dict(bgcolor="#1E2130", font_size=12),
-        margin=dict(l=50, r=30, t=50, b=30)
+        margin=dict(l=50, r=30, t=50, b=30),
+        # Keep the user's zoom while zoomed data is patched in
+        uirevision="trend"
     )
-    
+
     # Update line style
     fig.update_traces(
         line=dict(width=3),
         marker=dict(size=8, line=dict(width=1, color='DarkSlateGrey')),
         hovertemplate='<b>%{x}</b><br>%{y} permits<extra></extra>'
     )
-    
-    return dcc.Graph(figure=fig, id="permit-trend-chart", className="chart-container")
 
+    return fig
 
-def build_status_chart(rows: List[Tuple[str, int]]) -> dcc.Graph:
-    """
-    Build a bar chart showing the distribution of permit statuses.
-    
-    Args:
-        rows: List of tuples containing (status, count) data
-        
-    Returns:
-        dcc.Graph: A Dash Graph component with the status distribution chart
-    """
-    if not rows:
-        return dcc.Graph(
-            figure=px.bar(
-                title="No Data Available",
-                labels={"x": "Status", "y": "Count"}
-            ).update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='#7FDBFF')
-            )
-        )
-    
-    df = pd.DataFrame(rows, columns=["Status", "Count"])
-    
-    # Create a color mapping for different statuses
-    status_colors = {
-        'Approved': '#2ecc71',
-        'Pending': '#f39c12',
-        'Rejected': '#e74c3c',
-        'In Review': '#3498db',
-        'Draft': '#9b59b6'
-    }
-    
+
+def _build_status_figure(rows: List[Tuple[str, int]]):
+    """Build the status distribution figure from (status, count) rows."""
     # Sort by count for better visualization
-    df = df.sort_values('Count', ascending=True)
-    
+    df = pd.DataFrame(rows, columns=["Status", "Count"]).sort_values('Count', ascending=True)
+
+    # A single trace colored per bar, rather than one trace per status, so
+    # the figure structure doesn't depend on which statuses are present
     fig = px.bar(
-        df, 
-        x="Count", 
-        y="Status", 
-        title="Permit Status Distribution",
+        df,
+        x="Count",
+        y="Status",
+        title="Permit Status Distribution" if rows else "No Data Available",
         orientation='h',
-        color="Status",
-        color_discrete_map=status_colors,
         labels={"Count": "Number of Permits", "Status": "Status"}
     )
-    
+
     # Update layout for better visualization
     fig.update_layout(
         plot_bgcolor='rgba(0,0,0,0)',
@@ -118,12 +149,93 @@ def build_status_chart(rows: List[Tuple[str, int]]) -> dcc.Graph:
         hoverlabel=dict(bgcolor="#1E2130", font_size=12),
         margin=dict(l=50, r=30, t=50, b=30)
     )
-    
+
     # Update bar style
     fig.update_traces(
+        marker_color=[STATUS_COLORS.get(status, DEFAULT_STATUS_COLOR) for status in df["Status"]],
         hovertemplate='<b>%{y}</b><br>%{x} permits<extra></extra>',
         marker_line_color='rgba(0,0,0,0.3)',
         marker_line_width=1
     )
-    
-    return dcc.Graph(figure=fig, id="status-bar-chart", className="chart-container")
+
+    return fig
+
+
+def get_trend_figure(rows: List[Tuple[str, int]]) -> Dict[str, Any]:
+    """
+    Get the serialized permit trend figure, using the figure cache.
+
+    Args:
+        rows: List of tuples containing (period, count) data
+
+    Returns:
+        dict: Plotly figure as a plain dict
+    """
+    return _cached_figure("trend", rows, _build_trend_figure)
+
+
+def get_status_figure(rows: List[Tuple[str, int]]) -> Dict[str, Any]:
+    """
+    Get the serialized status distribution figure, using the figure cache.
+
+    Args:
+        rows: List of tuples containing (status, count) data
+
+    Returns:
+        dict: Plotly figure as a plain dict
+    """
+    return _cached_figure("status", rows, _build_status_figure)
+
+
+def figure_patch(kind: str, rows: List[Tuple[Any, ...]]) -> Patch:
+    """
+    Build a partial update that turns the chart into the figure for the rows.
+
+    Only the trace arrays and the title are sent; axes, styling and the
+    rest of the figure already on the page are left untouched.
+
+    Args:
+        kind: Chart kind ('trend' or 'status')
+        rows: Rows the chart is built from
+
+    Returns:
+        Patch: Partial update for the graph's figure property
+    """
+    figure = get_trend_figure(rows) if kind == "trend" else get_status_figure(rows)
+    trace = figure["data"][0]
+
+    patch = Patch()
+    for path in PATCHED_TRACE_PROPERTIES[kind]:
+        target, value = patch["data"][0], trace
+        for key in path[:-1]:
+            target, value = target[key], value[key]
+        target[path[-1]] = value[path[-1]]
+    patch["layout"]["title"]["text"] = figure["layout"]["title"]["text"]
+
+    return patch
+
+
+def build_trend_chart(rows: List[Tuple[str, int]]) -> dcc.Graph:
+    """
+    Build a line chart showing permit trends over time.
+
+    Args:
+        rows: List of tuples containing (period, count) data
+
+    Returns:
+        dcc.Graph: A Dash Graph component with the trend chart
+    """
+    return dcc.Graph(figure=get_trend_figure(rows), id="permit-trend-chart", className="chart-container")
+
+
+def build_status_chart(rows: List[Tuple[str, int]]) -> dcc.Graph:
+    """
+    Build a bar chart showing the distribution of permit statuses.
+
+    Args:
+        rows: List of tuples containing (status, count) data
+
+    Returns:
+        dcc.Graph: A Dash Graph component with the status distribution chart
+    """
+    return dcc.Graph(figure=get_status_figure(rows), id="status-bar-chart", className="chart-container")
@@ -1,40 +1,93 @@
 from dash import dash_table, dcc, html
+from dash.dash_table import FormatTemplate
 import pandas as pd
-from typing import List, Tuple, Any
+from typing import List, Tuple, Any, Dict
 
-def build_permit_table(rows: List[Tuple[Any, ...]]) -> dash_table.DataTable:
+# Columns returned by db.queries.get_filtered_permits, in order
+PERMIT_QUERY_COLUMNS = [
+    "permit_number", "permit_type", "permit_subtype", "status", "description",
+    "valuation", "date_filed", "date_issued", "date_completed",
+    "action_by_dept", "address", "contractor"
+]
+
+# Table column name -> query column it is filled from; filtering and
+# sorting use db.queries.PERMIT_TABLE_COLUMNS, keyed by the same names
+TABLE_COLUMNS = {
+    "Permit Number": "permit_number",
+    "Address": "address",
+    "Valuation": "valuation",
+    "Date": "date_filed",
+    "Task": "description",
+    "Status": "status",
+    "Department": "action_by_dept",
+}
+
+# Column types and formats; values are sent raw and formatted in the browser
+TABLE_COLUMN_FORMATS = {
+    "Valuation": {"type": "numeric", "format": FormatTemplate.money(2)},
+    "Date": {"type": "datetime"},
+}
+
+# Style that hides the no-data message while the table has rows
+HIDDEN = {"display": "none"}
+
+
+def permit_table_records(rows: List[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
     """
-    Build an interactive DataTable showing permit records.
+    Convert permit query rows into DataTable records.
     
     Args:
-        rows: List of tuples containing permit record data
+        rows: Rows from get_permit_page or get_filtered_permits
         
     Returns:
-        dash_table.DataTable: A Dash DataTable component with permit records
+        list: One dict per row, keyed by table column name
     """
     if not rows:
-        return html.Div(
-            "No permit data available for the selected filters.",
-            className="no-data-message"
-        )
+        return []
     
-    # Convert rows to DataFrame with appropriate column names
-    columns = [
-        "Permit Number", "Address", "Valuation", 
-        "Date", "Task", "Status", "Department"
-    ]
+    df = pd.DataFrame.from_records(rows, columns=PERMIT_QUERY_COLUMNS)
+    df = df[list(TABLE_COLUMNS.values())]
+    df.columns = list(TABLE_COLUMNS)
+    
+    # Whole-column operations only; currency formatting happens in the
+    # browser (see TABLE_COLUMN_FORMATS)
+    df['Valuation'] = pd.to_numeric(df['Valuation'], errors='coerce')
+    
+    # Dates are stored as ISO strings; keep the date part
+    df['Date'] = df['Date'].astype('string').str.slice(0, 10)
+    
+    # Missing values become null rather than NaN
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def no_data_style(records: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Get the style of the no-data message for the given table records.
     
-    df = pd.DataFrame(rows, columns=columns)
+    Args:
+        records: Current table records
+        
+    Returns:
+        dict: Style that shows the message only when there are no records
+    """
+    return HIDDEN if records else {}
+
+
+def build_permit_table(rows: List[Tuple[Any, ...]]) -> html.Div:
+    """
+    Build an interactive DataTable showing permit records.
     
-    # Format the valuation column to currency
-    if not df.empty:
-        df['Valuation'] = df['Valuation'].apply(
-            lambda x: f"${float(x):,.2f}" if x and str(x).replace('.', '').isdigit() else x
-        )
+    The table is always rendered, even without rows, so callbacks can update
+    its ``data`` property instead of replacing the component. Its theme is
+    in assets/datatable.css.
     
-    # Format the date column
-    if not df.empty and 'Date' in df.columns:
-        df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
+    Args:
+        rows: List of tuples containing permit record data
+        
+    Returns:
+        html.Div: A Div with the permit DataTable and a no-data message
+    """
+    records = permit_table_records(rows)
     
     # Define column styles
     style_cell = {
@@ -90,11 +143,22 @@ def build_permit_table(rows: List[Tuple[Any, ...]]) -> dash_table.DataTable:
         })
     
     return html.Div([
+        html.Div(
+            "No permit data available for the selected filters.",
+            id="permit-table-empty",
+            className="no-data-message",
+            style=no_data_style(records)
+        ),
         dash_table.DataTable(
             id='permit-table',
-            columns=[{"name": i, "id": i} for i in df.columns],
-            data=df.to_dict('records'),
+            columns=[
+                {"name": i, "id": i, **TABLE_COLUMN_FORMATS.get(i, {})}
+                for i in TABLE_COLUMNS
+            ],
+            data=records,
+            page_current=0,
             page_size=10,
+            page_count=1,
             style_table={
                 'overflowX': 'auto',
                 'border': '1px solid #2A3F5F',
@@ -118,51 +182,16 @@ def build_permit_table(rows: List[Tuple[Any, ...]]) -> dash_table.DataTable:
                 {'if': {'column_id': 'Status'}, 'width': '13%'},
                 {'if': {'column_id': 'Department'}, 'width': '10%'},
             ],
-            filter_action="native",
-            sort_action="native",
+            # Filtering, sorting and paging run in the database
+            # (see db/filter_query.py)
+            filter_action="custom",
+            filter_query="",
+            sort_action="custom",
             sort_mode="multi",
-            page_action="native",
+            sort_by=[],
+            page_action="custom",
             style_as_list_view=True,
-            tooltip_data=[
-                {
-                    column: {'value': str(value), 'type': 'markdown'}
-                    for column, value in row.items()
-                } for row in df.to_dict('records')
-            ],
-            tooltip_duration=None,
             export_format='csv',
             export_headers='display',
         ),
-        # Add some custom CSS for the table
-        html.Div([
-            html.Style("""
-                .dash-table-container .dash-spreadsheet-container .dash-spreadsheet-inner table {
-                    --accent: #1E2130;
-                    --border: #2A3F5F;
-                    --text-color: #7FDBFF;
-                    --hover: rgba(0, 116, 217, 0.3);
-                    --background-color: #1E2130;
-                }
-                .dash-table-container .dash-spreadsheet-container .dash-spreadsheet-inner th {
-                    background-color: #0E111F !important;
-                }
-                .dash-table-container .dash-spreadsheet-container .dash-spreadsheet-inner td {
-                    border-bottom: 1px solid var(--border);
-                }
-                .dash-table-container .dash-spreadsheet-container .dash-spreadsheet-inner th.dash-filter {
-                    background-color: #0E111F !important;
-                }
-                .dash-table-tooltip {
-                    background-color: #1E2130 !important;
-                    border: 1px solid #2A3F5F !important;
-                    color: #7FDBFF !important;
-                }
-                .no-data-message {
-                    color: #7FDBFF;
-                    padding: 20px;
-                    text-align: center;
-                    font-style: italic;
-                }
-            """)
-        ])
     ], className="datatable-container")
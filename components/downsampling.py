@@ -0,0 +1,201 @@
+"""
+Downsampling of long time series for the trend chart.
+
+The trend is queried per day, days without permits are filled in with zero
+counts, and the series is reduced with Largest-Triangle-Three-Buckets (LTTB) to about as many points as the chart has room for, so long ranges
+stay cheap to send and render while peaks and dips are kept. When the user
+zooms, only the visible range is queried, at full daily resolution if it
+fits.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from db.queries import get_permit_trends
+
+# Chart width assumed until the browser reports the real one
+DEFAULT_CHART_WIDTH = 800
+
+# Horizontal pixels per plotted point
+PIXELS_PER_POINT = 2
+
+# Chart widths are rounded to a multiple of this before picking the number
+# of points, so similar screens share cached series and figures (and
+# prewarming can cover them, see cache/prewarm.py)
+WIDTH_BUCKET = 400
+
+# Bounds on the number of plotted points
+MIN_POINTS = 50
+MAX_POINTS = 2000
+
+
+def max_points_for_width(width: Optional[int]) -> int:
+    """
+    Get the number of points worth plotting on a chart of the given width.
+
+    Args:
+        width: Chart width in pixels, or None if unknown
+
+    Returns:
+        int: Target number of points
+    """
+    width = round(int(width or DEFAULT_CHART_WIDTH) / WIDTH_BUCKET) * WIDTH_BUCKET
+    points = width // PIXELS_PER_POINT
+    return max(MIN_POINTS, min(MAX_POINTS, points))
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select points with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept. The points in between are
+    split into ``threshold - 2`` buckets, and from each bucket the point
+    forming the largest triangle with the previously kept point and the
+    average of the next bucket is kept.
+
+    Args:
+        x: Sorted x values
+        y: y values
+        threshold: Number of points to keep
+
+    Returns:
+        numpy.ndarray: Indices of the kept points, in order
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(float)
+    y = y.astype(float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_lo, next_hi = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        # Twice the triangle areas; the factor doesn't change the argmax
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (avg_y - y[previous])
+        )
+        previous = lo + int(areas.argmax())
+        kept[bucket + 1] = previous
+
+    return kept
+
+
+def fill_missing_days(rows: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    """
+    Add a zero count for every day without rows.
+
+    The daily query only returns days with permits; without the zeros a line
+    would be drawn straight across quiet periods, and LTTB could not keep
+    the dips.
+
+    Args:
+        rows: (YYYY-MM-DD, count) rows sorted by date
+
+    Returns:
+        list: One row per day from the first to the last date
+    """
+    rows = [row for row in rows if row[0] is not None]
+    if not rows:
+        return rows
+
+    counts = pd.Series(dict(rows))
+    counts.index = pd.to_datetime(counts.index)
+    days = pd.date_range(counts.index[0], counts.index[-1], freq="D")
+    filled = counts.reindex(days, fill_value=0)
+    return [(day.strftime("%Y-%m-%d"), int(count)) for day, count in filled.items()]
+
+
+def downsample_rows(rows: List[Tuple[str, int]], max_points: int) -> List[Tuple[str, int]]:
+    """
+    Reduce (date, count) rows to at most max_points with LTTB.
+
+    Args:
+        rows: Rows sorted by date (YYYY-MM-DD or YYYY-MM periods)
+        max_points: Number of points to keep
+
+    Returns:
+        list: The selected rows, in order
+    """
+    rows = [row for row in rows if row[0] is not None]
+    if len(rows) <= max_points:
+        return rows
+
+    periods, counts = zip(*rows)
+    days = pd.to_datetime(pd.Series(periods)).to_numpy().astype("datetime64[D]").astype(np.int64)
+    kept = lttb(days, np.asarray(counts), max_points)
+    return [rows[i] for i in kept]
+
+
+def zoom_range(relayout_data: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str]]:
+    """
+    Get the visible date range from a Plotly relayoutData event.
+
+    Args:
+        relayout_data: relayoutData of the trend graph
+
+    Returns:
+        tuple: (start, end) dates as YYYY-MM-DD, or None if the event does
+        not set an x-axis range
+    """
+    if not relayout_data:
+        return None
+
+    if "xaxis.range" in relayout_data:
+        start, end = relayout_data["xaxis.range"][:2]
+    elif "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        start, end = relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+    else:
+        return None
+
+    return str(start)[:10], str(end)[:10]
+
+
+def is_zoom_reset(relayout_data: Optional[Dict[str, Any]]) -> bool:
+    """
+    Check whether a relayoutData event resets the x-axis to the full range.
+
+    Args:
+        relayout_data: relayoutData of the trend graph
+
+    Returns:
+        bool: True on an autorange (double-click or reset) event
+    """
+    return bool(relayout_data and relayout_data.get("xaxis.autorange"))
+
+
+def get_trend_series(
+    year=None,
+    month=None,
+    dept=None,
+    width: Optional[int] = None,
+    visible: Optional[Tuple[str, str]] = None
+) -> List[Tuple[str, int]]:
+    """
+    Get the daily permit trend, zero-filled and downsampled to the chart width.
+
+    Args:
+        year: Year filter value
+        month: Month filter value
+        dept: Department filter value
+        width: Chart width in pixels (default: DEFAULT_CHART_WIDTH)
+        visible: (start, end) dates of the zoomed range, or None for all
+
+    Returns:
+        list: (date, count) rows to plot
+    """
+    start, end = visible or (None, None)
+    rows = get_permit_trends(year, month, dept, granularity="day", start=start, end=end)
+    return downsample_rows(fill_missing_days(rows), max_points_for_width(width))
@@ -1,19 +1,34 @@
 """
-Export utilities for generating CSV, Excel, PDF, and ZIP exports with role-based access control.
+Export utilities for generating CSV, Excel, PDF, ZIP, Parquet and Arrow exports with role-based
+access control.
 """
 import os
+import io
+import csv
+import hashlib
 import json
 import logging
+import queue
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
 import pandas as pd
-from fpdf import FPDF
-from io import BytesIO
-import tempfile
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
 import shutil
 
+from components.pdf_report import PDF_WORKERS, write_table_report
+from middleware.compression import ENCODING_SUFFIXES, PRECOMPRESS_EXPORTS, precompress_file
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = pq = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,6 +36,48 @@ logger = logging.getLogger(__name__)
 # Base export directory (will be set during app initialization)
 BASE_EXPORT_DIR = None
 
+# Excel worksheet row limit, including the header row
+EXCEL_MAX_ROWS = 1048576
+
+# Excel column widths are estimated from this many rows
+EXCEL_WIDTH_SAMPLE_ROWS = 1000
+EXCEL_MAX_COLUMN_WIDTH = 50
+
+# Deflate level of ZIP exports, 1 (fastest) to 9 (smallest)
+ZIP_COMPRESSLEVEL = int(os.getenv("EXPORT_ZIP_LEVEL", "6"))
+
+# Threads generating ZIP members ahead of the compressor (1 generates each
+# member in turn) and the chunks a member may buffer meanwhile
+ZIP_WORKERS = int(os.getenv("EXPORT_ZIP_WORKERS", "1"))
+ZIP_PREFETCH_CHUNKS = 8
+
+# Name in the archive and a callable returning the member's bytes chunks
+ZipMember = Tuple[str, Callable[[], Iterable[bytes]]]
+
+# Columnar export formats: file extension and MIME type
+ARROW_FORMATS = {
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+}
+
+# Rows per Parquet row group / Arrow record batch, and the Parquet codec
+ARROW_BATCH_ROWS = int(os.getenv("EXPORT_ARROW_BATCH_ROWS", "50000"))
+PARQUET_COMPRESSION = "zstd"
+
+# Arrow type of each exported permit column (see db.queries.PERMIT_SELECT_SQL);
+# columns not listed are written as strings
+ARROW_COLUMN_TYPES = {
+    'valuation': 'float64',
+}
+
+# Finished exports are also kept in this directory under their content key;
+# identical requests get a hardlink to the shared file instead of a new export
+SHARED_EXPORT_DIR_NAME = "_shared"
+
+# Hardlinks share one modification time, so when an export was handed out
+# by linking it is recorded in an empty sidecar file with this suffix
+LINKED_AT_SUFFIX = ".linked"
+
 # Role-based column masks
 COLUMN_MASKS = {
     'admin': [],  # Admins see all columns
@@ -46,18 +103,31 @@ def get_user_export_dir(user_id: str) -> Path:
     return user_dir
 
 
-def mask_sensitive_columns(df: pd.DataFrame, role: str) -> pd.DataFrame:
-    """Remove or mask sensitive columns based on user role."""
+def masked_columns(columns: Sequence[str], role: str) -> List[str]:
+    """Get the columns a role may not export."""
     if role not in COLUMN_MASKS:
         role = 'viewer'  # Default to most restrictive
     
-    columns_to_drop = [col for col in COLUMN_MASKS[role] if col in df.columns]
+    return [col for col in COLUMN_MASKS[role] if col in columns]
+
+
+def mask_sensitive_columns(df: pd.DataFrame, role: str) -> pd.DataFrame:
+    """Remove or mask sensitive columns based on user role."""
+    columns_to_drop = masked_columns(df.columns, role)
     if columns_to_drop:
         logger.info(f"Masking columns for role '{role}': {columns_to_drop}")
         return df.drop(columns=columns_to_drop)
     return df
 
 
+def _visible_column_indexes(columns: Sequence[str], role: Optional[str]) -> List[int]:
+    """Indexes of the columns a role may export; None keeps every column."""
+    dropped = set(masked_columns(columns, role)) if role is not None else set()
+    if dropped:
+        logger.info(f"Masking columns for role '{role}': {sorted(dropped)}")
+    return [i for i, col in enumerate(columns) if col not in dropped]
+
+
 def generate_filename(base_name: str, extension: str) -> str:
     """Generate a unique filename with timestamp."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -71,72 +141,536 @@ def export_to_csv(df: pd.DataFrame, user_id: str, base_name: str = "export") ->
     filepath = user_dir / filename
     
     df.to_csv(filepath, index=False)
+    if PRECOMPRESS_EXPORTS:
+        # Downloads are then served from the .br/.gz siblings
+        precompress_file(filepath)
     return str(filepath)
 
 
+def iter_csv(chunks: Iterable[Sequence[Sequence[Any]]], columns: Sequence[str],
+             role: str = 'viewer') -> Iterator[str]:
+    """
+    Render row chunks as CSV text, one piece per chunk.
+    
+    Only the current chunk is held in memory, so this can feed a file or an
+    HTTP streaming response straight from a database cursor.
+    
+    Args:
+        chunks: Lists of row tuples, e.g. from db.queries.iter_permit_rows
+        columns: Column names, in row order
+        role: User role; its masked columns are left out
+        
+    Yields:
+        str: The header line, then the CSV lines of each chunk
+    """
+    keep = _visible_column_indexes(columns, role)
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([columns[i] for i in keep])
+    
+    for rows in chunks:
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([row[i] for i in keep] for row in rows)
+    yield buffer.getvalue()
+
+
+def export_rows_to_csv(chunks: Iterable[Sequence[Sequence[Any]]], columns: Sequence[str],
+                       user_id: str, base_name: str = "export", role: str = 'viewer',
+                       progress: Optional[Callable[[int, int], None]] = None) -> Tuple[str, int]:
+    """
+    Write row chunks to a CSV file without building a DataFrame.
+    
+    Args:
+        chunks: Lists of row tuples, e.g. from db.queries.iter_permit_rows
+        columns: Column names, in row order
+        user_id: Owner of the export
+        base_name: Filename prefix
+        role: User role; its masked columns are left out
+        progress: Called with the rows and bytes written so far after
+            each chunk
+        
+    Returns:
+        tuple: Path of the CSV file and the number of rows written
+    """
+    user_dir = get_user_export_dir(user_id)
+    filepath = user_dir / generate_filename(base_name, "csv")
+    
+    row_count = 0
+    
+    def counted():
+        nonlocal row_count
+        for rows in chunks:
+            row_count += len(rows)
+            yield rows
+    
+    try:
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            for text in iter_csv(counted(), columns, role):
+                f.write(text)
+                if progress:
+                    progress(row_count, f.tell())
+    except BaseException:
+        # Don't leave a partial file behind for a failed or cancelled export
+        filepath.unlink(missing_ok=True)
+        raise
+    
+    if PRECOMPRESS_EXPORTS:
+        precompress_file(filepath)
+    return str(filepath), row_count
+
+
+def _estimate_widths(header: Sequence[str], sample: Sequence[Sequence[Any]]) -> List[float]:
+    """Column widths that fit the header and a sample of rows."""
+    widths = [len(str(name)) for name in header]
+    for row in sample[:EXCEL_WIDTH_SAMPLE_ROWS]:
+        for i, value in enumerate(row):
+            if value is not None:
+                widths[i] = max(widths[i], len(str(value)))
+    return [min(width + 2, EXCEL_MAX_COLUMN_WIDTH) for width in widths]
+
+
+def export_rows_to_excel(chunks: Iterable[Sequence[Sequence[Any]]], columns: Sequence[str],
+                         user_id: str, base_name: str = "export",
+                         role: Optional[str] = 'viewer') -> Tuple[str, int]:
+    """
+    Write row chunks to an Excel file using openpyxl's write-only mode.
+    
+    Rows are appended as they arrive instead of being held in a workbook,
+    and column widths come from the first rows rather than every cell.
+    Exports longer than one worksheet allows continue on further sheets
+    ('Data', 'Data 2', ...), each with the header row.
+    
+    Args:
+        chunks: Lists of row tuples, e.g. from db.queries.iter_permit_rows
+        columns: Column names, in row order
+        user_id: Owner of the export
+        base_name: Filename prefix
+        role: User role; its masked columns are left out (None keeps all)
+        
+    Returns:
+        tuple: Path of the Excel file and the number of rows written
+    """
+    keep = _visible_column_indexes(columns, role)
+    header = [columns[i] for i in keep]
+    
+    user_dir = get_user_export_dir(user_id)
+    filepath = user_dir / generate_filename(base_name, "xlsx")
+    
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, widths = None, 0, None
+    row_count = 0
+    
+    def new_sheet():
+        index = len(workbook.worksheets) + 1
+        worksheet = workbook.create_sheet("Data" if index == 1 else f"Data {index}")
+        # Widths must be set before the first row of a write-only sheet
+        for i, width in enumerate(widths, start=1):
+            worksheet.column_dimensions[get_column_letter(i)].width = width
+        worksheet.append(header)
+        return worksheet
+    
+    try:
+        for rows in chunks:
+            values = [[row[i] for i in keep] for row in rows]
+            if widths is None:
+                widths = _estimate_widths(header, values)
+                sheet = new_sheet()
+            for row in values:
+                if sheet_rows == EXCEL_MAX_ROWS - 1:
+                    sheet, sheet_rows = new_sheet(), 0
+                sheet.append(row)
+                sheet_rows += 1
+            row_count += len(values)
+        
+        if sheet is None:
+            widths = _estimate_widths(header, [])
+            new_sheet()
+        workbook.save(filepath)
+    except BaseException:
+        filepath.unlink(missing_ok=True)
+        raise
+    
+    return str(filepath), row_count
+
+
 def export_to_excel(df: pd.DataFrame, user_id: str, base_name: str = "export") -> str:
     """Export DataFrame to Excel file."""
-    user_dir = get_user_export_dir(user_id)
-    filename = generate_filename(base_name, "xlsx")
-    filepath = user_dir / filename
+    # Missing values become empty cells rather than NaN
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    filepath, _ = export_rows_to_excel([list(rows)], list(df.columns), user_id, base_name, role=None)
+    return filepath
+
+
+def export_rows_to_pdf(chunks: Iterable[Sequence[Sequence[Any]]], columns: Sequence[str],
+                       user_id: str, base_name: str = "export", title: str = "Export Report",
+                       role: Optional[str] = 'viewer', total_rows: Optional[int] = None,
+                       workers: int = PDF_WORKERS) -> Tuple[str, int]:
+    """
+    Render row chunks as a paginated PDF report (see components/pdf_report.py).
     
-    with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Data')
+    Args:
+        chunks: Lists of row tuples, e.g. from db.queries.iter_permit_rows
+        columns: Column names, in row order
+        user_id: Owner of the export
+        base_name: Filename prefix
+        title: Report title
+        role: User role; its masked columns are left out (None keeps all)
+        total_rows: Record count shown on the first page, if known
+        workers: Processes rendering page ranges
         
-        # Auto-adjust column widths
-        worksheet = writer.sheets['Data']
-        for idx, col in enumerate(df.columns):
-            max_length = max(df[col].astype(str).apply(len).max(), len(col)) + 2
-            worksheet.column_dimensions[chr(65 + idx)].width = min(max_length, 50)
+    Returns:
+        tuple: Path of the PDF file and the number of rows written
+    """
+    keep = _visible_column_indexes(columns, role)
+    user_dir = get_user_export_dir(user_id)
+    filepath = user_dir / generate_filename(base_name, "pdf")
     
-    return str(filepath)
+    visible = ([[row[i] for i in keep] for row in rows] for rows in chunks)
+    try:
+        with open(filepath, 'wb') as f:
+            row_count = write_table_report(
+                f, [columns[i] for i in keep], visible, title, user_id, total_rows, workers
+            )
+    except BaseException:
+        filepath.unlink(missing_ok=True)
+        raise
+    
+    return str(filepath), row_count
 
 
 def export_to_pdf(df: pd.DataFrame, user_id: str, base_name: str = "export", 
                  title: str = "Export Report") -> str:
     """Export DataFrame to PDF with formatting and watermark."""
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    filepath, _ = export_rows_to_pdf(
+        [list(rows)], list(df.columns), user_id, base_name, title, role=None, total_rows=len(df)
+    )
+    return filepath
+
+
+def arrow_available() -> bool:
+    """
+    Check whether the optional pyarrow dependency is installed.
+    
+    Returns:
+        bool: True if Parquet and Arrow exports can be written
+    """
+    return pa is not None
+
+
+def _arrow_schema(names: Sequence[str]) -> "pa.Schema":
+    """Arrow schema of the exported columns, from ARROW_COLUMN_TYPES."""
+    return pa.schema([
+        pa.field(name, pa.type_for_alias(ARROW_COLUMN_TYPES.get(name, 'string')))
+        for name in names
+    ])
+
+
+def _record_batches(chunks: Iterable[Sequence[Sequence[Any]]], schema: "pa.Schema",
+                    keep: Sequence[int], batch_rows: int) -> Iterator["pa.RecordBatch"]:
+    """
+    Group row chunks into Arrow record batches of batch_rows rows.
+    
+    Every batch uses the same schema; values of string columns are converted
+    with str, so SQLite's dynamically typed columns always fit.
+    """
+    def build(rows):
+        columns = list(zip(*rows))
+        arrays = []
+        for i, field in zip(keep, schema):
+            values = columns[i]
+            if field.type == pa.string():
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+    
+    pending = []
+    for rows in chunks:
+        pending.extend(rows)
+        while len(pending) >= batch_rows:
+            yield build(pending[:batch_rows])
+            del pending[:batch_rows]
+    if pending:
+        yield build(pending)
+
+
+def iter_arrow(chunks: Iterable[Sequence[Sequence[Any]]], columns: Sequence[str],
+               export_format: str = 'parquet', role: Optional[str] = 'viewer',
+               batch_rows: int = ARROW_BATCH_ROWS) -> Iterator[bytes]:
+    """
+    Render row chunks as a Parquet or Arrow IPC file, as a stream.
+    
+    Rows are written a row group (or record batch) at a time as they are
+    read, so only one batch is held in memory and the output can feed a
+    file or an HTTP response straight from a database cursor.
+    
+    Args:
+        chunks: Lists of row tuples, e.g. from db.queries.iter_permit_rows
+        columns: Column names, in row order
+        export_format: 'parquet' or 'arrow' (the Arrow IPC file format,
+            readable with pandas.read_feather)
+        role: User role; its masked columns are left out
+        batch_rows: Rows per row group or record batch
+        
+    Yields:
+        bytes: Pieces of the file
+        
+    Raises:
+        RuntimeError: If pyarrow is not installed
+        ValueError: If the format is not a columnar format
+    """
+    if not arrow_available():
+        raise RuntimeError("pyarrow is required for Parquet and Arrow exports")
+    if export_format not in ARROW_FORMATS:
+        raise ValueError(f"Unsupported format: {export_format}")
+    
+    keep = _visible_column_indexes(columns, role)
+    schema = _arrow_schema([columns[i] for i in keep])
+    buffer = _StreamBuffer()
+    
+    if export_format == 'parquet':
+        writer = pq.ParquetWriter(buffer, schema, compression=PARQUET_COMPRESSION)
+    else:
+        writer = pa.ipc.new_file(buffer, schema)
+    
+    for batch in _record_batches(chunks, schema, keep, batch_rows):
+        if export_format == 'parquet':
+            writer.write_batch(batch, row_group_size=batch.num_rows)
+        else:
+            writer.write_batch(batch)
+        yield buffer.take()
+    
+    writer.close()
+    yield buffer.take()
+
+
+def export_rows_to_arrow(chunks: Iterable[Sequence[Sequence[Any]]], columns: Sequence[str],
+                         user_id: str, base_name: str = "export", export_format: str = 'parquet',
+                         role: str = 'viewer',
+                         progress: Optional[Callable[[int, int], None]] = None) -> Tuple[str, int]:
+    """
+    Write row chunks to a Parquet or Arrow IPC file (see iter_arrow).
+    
+    Args:
+        chunks: Lists of row tuples, e.g. from db.queries.iter_permit_rows
+        columns: Column names, in row order
+        user_id: Owner of the export
+        base_name: Filename prefix
+        export_format: 'parquet' or 'arrow'
+        role: User role; its masked columns are left out
+        progress: Called with the rows and bytes written so far after
+            each row group
+        
+    Returns:
+        tuple: Path of the file and the number of rows written
+    """
+    extension, _ = ARROW_FORMATS[export_format]
+    filepath = get_user_export_dir(user_id) / generate_filename(base_name, extension)
+    
+    row_count = 0
+    
+    def counted():
+        nonlocal row_count
+        for rows in chunks:
+            row_count += len(rows)
+            yield rows
+    
+    try:
+        with open(filepath, 'wb') as f:
+            for piece in iter_arrow(counted(), columns, export_format, role):
+                f.write(piece)
+                if progress:
+                    progress(row_count, f.tell())
+    except BaseException:
+        filepath.unlink(missing_ok=True)
+        raise
+    
+    return str(filepath), row_count
+
+
+def csv_member(arcname: str, chunks: Iterable[Sequence[Sequence[Any]]], columns: Sequence[str],
+               role: Optional[str] = 'viewer') -> ZipMember:
+    """ZIP member rendering row chunks as CSV (see iter_csv)."""
+    def produce():
+        for text in iter_csv(chunks, columns, role):
+            yield text.encode('utf-8')
+    return arcname, produce
+
+
+def pdf_member(arcname: str, chunks: Iterable[Sequence[Sequence[Any]]], columns: Sequence[str],
+               user_id: str, title: str = "Export Report", role: Optional[str] = 'viewer',
+               total_rows: Optional[int] = None) -> ZipMember:
+    """ZIP member rendering row chunks as a PDF report (see export_rows_to_pdf)."""
+    def produce():
+        keep = _visible_column_indexes(columns, role)
+        visible = ([[row[i] for i in keep] for row in rows] for rows in chunks)
+        output = io.BytesIO()
+        write_table_report(output, [columns[i] for i in keep], visible, title, user_id, total_rows)
+        yield output.getvalue()
+    return arcname, produce
+
+
+def file_member(path: str) -> ZipMember:
+    """ZIP member copied from a file."""
+    def produce():
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(1024 * 1024)
+                if not data:
+                    break
+                yield data
+    return Path(path).name, produce
+
+
+class _StreamBuffer:
+    """Write-only file for ZipFile and pyarrow that hands out what was written so far."""
+    
+    closed = False
+    
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def flush(self) -> None:
+        pass
+    
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _generate_ahead(members: Sequence[ZipMember], workers: int) -> Iterator[Tuple[str, Iterator[bytes]]]:
+    """
+    Generate members in threads while earlier ones are being compressed.
+    
+    Each member buffers at most ZIP_PREFETCH_CHUNKS chunks; producers stop
+    if the archive is abandoned.
+    """
+    stop = threading.Event()
+    done = object()
+    
+    def put(chunks, item) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def run(produce, chunks):
+        try:
+            for data in produce():
+                if not put(chunks, data):
+                    return
+            put(chunks, done)
+        except BaseException as e:
+            put(chunks, e)
+    
+    def drain(chunks):
+        while True:
+            item = chunks.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            queues = [queue.Queue(ZIP_PREFETCH_CHUNKS) for _ in members]
+            for (_, produce), chunks in zip(members, queues):
+                pool.submit(run, produce, chunks)
+            for (arcname, _), chunks in zip(members, queues):
+                yield arcname, drain(chunks)
+        finally:
+            # Producers still running give up at their next chunk
+            stop.set()
+
+
+def iter_zip(members: Sequence[ZipMember], compresslevel: int = ZIP_COMPRESSLEVEL,
+             workers: int = ZIP_WORKERS) -> Iterator[bytes]:
+    """
+    Build a ZIP archive as a stream, generating and compressing members on
+    the fly.
+    
+    Nothing is staged on disk, so the archive can go straight into a file
+    or an HTTP response. Members are written with data descriptors and
+    ZIP64 sizes, as their length isn't known in advance.
+    
+    Args:
+        members: (name in the archive, callable returning the member's
+            bytes chunks) pairs, in archive order
+        compresslevel: Deflate level, 1 (fastest) to 9 (smallest)
+        workers: Threads generating members ahead of the compressor; 1
+            generates each member when it is written
+        
+    Yields:
+        bytes: Pieces of the archive
+    """
+    buffer = _StreamBuffer()
+    if workers > 1 and len(members) > 1:
+        sources = _generate_ahead(members, workers)
+    else:
+        sources = ((arcname, produce()) for arcname, produce in members)
+    
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zipf:
+        for arcname, chunks in sources:
+            with zipf.open(arcname, 'w', force_zip64=True) as member:
+                for data in chunks:
+                    member.write(data)
+                    piece = buffer.take()
+                    if piece:
+                        yield piece
+            piece = buffer.take()
+            if piece:
+                yield piece
+    yield buffer.take()
+
+
+def export_members_to_zip(members: Sequence[ZipMember], user_id: str, base_name: str = "export",
+                          compresslevel: int = ZIP_COMPRESSLEVEL, workers: int = ZIP_WORKERS,
+                          progress: Optional[Callable[[int], None]] = None) -> str:
+    """
+    Write a streamed ZIP archive (see iter_zip) to the user's export directory.
+    
+    Args:
+        members: (name in the archive, callable returning bytes chunks) pairs
+        user_id: Owner of the export
+        base_name: Filename prefix
+        compresslevel: Deflate level, 1 (fastest) to 9 (smallest)
+        workers: Threads generating members ahead of the compressor
+        progress: Called with the bytes written so far
+        
+    Returns:
+        str: Path of the ZIP file
+    """
     user_dir = get_user_export_dir(user_id)
-    filename = generate_filename(base_name, "pdf")
-    filepath = user_dir / filename
+    zip_path = user_dir / generate_filename(base_name, "zip")
     
-    # Create PDF
-    pdf = FPDF()
-    pdf.add_page()
-    
-    # Add header
-    pdf.set_font('Arial', 'B', 16)
-    pdf.cell(0, 10, title, 0, 1, 'C')
-    pdf.ln(10)
-    
-    # Add metadata
-    pdf.set_font('Arial', '', 10)
-    pdf.cell(0, 10, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 0, 1)
-    pdf.cell(0, 10, f"Total Records: {len(df)}", 0, 1)
-    pdf.ln(10)
-    
-    # Add table headers
-    col_widths = [min(max(df[col].astype(str).apply(len).max(), len(col)) * 2 + 2, 40) 
-                 for col in df.columns]
-    
-    pdf.set_font('Arial', 'B', 10)
-    for i, col in enumerate(df.columns):
-        pdf.cell(col_widths[i], 10, str(col), 1, 0, 'C')
-    pdf.ln()
-    
-    # Add table rows
-    pdf.set_font('Arial', '', 8)
-    for _, row in df.iterrows():
-        for i, col in enumerate(df.columns):
-            pdf.cell(col_widths[i], 6, str(row[col])[:30] + ('...' if len(str(row[col])) > 30 else ''), 1, 0, 'L')
-        pdf.ln()
-    
-    # Add footer/watermark
-    pdf.set_y(-15)
-    pdf.set_font('Arial', 'I', 8)
-    pdf.cell(0, 10, f'Generated by user: {user_id}', 0, 0, 'C')
-    
-    pdf.output(str(filepath))
-    return str(filepath)
+    try:
+        with open(zip_path, 'wb') as f:
+            for piece in iter_zip(members, compresslevel, workers):
+                f.write(piece)
+                if progress:
+                    progress(f.tell())
+    except BaseException:
+        zip_path.unlink(missing_ok=True)
+        raise
+    
+    return str(zip_path)
 
 
 def create_zip_archive(file_paths: List[str], user_id: str, base_name: str = "export") -> str:
@@ -144,31 +678,185 @@ def create_zip_archive(file_paths: List[str], user_id: str, base_name: str = "ex
     if not file_paths:
         raise ValueError("No files provided to create ZIP archive")
     
-    user_dir = get_user_export_dir(user_id)
-    zip_filename = generate_filename(base_name, "zip")
-    zip_path = user_dir / zip_filename
+    members = [file_member(path) for path in file_paths if Path(path).exists()]
+    return export_members_to_zip(members, user_id, base_name)
+
+
+def export_content_key(**parts: Any) -> str:
+    """
+    Get the content key of an export.
     
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file_path in file_paths:
-            if Path(file_path).exists():
-                zipf.write(file_path, arcname=Path(file_path).name)
+    Args:
+        **parts: Everything the export's bytes depend on (query, filters,
+            visible columns, format, data generation, ...); values must be
+            JSON serializable
+        
+    Returns:
+        str: Hex SHA-256 digest of the parts
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_shared_export_dir() -> Path:
+    """Get or create the directory of shared exports."""
+    if not BASE_EXPORT_DIR:
+        raise ValueError("Export directory not set. Call set_export_dir() first.")
     
-    return str(zip_path)
+    shared_dir = BASE_EXPORT_DIR / SHARED_EXPORT_DIR_NAME
+    shared_dir.mkdir(parents=True, exist_ok=True)
+    return shared_dir
+
+
+def _link_export(source: Path, target: Path) -> None:
+    """
+    Link an export and its precompressed siblings to a new name.
+    
+    Files are hardlinked, so each name counts as a reference to the same
+    data; they are copied where hardlinks aren't supported. The siblings
+    go first, so the file itself only appears once they are in place.
+    """
+    for suffix in list(ENCODING_SUFFIXES.values()) + ['']:
+        variant = source.with_name(source.name + suffix)
+        if not variant.exists():
+            continue
+        link = target.with_name(target.name + suffix)
+        try:
+            os.link(variant, link)
+        except FileExistsError:
+            raise
+        except OSError as e:
+            logger.debug(f"Copying {variant} instead of hardlinking it: {e}")
+            shutil.copy2(variant, link)
+
+
+def share_export(path: str, key: str) -> str:
+    """
+    Add a finished export to the shared exports under its content key.
+    
+    Args:
+        path: The export file
+        key: Its content key, from export_content_key
+        
+    Returns:
+        str: Path of the shared file
+    """
+    source = Path(path)
+    shared = get_shared_export_dir() / f"{key}{source.suffix}"
+    if not shared.exists():
+        try:
+            _link_export(source, shared)
+        except FileExistsError:
+            # Shared by an identical export that finished at the same time
+            pass
+    return str(shared)
+
+
+def find_shared_export(key: str, extension: str) -> Optional[Path]:
+    """
+    Get the shared export with a content key.
+    
+    Args:
+        key: Content key, from export_content_key
+        extension: File extension of the export format
+        
+    Returns:
+        Path: The shared file, or None if there is none
+    """
+    if not BASE_EXPORT_DIR:
+        return None
+    shared = BASE_EXPORT_DIR / SHARED_EXPORT_DIR_NAME / f"{key}.{extension}"
+    return shared if shared.is_file() else None
+
+
+def reuse_shared_export(shared_path: Path, user_id: str, base_name: str = "export") -> str:
+    """
+    Give a user a shared export instead of generating it again.
+    
+    Args:
+        shared_path: The shared file, from find_shared_export
+        user_id: User ID for the export directory
+        base_name: Filename prefix
+        
+    Returns:
+        str: Path of the user's export, a hardlink to the shared file
+    """
+    target = get_user_export_dir(user_id) / generate_filename(base_name, shared_path.suffix[1:])
+    for suffix in list(ENCODING_SUFFIXES.values()) + ['']:
+        # Replaced like an export written in the same second would be
+        target.with_name(target.name + suffix).unlink(missing_ok=True)
+    _link_export(shared_path, target)
+    # Touching the shared data would restart the age of every linked copy;
+    # this copy and the shared entry are dated by their sidecars instead
+    for path in (target, shared_path):
+        path.with_name(path.name + LINKED_AT_SUFFIX).touch()
+    return str(target)
+
+
+def export_mtime(path: Path) -> float:
+    """
+    Get when an export file was last written or handed out.
+    
+    This is the later of the file's modification time and that of its
+    LINKED_AT_SUFFIX sidecar, which also dates its precompressed siblings.
+    
+    Args:
+        path: An export file
+        
+    Returns:
+        float: Timestamp used for retention
+    """
+    name = path.name
+    for suffix in ENCODING_SUFFIXES.values():
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    mtime = path.stat().st_mtime
+    try:
+        return max(mtime, path.with_name(name + LINKED_AT_SUFFIX).stat().st_mtime)
+    except FileNotFoundError:
+        return mtime
 
 
 def cleanup_old_exports(days: int = 30) -> None:
-    """Remove export files older than specified days."""
+    """
+    Remove export files older than specified days.
+    
+    A shared export is removed once no user's export links to it any more
+    and it was last handed out before the cutoff too. Ages are taken from
+    export_mtime.
+    """
     if not BASE_EXPORT_DIR:
         return
     
     cutoff_time = datetime.now().timestamp() - (days * 86400)
+    shared_dir = BASE_EXPORT_DIR / SHARED_EXPORT_DIR_NAME
     
     for user_dir in BASE_EXPORT_DIR.iterdir():
-        if user_dir.is_dir():
+        if user_dir.is_dir() and user_dir != shared_dir:
             for file_path in user_dir.glob('*.*'):
-                if file_path.stat().st_mtime < cutoff_time:
+                if export_mtime(file_path) < cutoff_time:
                     try:
                         file_path.unlink()
                         logger.info(f"Removed old export file: {file_path}")
                     except Exception as e:
                         logger.error(f"Error removing {file_path}: {e}")
+    
+    if not shared_dir.is_dir():
+        return
+    for file_path in shared_dir.iterdir():
+        if file_path.name.endswith(LINKED_AT_SUFFIX):
+            continue
+        # Each user export hardlinked to the file adds a link
+        if file_path.stat().st_nlink > 1 or export_mtime(file_path) >= cutoff_time:
+            continue
+        try:
+            file_path.unlink()
+            logger.info(f"Removed unreferenced shared export: {file_path}")
+        except Exception as e:
+            logger.error(f"Error removing {file_path}: {e}")
+    
+    # Sidecars of removed shared exports
+    for sidecar in shared_dir.glob(f"*{LINKED_AT_SUFFIX}"):
+        if not sidecar.with_name(sidecar.name[:-len(LINKED_AT_SUFFIX)]).exists():
+            sidecar.unlink(missing_ok=True)
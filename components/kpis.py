@@ -1,26 +1,31 @@
 import dash_bootstrap_components as dbc
-from dash import html
+from dash import html, dcc
 
 def get_kpi_placeholders():
-    return dbc.Row([
-        dbc.Col(dbc.Card([
-            dbc.CardBody([
-                html.H6("Total Permits", className="card-title"),
-                html.H4("—", id="kpi-total-permits")
-            ])
-        ]), width=4),
+    return html.Div([
+        # Raw KPI totals; formatted into the cards by a clientside callback
+        dcc.Store(id="kpi-totals"),
 
-        dbc.Col(dbc.Card([
-            dbc.CardBody([
-                html.H6("Total Valuation", className="card-title"),
-                html.H4("—", id="kpi-total-valuation")
-            ])
-        ]), width=4),
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardBody([
+                    html.H6("Total Permits", className="card-title"),
+                    html.H4("—", id="kpi-total-permits")
+                ])
+            ]), width=4),
 
-        dbc.Col(dbc.Card([
-            dbc.CardBody([
-                html.H6("Departments", className="card-title"),
-                html.H4("—", id="kpi-department-count")
-            ])
-        ]), width=4)
+            dbc.Col(dbc.Card([
+                dbc.CardBody([
+                    html.H6("Total Valuation", className="card-title"),
+                    html.H4("—", id="kpi-total-valuation")
+                ])
+            ]), width=4),
+
+            dbc.Col(dbc.Card([
+                dbc.CardBody([
+                    html.H6("Departments", className="card-title"),
+                    html.H4("—", id="kpi-department-count")
+                ])
+            ]), width=4)
+        ])
     ])
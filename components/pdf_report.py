@@ -0,0 +1,319 @@
+"""
+Paginated PDF table reports.
+
+Rows are laid out from metrics computed once per report (column widths
+from a sample of rows, characters that fit each column, rows per page), so
+pages are filled without measuring individual cells. Each page draws its
+grid as one set of lines and its text column by column inside a clipping
+rectangle, instead of one bordered FPDF cell per value, and repeats the
+header row.
+
+Large reports can be rendered in parallel: page ranges go to worker
+processes and the parts are merged at the end. Merging needs the optional
+pypdf package; without it reports are rendered in this process.
+"""
+
+import itertools
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from typing import Any, BinaryIO, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from fpdf import FPDF
+
+try:
+    from pypdf import PdfWriter
+except ImportError:  # pragma: no cover - pypdf is optional
+    PdfWriter = None
+
+logger = logging.getLogger(__name__)
+
+FONT = "Helvetica"
+TITLE_FONT_SIZE = 16
+HEADER_FONT_SIZE = 10
+BODY_FONT_SIZE = 8
+
+# Page geometry, in millimetres
+PAGE_SIZES = {"P": (210, 297), "L": (297, 210)}
+MARGIN = 10
+FOOTER_HEIGHT = 20
+HEADER_ROW_HEIGHT = 10
+ROW_HEIGHT = 6
+CELL_PADDING = 1
+MIN_COLUMN_WIDTH = 12
+MAX_COLUMN_WIDTH = 40
+
+# Height of the title, timestamp and record count on the first page
+TITLE_BLOCK_HEIGHT = 50
+
+# Column widths are estimated from this many rows
+WIDTH_SAMPLE_ROWS = 1000
+
+# Processes rendering page ranges (1 renders in this process) and the
+# pages each of them renders at a time
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "1"))
+PAGES_PER_PART = 250
+
+ELLIPSIS = "..."
+
+
+class ReportLayout(NamedTuple):
+    """Metrics shared by every page of a report."""
+
+    orientation: str
+    column_x: List[float]
+    column_widths: List[float]
+    max_chars: List[int]
+    rows_first_page: int
+    rows_per_page: int
+
+
+def compute_layout(header: Sequence[str], sample: Sequence[Sequence[Any]]) -> ReportLayout:
+    """
+    Work out the page layout of a report.
+
+    Column widths fit the header and the longest values in the sample,
+    within MIN_COLUMN_WIDTH and MAX_COLUMN_WIDTH. Wide tables switch to
+    landscape and are scaled down to fit the page.
+
+    Args:
+        header: Column names
+        sample: The first rows of the report
+
+    Returns:
+        ReportLayout: The report's metrics
+    """
+    pdf = FPDF(unit="mm")
+    pdf.set_font(FONT, "", BODY_FONT_SIZE)
+    # Average character width; longer values are cut to the column
+    char_width = pdf.get_string_width("0")
+
+    lengths = [0] * len(header)
+    for row in sample[:WIDTH_SAMPLE_ROWS]:
+        for i, value in enumerate(row):
+            if value is not None:
+                lengths[i] = max(lengths[i], len(str(value)))
+
+    pdf.set_font(FONT, "B", HEADER_FONT_SIZE)
+    widths = [
+        min(max(pdf.get_string_width(str(name)), length * char_width) + 2 * CELL_PADDING,
+            MAX_COLUMN_WIDTH)
+        for name, length in zip(header, lengths)
+    ]
+    widths = [max(width, MIN_COLUMN_WIDTH) for width in widths]
+
+    orientation = "P"
+    if sum(widths) > PAGE_SIZES["P"][0] - 2 * MARGIN:
+        orientation = "L"
+    page_width, page_height = PAGE_SIZES[orientation]
+    usable_width = page_width - 2 * MARGIN
+    if sum(widths) > usable_width:
+        scale = usable_width / sum(widths)
+        widths = [width * scale for width in widths]
+
+    column_x, x = [], MARGIN
+    for width in widths:
+        column_x.append(x)
+        x += width
+
+    body_height = page_height - MARGIN - FOOTER_HEIGHT - HEADER_ROW_HEIGHT
+    return ReportLayout(
+        orientation=orientation,
+        column_x=column_x,
+        column_widths=widths,
+        max_chars=[max(1, int((width - 2 * CELL_PADDING) / char_width)) for width in widths],
+        rows_first_page=max(1, math.floor((body_height - TITLE_BLOCK_HEIGHT) / ROW_HEIGHT)),
+        rows_per_page=max(1, math.floor(body_height / ROW_HEIGHT)),
+    )
+
+
+def _format(value: Any, max_chars: int) -> str:
+    """Cell text, cut to the column and limited to the core font's characters."""
+    if value is None:
+        return ""
+    text = str(value)
+    if len(text) > max_chars:
+        text = text[:max(0, max_chars - len(ELLIPSIS))] + ELLIPSIS
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+class _ReportPDF(FPDF):
+    """FPDF document with the report footer and page numbers."""
+
+    def __init__(self, layout: ReportLayout, user_id: str, first_page: int = 1):
+        super().__init__(orientation=layout.orientation, unit="mm", format="A4")
+        self.set_auto_page_break(False)
+        self.set_margins(MARGIN, MARGIN)
+        self.user_id = user_id
+        self.page_offset = first_page - 1
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font(FONT, "I", 8)
+        page = self.page_no() + self.page_offset
+        self.cell(0, 10, f"Generated by user: {self.user_id} - Page {page}", align="C")
+
+
+def _render_title(pdf: FPDF, title: str, total_rows: Optional[int]) -> None:
+    """Title block at the top of the first page."""
+    pdf.set_xy(MARGIN, MARGIN)
+    pdf.set_font(FONT, "B", TITLE_FONT_SIZE)
+    pdf.cell(0, 10, title, align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(10)
+    pdf.set_font(FONT, "", 10)
+    pdf.cell(0, 10, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+             new_x="LMARGIN", new_y="NEXT")
+    if total_rows is not None:
+        pdf.cell(0, 10, f"Total Records: {total_rows}", new_x="LMARGIN", new_y="NEXT")
+
+
+def _render_page(pdf: FPDF, layout: ReportLayout, header: Sequence[str],
+                 rows: Sequence[Sequence[Any]], top: float) -> None:
+    """Header row, grid and cell text of one page."""
+    right = layout.column_x[-1] + layout.column_widths[-1]
+    body_top = top + HEADER_ROW_HEIGHT
+    bottom = body_top + ROW_HEIGHT * len(rows)
+    columns = list(zip(layout.column_x, layout.column_widths, layout.max_chars))
+
+    # Grid: one line per row and column boundary
+    for y in [top, body_top] + [body_top + i * ROW_HEIGHT for i in range(1, len(rows) + 1)]:
+        pdf.line(MARGIN, y, right, y)
+    for x in layout.column_x + [right]:
+        pdf.line(x, top, x, bottom)
+
+    # Header row, repeated on every page
+    pdf.set_font(FONT, "B", HEADER_FONT_SIZE)
+    baseline = (HEADER_ROW_HEIGHT + pdf.font_size * 0.7) / 2
+    for (x, width, _), name in zip(columns, header):
+        text = _format(name, len(str(name)))
+        indent = max(CELL_PADDING, (width - pdf.get_string_width(text)) / 2)
+        with pdf.rect_clip(x, top, width, HEADER_ROW_HEIGHT):
+            pdf.text(x + indent, top + baseline, text)
+
+    # Cell text, one column at a time, clipped to the column
+    pdf.set_font(FONT, "", BODY_FONT_SIZE)
+    baseline = (ROW_HEIGHT + pdf.font_size * 0.7) / 2
+    for col, (x, width, max_chars) in enumerate(columns):
+        if not rows:
+            break
+        with pdf.rect_clip(x, body_top, width, bottom - body_top):
+            y = body_top + baseline
+            for row in rows:
+                text = _format(row[col], max_chars)
+                if text:
+                    pdf.text(x + CELL_PADDING, y, text)
+                y += ROW_HEIGHT
+
+
+def _render_pages(pdf: "_ReportPDF", layout: ReportLayout, header: Sequence[str],
+                  pages: Iterable[Sequence[Sequence[Any]]], title: Optional[str],
+                  total_rows: Optional[int]) -> None:
+    """Add pages of rows to a document; page 1 also gets the title block."""
+    for rows in pages:
+        pdf.add_page()
+        top = MARGIN
+        if pdf.page_no() + pdf.page_offset == 1:
+            _render_title(pdf, title, total_rows)
+            top = MARGIN + TITLE_BLOCK_HEIGHT
+        _render_page(pdf, layout, header, rows, top)
+
+
+def _render_part(layout: ReportLayout, header: Sequence[str], pages: List[List[Sequence[Any]]],
+                 user_id: str, first_page: int, title: Optional[str] = None,
+                 total_rows: Optional[int] = None) -> bytes:
+    """Render a range of pages as a standalone PDF; runs in a worker process."""
+    pdf = _ReportPDF(layout, user_id, first_page)
+    _render_pages(pdf, layout, header, pages, title, total_rows)
+    return bytes(pdf.output())
+
+
+def _paginate(rows: Iterable[Sequence[Any]], layout: ReportLayout) -> Iterator[List[Sequence[Any]]]:
+    """Group rows into pages; an empty report still has one page."""
+    page, capacity, emitted = [], layout.rows_first_page, False
+    for row in rows:
+        page.append(row)
+        if len(page) == capacity:
+            yield page
+            page, capacity, emitted = [], layout.rows_per_page, True
+    if page or not emitted:
+        yield page
+
+
+def _parts(pages: Iterator[List[Sequence[Any]]]) -> Iterator[List[List[Sequence[Any]]]]:
+    """Group pages into page ranges of PAGES_PER_PART."""
+    part = []
+    for page in pages:
+        part.append(page)
+        if len(part) == PAGES_PER_PART:
+            yield part
+            part = []
+    if part:
+        yield part
+
+
+def write_table_report(
+    output: BinaryIO,
+    header: Sequence[str],
+    chunks: Iterable[Sequence[Sequence[Any]]],
+    title: str,
+    user_id: str,
+    total_rows: Optional[int] = None,
+    workers: int = PDF_WORKERS
+) -> int:
+    """
+    Render rows as a paginated PDF table.
+
+    Args:
+        output: Binary file the PDF is written to
+        header: Column names
+        chunks: Lists of row tuples, in header order
+        title: Report title on the first page
+        user_id: User named in the page footer
+        total_rows: Record count shown on the first page, if known
+        workers: Processes rendering page ranges; more than 1 needs pypdf
+
+    Returns:
+        int: Number of rows rendered
+    """
+    chunks = iter(chunks)
+    first = list(next(chunks, []))
+    layout = compute_layout(header, first)
+
+    row_count = 0
+
+    def rows():
+        nonlocal row_count
+        for chunk in itertools.chain([first], chunks):
+            row_count += len(chunk)
+            yield from chunk
+
+    pages = _paginate(rows(), layout)
+
+    if workers > 1 and PdfWriter is None:
+        logger.info("pypdf is not installed; rendering the PDF in one process")
+        workers = 1
+
+    if workers <= 1:
+        pdf = _ReportPDF(layout, user_id)
+        _render_pages(pdf, layout, header, pages, title, total_rows)
+        output.write(pdf.output())
+        return row_count
+
+    writer = PdfWriter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures, first_page = [], 1
+        for part in _parts(pages):
+            futures.append(pool.submit(
+                _render_part, layout, header, part, user_id, first_page, title, total_rows
+            ))
+            first_page += len(part)
+            # Bound the pages waiting in memory; parts are merged in order
+            while len(futures) > 2 * workers:
+                writer.append(BytesIO(futures.pop(0).result()))
+        for future in futures:
+            writer.append(BytesIO(future.result()))
+    writer.write(output)
+    return row_count
@@ -0,0 +1,168 @@
+"""
+Cancellation of superseded dashboard requests.
+
+Each cancellable callback call is numbered per (session, callback). When a
+newer call for the same session and callback starts, older ones are stale:
+their running SQLite queries are aborted through a progress handler
+installed by ``get_connection`` and their results are discarded, so rapid
+filter changes only pay for the request that will actually be shown.
+
+Tracking is per process; requests served by another worker process are not
+cancelled.
+"""
+import contextvars
+import logging
+import sqlite3
+import threading
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+
+from dash.exceptions import PreventUpdate
+
+logger = logging.getLogger(__name__)
+
+# SQLite virtual machine instructions between staleness checks
+PROGRESS_CHECK_INTERVAL = 1000
+
+# Most (session, callback) pairs tracked before the oldest are forgotten
+MAX_TRACKED_REQUESTS = 10_000
+
+RequestKey = Tuple[str, str]
+
+# (session id, callback name) -> number of the newest request
+_latest: Dict[RequestKey, int] = {}
+_latest_lock = threading.Lock()
+
+# (key, number) of the request being served by the current thread
+_current_request: contextvars.ContextVar = contextvars.ContextVar(
+    "current_request", default=None
+)
+
+
+class RequestCancelled(Exception):
+    """Raised when a request is superseded by a newer one."""
+
+
+def begin_request(session_id: str, name: str) -> contextvars.Token:
+    """
+    Start tracking a request, making older requests for the same key stale.
+
+    Args:
+        session_id: Browser session ID
+        name: Callback name
+
+    Returns:
+        Token: Token to pass to end_request
+    """
+    key = (session_id, name)
+    with _latest_lock:
+        number = _latest.pop(key, 0) + 1
+        _latest[key] = number
+        while len(_latest) > MAX_TRACKED_REQUESTS:
+            del _latest[next(iter(_latest))]
+
+    return _current_request.set((key, number))
+
+
+def end_request(token: contextvars.Token) -> None:
+    """
+    Stop tracking the current request.
+
+    Args:
+        token: Token returned by begin_request
+    """
+    _current_request.reset(token)
+
+
+def is_stale(request: Optional[Tuple[RequestKey, int]] = None) -> bool:
+    """
+    Check whether a request has been superseded.
+
+    Args:
+        request: (key, number) of the request. If None, checks the request
+            being served by the current thread.
+
+    Returns:
+        bool: True if a newer request for the same key has started
+    """
+    request = request or _current_request.get()
+    if request is None:
+        return False
+    key, number = request
+    return _latest.get(key, number) != number
+
+
+def raise_if_stale() -> None:
+    """
+    Stop the current request if it has been superseded.
+
+    Call between expensive non-SQL steps; running queries are aborted
+    automatically.
+
+    Raises:
+        RequestCancelled: If a newer request for the same key has started
+    """
+    if is_stale():
+        raise RequestCancelled()
+
+
+def install_cancellation(conn: sqlite3.Connection) -> None:
+    """
+    Abort the connection's queries once the current request becomes stale.
+
+    Does nothing outside a tracked request, so background jobs are never
+    interrupted.
+
+    Args:
+        conn: Connection opened for the current request
+    """
+    request = _current_request.get()
+    if request is None:
+        return
+    # A non-zero return makes SQLite abort the running statement with
+    # "interrupted"
+    conn.set_progress_handler(lambda: int(is_stale(request)), PROGRESS_CHECK_INTERVAL)
+
+
+def cancellable(name: str) -> Callable:
+    """
+    Decorator making a Dash callback cancellable per browser session.
+
+    The decorated callback takes the session ID (from the ``session-id``
+    store) as its last argument; it is not passed on to the callback. If a
+    newer call for the same session arrives while it runs, its queries are
+    aborted and no update is sent.
+
+    Args:
+        name: Callback name; calls with the same name supersede each other
+
+    Returns:
+        function: Decorator for the callback
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args):
+            *args, session_id = args
+            if not session_id:
+                return func(*args)
+
+            token = begin_request(session_id, name)
+            try:
+                result = func(*args)
+            except sqlite3.OperationalError as e:
+                if is_stale() and "interrupt" in str(e):
+                    logger.debug(f"Cancelled stale {name} request")
+                    raise PreventUpdate
+                raise
+            except RequestCancelled:
+                raise PreventUpdate
+            else:
+                if is_stale():
+                    raise PreventUpdate
+                return result
+            finally:
+                end_request(token)
+
+        return wrapper
+
+    return decorator
@@ -6,6 +6,8 @@ import sqlite3
 from typing import Optional, Callable, Any, Dict, List
 from pathlib import Path
 
+from db.cancellation import install_cancellation
+
 # Database file path
 DB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
 DB_PATH = os.path.join(DB_DIR, 'app.db')
@@ -25,6 +27,8 @@ def get_connection() -> sqlite3.Connection:
     conn.execute("PRAGMA foreign_keys = ON")
     # Set a longer busy timeout to reduce the chance of database locks
     conn.execute("PRAGMA busy_timeout = 5000")
+    # Abort queries of dashboard requests superseded by newer ones
+    install_cancellation(conn)
     return conn
 
 def init_db() -> None:
@@ -37,6 +41,10 @@ def init_db() -> None:
     # Create database file if it doesn't exist
     Path(DB_PATH).touch(exist_ok=True)
     
+    # With WAL, long reads such as streamed exports don't block writers
+    with get_connection() as conn:
+        conn.execute("PRAGMA journal_mode = WAL")
+    
     # Run migrations to ensure the schema is up to date
     from .migrations import run_migrations
     run_migrations()
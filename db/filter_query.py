@@ -0,0 +1,248 @@
+"""
+Translation of DataTable filter and sort expressions into SQL.
+
+Tables with ``filter_action="custom"`` and ``sort_action="custom"`` send
+their ``filter_query`` string and ``sort_by`` list to the server. This
+module turns them into a parameterized WHERE clause and an ORDER BY clause,
+so filtering and sorting happen in the database and only one page of rows
+is returned.
+
+Each table passes a whitelist mapping its DataTable column ids to SQL
+expressions; column ids are never interpolated into SQL themselves, and
+all values are bound as parameters. Equality, range and date-prefix terms
+compare the bare column so SQLite can use an index on it.
+"""
+import math
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Comparison operators, in both the symbol and the word spelling
+COMPARISONS = {
+    "=": "=", "eq": "=",
+    "!=": "!=", "ne": "!=",
+    "<": "<", "lt": "<",
+    "<=": "<=", "le": "<=",
+    ">": ">", "gt": ">",
+    ">=": ">=", "ge": ">=",
+}
+
+# Unary operators and the condition they stand for ({0} is the column)
+UNARY = {
+    "is blank": "({0} IS NULL OR {0} = '')",
+    "is not blank": "({0} IS NOT NULL AND {0} != '')",
+    "is nil": "{0} IS NULL",
+    "is not nil": "{0} IS NOT NULL",
+}
+
+SORT_DIRECTIONS = {"asc": "ASC", "desc": "DESC"}
+
+# An optional case prefix (s: sensitive, i: insensitive) and an operator;
+# word operators must be followed by whitespace or the end of the term
+_SYMBOL_OPERATOR = re.compile(r"^(?P<case>[si]?)(?P<op><=|>=|!=|<|>|=)\s*(?P<value>.*)$", re.S)
+_WORD_OPERATOR = re.compile(
+    r"^(?P<case>[si]?)(?P<op>eq|ne|lt|le|gt|ge|contains|datestartswith)(?:\s+(?P<value>.*))?$",
+    re.S
+)
+_TERM = re.compile(r"^\{(?P<column>[^}]+)\}\s*(?P<rest>.*)$", re.S)
+_QUOTES = "\"'`"
+
+
+class FilterQueryError(ValueError):
+    """Raised for filter or sort expressions that can't be translated."""
+
+
+class FilterTerm(NamedTuple):
+    """One ``{column} operator value`` term of a filter query."""
+
+    column: str
+    operator: str
+    value: Any = None
+    case_sensitive: Optional[bool] = None
+
+
+def _split_terms(filter_query: str) -> List[str]:
+    """Split a filter query on ``&&`` outside quoted values."""
+    terms, current, quote, i = [], [], None, 0
+    while i < len(filter_query):
+        char = filter_query[i]
+        if quote:
+            current.append(char)
+            if char == "\\" and i + 1 < len(filter_query):
+                current.append(filter_query[i + 1])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in _QUOTES:
+            quote = char
+            current.append(char)
+        elif filter_query.startswith("&&", i):
+            terms.append("".join(current))
+            current = []
+            i += 1
+        elif filter_query.startswith("||", i):
+            raise FilterQueryError("Only filters combined with && are supported")
+        else:
+            current.append(char)
+        i += 1
+
+    if quote:
+        raise FilterQueryError("Unterminated quoted value in filter")
+    terms.append("".join(current))
+    return [term.strip() for term in terms if term.strip()]
+
+
+def _parse_value(text: str, numeric: bool) -> Any:
+    """Unquote a value, converting bare numbers for comparisons."""
+    text = text.strip()
+    if len(text) >= 2 and text[0] in _QUOTES and text[-1] == text[0]:
+        return re.sub(r"\\(.)", r"\1", text[1:-1])
+    if numeric:
+        try:
+            return int(text)
+        except ValueError:
+            try:
+                return float(text)
+            except ValueError:
+                pass
+    return text
+
+
+def parse_filter_query(filter_query: Optional[str]) -> List[FilterTerm]:
+    """
+    Parse a DataTable filter query.
+
+    Supports terms combined with ``&&``, the comparison operators (as
+    symbols or words), ``contains``, ``datestartswith`` (each with an
+    optional ``s``/``i`` case prefix) and ``is [not] blank``/``is [not] nil``.
+
+    Args:
+        filter_query: The table's ``filter_query`` property
+
+    Returns:
+        list: The parsed terms, in order
+
+    Raises:
+        FilterQueryError: If the query uses unsupported syntax
+    """
+    terms = []
+    for text in _split_terms(filter_query or ""):
+        match = _TERM.match(text)
+        if not match:
+            raise FilterQueryError(f"Invalid filter term: {text}")
+        column, rest = match.group("column"), match.group("rest").strip()
+
+        unary = " ".join(rest.lower().split())
+        if unary in UNARY:
+            terms.append(FilterTerm(column, unary))
+            continue
+
+        match = _SYMBOL_OPERATOR.match(rest) or _WORD_OPERATOR.match(rest)
+        if not match or not (match.group("value") or "").strip():
+            raise FilterQueryError(f"Unsupported filter on {column}: {rest}")
+
+        operator = COMPARISONS.get(match.group("op"), match.group("op"))
+        case = {"s": True, "i": False}.get(match.group("case"))
+        value = _parse_value(match.group("value"), numeric=operator in COMPARISONS.values())
+        terms.append(FilterTerm(column, operator, value, case))
+
+    return terms
+
+
+def _escape_like(text: str) -> str:
+    """Escape LIKE wildcards, using backslash as the escape character."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _condition(expr: str, term: FilterTerm) -> Tuple[str, List[Any]]:
+    """SQL condition and parameters for one filter term."""
+    if term.operator in UNARY:
+        return UNARY[term.operator].format(expr), []
+
+    if term.operator == "contains":
+        # Case-sensitive unless asked otherwise, like DataTable's own filtering
+        text = str(term.value)
+        if term.case_sensitive is False:
+            return f"{expr} LIKE ? ESCAPE '\\'", [f"%{_escape_like(text)}%"]
+        return f"instr({expr}, ?) > 0", [text]
+
+    if term.operator == "datestartswith":
+        # A range on the bare column instead of LIKE, so an index applies
+        prefix = str(term.value)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return f"({expr} >= ? AND {expr} < ?)", [prefix, upper]
+
+    collate = " COLLATE NOCASE" if term.case_sensitive is False and isinstance(term.value, str) else ""
+    return f"{expr} {term.operator} ?{collate}", [term.value]
+
+
+def _sql_column(column: str, columns: Dict[str, str]) -> str:
+    """Whitelisted SQL expression for a DataTable column id."""
+    try:
+        return columns[column]
+    except KeyError:
+        raise FilterQueryError(f"Column '{column}' can't be filtered or sorted") from None
+
+
+def build_where(filter_query: Optional[str], columns: Dict[str, str]) -> Tuple[str, List[Any]]:
+    """
+    Translate a DataTable filter query into a WHERE condition.
+
+    Args:
+        filter_query: The table's ``filter_query`` property
+        columns: DataTable column id -> SQL expression of the columns that
+            may be filtered
+
+    Returns:
+        tuple: Condition (without ``WHERE``; '1=1' when there is no filter)
+        and its parameters
+
+    Raises:
+        FilterQueryError: If the query is unsupported or uses a column
+            outside the whitelist
+    """
+    conditions, params = [], []
+    for term in parse_filter_query(filter_query):
+        condition, values = _condition(_sql_column(term.column, columns), term)
+        conditions.append(condition)
+        params.extend(values)
+    return " AND ".join(conditions) or "1=1", params
+
+
+def build_order_by(sort_by: Optional[List[Dict[str, str]]], columns: Dict[str, str]) -> str:
+    """
+    Translate a DataTable sort_by list into an ORDER BY list.
+
+    Args:
+        sort_by: The table's ``sort_by`` property
+        columns: DataTable column id -> SQL expression of the columns that
+            may be sorted
+
+    Returns:
+        str: Comma-separated sort terms (without ``ORDER BY``), or '' if
+        the table isn't sorted
+
+    Raises:
+        FilterQueryError: If a column is outside the whitelist or a
+            direction is invalid
+    """
+    terms = []
+    for sort in sort_by or []:
+        direction = SORT_DIRECTIONS.get(str(sort.get("direction", "asc")).lower())
+        if direction is None:
+            raise FilterQueryError(f"Invalid sort direction: {sort.get('direction')}")
+        terms.append(f"{_sql_column(sort.get('column_id'), columns)} {direction}")
+    return ", ".join(terms)
+
+
+def page_count(total_count: int, page_size: int) -> int:
+    """
+    Get the number of pages for a row count.
+
+    Args:
+        total_count: Number of matching rows
+        page_size: Rows per page
+
+    Returns:
+        int: Number of pages, at least 1
+    """
+    return max(1, math.ceil(total_count / max(1, page_size)))
@@ -7,8 +7,7 @@ from typing import List, Optional
 from pathlib import Path
 from datetime import datetime
 
-# Get the absolute path to the database file
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.db")
+# Directory of the migration SQL files
 MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
 
 def get_migration_files() -> List[str]:
@@ -100,15 +99,23 @@ def apply_migration(conn, filename: str) -> bool:
         conn.rollback()
         return False
 
-def run_migrations() -> None:
+def run_migrations(db_path: Optional[str] = None) -> None:
     """
     Run all pending database migrations.
+    
+    Args:
+        db_path: Database to migrate; defaults to the application database
+            (db.connection.DB_PATH)
     """
     # Ensure migrations directory exists
     os.makedirs(MIGRATIONS_DIR, exist_ok=True)
     
+    if db_path is None:
+        from db import connection
+        db_path = connection.DB_PATH
+    
     # Connect to the database
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(db_path)
     
     try:
         # Create migrations table if it doesn't exist
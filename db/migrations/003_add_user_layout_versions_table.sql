@@ -0,0 +1,12 @@
+-- Migration to add the user_layout_versions table
+-- Each user's layout version is bumped by every change to their saved
+-- layout; saves state the version they were based on
+
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS user_layout_versions (
+    user_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+COMMIT;
@@ -1,7 +1,22 @@
 from db.connection import get_connection
-from typing import List, Dict, Any, Optional
+from db.filter_query import build_where, build_order_by
+from cache.memory import memoize_by_generation
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 
+@memoize_by_generation(max_entries=8)
 def get_filter_options(column):
+    """
+    Get the distinct values of a filter column.
+    
+    Results are cached for the current data generation, so page loads
+    don't query the database and new values appear after each ETL run.
+    
+    Args:
+        column (str): One of 'year', 'month' or 'action_by_dept'
+        
+    Returns:
+        list: The non-empty values, sorted
+    """
     allowed = {"year", "month", "action_by_dept"}
     if column not in allowed:
         return []
@@ -11,6 +26,7 @@ def get_filter_options(column):
         results = conn.execute(query).fetchall()
     return [row[0] for row in results if row[0]]
 
+@memoize_by_generation(max_entries=256)
 def get_kpi_totals(year=None, month=None, dept=None):
     """
     Get KPI totals based on the provided filters.
@@ -61,7 +77,15 @@ def get_kpi_totals(year=None, month=None, dept=None):
     }
 
 
-def get_permit_trends(year=None, month=None, dept=None):
+# strftime format of each trend granularity
+TREND_GRANULARITIES = {
+    "month": "%Y-%m",
+    "day": "%Y-%m-%d",
+}
+
+
+@memoize_by_generation(max_entries=256)
+def get_permit_trends(year=None, month=None, dept=None, granularity="month", start=None, end=None):
     """
     Get permit trends over time based on filters.
     
@@ -69,12 +93,18 @@ def get_permit_trends(year=None, month=None, dept=None):
         year (str, optional): Filter by year
         month (str, optional): Filter by month (1-12)
         dept (str, optional): Filter by department
+        granularity (str, optional): Period size, 'month' or 'day'
+        start (str, optional): First date to include (YYYY-MM-DD)
+        end (str, optional): Last date to include (YYYY-MM-DD)
         
     Returns:
         list: List of tuples containing (period, count)
     """
-    query = """
-    SELECT strftime('%Y-%m', date_status) as period, COUNT(*) as count
+    if granularity not in TREND_GRANULARITIES:
+        raise ValueError(f"Unknown trend granularity: {granularity}")
+    
+    query = f"""
+    SELECT strftime('{TREND_GRANULARITIES[granularity]}', date_status) as period, COUNT(*) as count
     FROM permits
     WHERE 1=1
     """
@@ -92,6 +122,14 @@ def get_permit_trends(year=None, month=None, dept=None):
         filters.append("AND action_by_dept = ?")
         params.append(dept)
 
+    if start:
+        filters.append("AND date_status >= ?")
+        params.append(start)
+
+    if end:
+        filters.append("AND date_status < date(?, '+1 day')")
+        params.append(end)
+
 
     query += " ".join(filters) + " GROUP BY period ORDER BY period"
 
@@ -99,6 +137,7 @@ def get_permit_trends(year=None, month=None, dept=None):
         return conn.execute(query, params).fetchall()
 
 
+@memoize_by_generation(max_entries=256)
 def get_status_distribution(year=None, month=None, dept=None):
     """
     Get status distribution of permits based on filters.
@@ -138,6 +177,7 @@ def get_status_distribution(year=None, month=None, dept=None):
         return conn.execute(query, params).fetchall()
 
 
+@memoize_by_generation(max_entries=32)
 def get_filtered_permits(year=None, month=None, dept=None):
     """
     Get filtered permit records based on criteria.
@@ -190,6 +230,174 @@ def get_filtered_permits(year=None, month=None, dept=None):
     return results
 
 
+# Columns of the permit table that can be filtered and sorted on the
+# server: DataTable column id -> SQL expression
+PERMIT_TABLE_COLUMNS = {
+    "Permit Number": "permit_number",
+    "Address": "address",
+    "Valuation": "CAST(REPLACE(valuation, '$', '') AS REAL)",
+    "Date": "date_filed",
+    "Task": "description",
+    "Status": "status",
+    "Department": "action_by_dept",
+}
+
+
+def get_permit_page(
+    year=None,
+    month=None,
+    dept=None,
+    filter_query: Optional[str] = None,
+    sort_by: Optional[List[Dict[str, str]]] = None,
+    page_current: int = 0,
+    page_size: int = 10
+) -> Dict[str, Any]:
+    """
+    Get one page of permit records for the permit table.
+    
+    The table's own filter and sort expressions are translated to SQL (see
+    db/filter_query.py), so only the requested page leaves the database.
+    
+    Args:
+        year (str, optional): Filter by year
+        month (str, optional): Filter by month (1-12)
+        dept (str, optional): Filter by department
+        filter_query (str, optional): The table's filter_query property
+        sort_by (list, optional): The table's sort_by property
+        page_current (int): Zero-based page number
+        page_size (int): Rows per page
+        
+    Returns:
+        dict: 'rows' (tuples in get_filtered_permits column order) and
+        'total_count' (number of matching rows)
+        
+    Raises:
+        FilterQueryError: If the filter or sort expression is unsupported
+    """
+    # Cached on hashable arguments; sort_by arrives as a list of dicts
+    sort_key = tuple((sort["column_id"], sort.get("direction", "asc")) for sort in sort_by or [])
+    return _get_permit_page(
+        year, month, dept, filter_query or "", sort_key, page_current or 0, page_size
+    )
+
+
+@memoize_by_generation(max_entries=128)
+def _get_permit_page(year, month, dept, filter_query, sort_key, page_current, page_size):
+    """Query one page of permits; see get_permit_page."""
+    sort_by = [{"column_id": column, "direction": direction} for column, direction in sort_key]
+    where, params = _permit_where(year, month, dept, filter_query)
+    query = PERMIT_SELECT_SQL + where + _permit_order_by(sort_by) + " LIMIT ? OFFSET ?"
+    
+    with get_connection() as conn:
+        total_count = conn.execute(f"SELECT COUNT(*) FROM permits{where}", params).fetchone()[0]
+        rows = conn.execute(query, params + [page_size, page_current * page_size]).fetchall()
+    
+    return {"rows": rows, "total_count": total_count}
+
+
+# Permit columns in the order of get_filtered_permits, get_permit_page and
+# iter_permit_rows
+PERMIT_SELECT_SQL = """
+    SELECT 
+        permit_number,
+        permit_type,
+        permit_subtype,
+        status,
+        description,
+        CAST(REPLACE(valuation, '$', '') AS REAL) as valuation,
+        date_filed,
+        date_issued,
+        date_completed,
+        action_by_dept,
+        address,
+        contractor
+    FROM permits
+    """
+
+
+def _permit_where(year, month, dept, filter_query) -> Tuple[str, List[Any]]:
+    """WHERE clause and parameters for the sidebar filters and a table filter."""
+    condition, params = build_where(filter_query, PERMIT_TABLE_COLUMNS)
+    
+    where = f" WHERE {condition}"
+    if year:
+        where += " AND strftime('%Y', date_filed) = ?"
+        params.append(str(year))
+    if month:
+        where += " AND strftime('%m', date_filed) = ?"
+        params.append(month.zfill(2))
+    if dept:
+        where += " AND action_by_dept = ?"
+        params.append(dept)
+    return where, params
+
+
+def _permit_order_by(sort_by) -> str:
+    """ORDER BY clause for a table sort, newest filings breaking ties."""
+    order_by = build_order_by(sort_by, PERMIT_TABLE_COLUMNS)
+    return f" ORDER BY {order_by + ', ' if order_by else ''}date_filed DESC"
+
+
+# Rows fetched from the cursor at a time when streaming exports
+EXPORT_FETCH_SIZE = 1000
+
+
+def iter_permit_rows(
+    year=None,
+    month=None,
+    dept=None,
+    filter_query: Optional[str] = None,
+    sort_by: Optional[List[Dict[str, str]]] = None,
+    chunk_size: int = EXPORT_FETCH_SIZE
+) -> Iterator[List[Tuple[Any, ...]]]:
+    """
+    Stream every permit matching the dashboard filters, in chunks.
+    
+    Rows are read with ``fetchmany`` from an open cursor, so exports of any
+    size use the memory of one chunk. The connection stays open until the
+    iterator is exhausted or closed; results are not cached.
+    
+    Args:
+        year (str, optional): Filter by year
+        month (str, optional): Filter by month (1-12)
+        dept (str, optional): Filter by department
+        filter_query (str, optional): The permit table's filter_query property
+        sort_by (list, optional): The permit table's sort_by property
+        chunk_size (int): Rows per chunk
+        
+    Returns:
+        iterator: Lists of up to chunk_size tuples, in get_filtered_permits
+        column order
+        
+    Raises:
+        FilterQueryError: If the filter or sort expression is unsupported;
+            raised here rather than on the first chunk, so callers can
+            reject a request before they start responding
+    """
+    where, params = _permit_where(year, month, dept, filter_query)
+    query = PERMIT_SELECT_SQL + where + _permit_order_by(sort_by)
+    
+    conn = get_connection()
+    try:
+        cursor = conn.execute(query, params)
+    except Exception:
+        conn.close()
+        raise
+    return _fetch_chunks(conn, cursor, chunk_size)
+
+
+def _fetch_chunks(conn, cursor, chunk_size: int) -> Iterator[List[Tuple[Any, ...]]]:
+    """Yield fetchmany chunks, closing the connection when done."""
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
 def get_user_layout(user_id: str) -> List[Dict[str, Any]]:
     """
     Get the saved layout for a specific user.
@@ -216,37 +424,177 @@ def get_user_layout(user_id: str) -> List[Dict[str, Any]]:
     ]
 
 
-def save_user_layout(user_id: str, layout: List[Dict[str, Any]]) -> None:
+# Position and size fields stored per layout item
+LAYOUT_FIELDS = ("x", "y", "w", "h")
+
+
+class LayoutConflictError(Exception):
+    """Raised when a layout save is based on an outdated layout version."""
+
+    def __init__(self, user_id: str, expected: int, current: int):
+        super().__init__(
+            f"Layout of {user_id} is at version {current}, not {expected}"
+        )
+        self.user_id = user_id
+        self.expected = expected
+        self.current = current
+
+
+def _layout_version(conn, user_id: str) -> int:
+    """
+    Read a user's layout version on an open connection.
+    
+    Versions live in user_layout_versions (migration 003) and are bumped
+    by every change to the saved layout. Saves state the version they were
+    based on, so a save from a stale window is detected instead of
+    silently overwriting newer changes.
+    """
+    row = conn.execute(
+        "SELECT version FROM user_layout_versions WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def _bump_layout_version(conn, user_id: str) -> int:
+    """Advance a user's layout version on an open connection."""
+    conn.execute(
+        """
+        INSERT INTO user_layout_versions (user_id, version) VALUES (?, 1)
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1
+        """,
+        (user_id,)
+    )
+    return _layout_version(conn, user_id)
+
+
+def get_user_layout_version(user_id: str) -> int:
+    """
+    Get the version of a user's saved layout.
+    
+    Args:
+        user_id (str): The ID of the user
+        
+    Returns:
+        int: The layout version, or 0 if the layout was never saved
+    """
+    with get_connection() as conn:
+        return _layout_version(conn, user_id)
+
+
+def bump_user_layout_version(user_id: str) -> int:
+    """
+    Mark a user's layout as changed without changing the saved layout.
+    
+    Used when something else the layout is built from changes (an admin
+    override), so cached builds are rebuilt and open pages' saves are
+    treated as stale.
+    
+    Args:
+        user_id (str): The ID of the user
+        
+    Returns:
+        int: The new layout version
+    """
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        version = _bump_layout_version(conn, user_id)
+        conn.commit()
+    return version
+
+
+def save_user_layout(
+    user_id: str,
+    layout: List[Dict[str, Any]],
+    expected_version: Optional[int] = None
+) -> Optional[int]:
     """
     Save the layout for a specific user.
     
+    Only the difference to the stored layout is written: changed and new
+    components are upserted and components no longer in the layout are
+    deleted. The version is only bumped when something changed.
+    
     Args:
         user_id (str): The ID of the user
         layout (list): List of layout items with i, x, y, w, h properties
+        expected_version (int, optional): Version the layout was based on;
+            None saves regardless of the stored version
+            
+    Returns:
+        int: The layout version after the save, or None if nothing was given
+        
+    Raises:
+        LayoutConflictError: If the stored version isn't expected_version
     """
     if not user_id or not layout:
-        return
+        return None
+    
+    wanted = {
+        item["i"]: tuple(item[k] for k in LAYOUT_FIELDS)
+        for item in layout
+        if all(k in item for k in ("i",) + LAYOUT_FIELDS)
+    }
     
     with get_connection() as conn:
-        # Delete existing layout for this user
-        conn.execute("DELETE FROM user_layouts WHERE user_id = ?", (user_id,))
+        # Lock out other writers between the version check and the write
+        conn.execute("BEGIN IMMEDIATE")
+        version = _layout_version(conn, user_id)
+        if expected_version is not None and expected_version != version:
+            conn.rollback()
+            raise LayoutConflictError(user_id, expected_version, version)
+        
+        stored = {
+            row[0]: tuple(row[1:])
+            for row in conn.execute(
+                "SELECT component_id, x, y, w, h FROM user_layouts WHERE user_id = ?",
+                (user_id,)
+            )
+        }
+        changed = [
+            (user_id, component_id) + position
+            for component_id, position in wanted.items()
+            if stored.get(component_id) != position
+        ]
+        removed = [(user_id, component_id) for component_id in stored.keys() - wanted.keys()]
         
-        # Insert new layout items
-        if layout:
-            values = [
-                (user_id, item["i"], item["x"], item["y"], item["w"], item["h"])
-                for item in layout
-                if all(k in item for k in ["i", "x", "y", "w", "h"])
-            ]
-            if values:
-                conn.executemany(
-                    """
-                    INSERT INTO user_layouts (user_id, component_id, x, y, w, h)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """,
-                    values
-                )
+        if changed:
+            conn.executemany(
+                """
+                INSERT INTO user_layouts (user_id, component_id, x, y, w, h)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, component_id)
+                DO UPDATE SET x = excluded.x, y = excluded.y, w = excluded.w, h = excluded.h
+                """,
+                changed
+            )
+        if removed:
+            conn.executemany(
+                "DELETE FROM user_layouts WHERE user_id = ? AND component_id = ?",
+                removed
+            )
+        if changed or removed:
+            version = _bump_layout_version(conn, user_id)
+        conn.commit()
+    
+    return version
+
+
+def delete_user_layout(user_id: str) -> int:
+    """
+    Delete a user's saved layout so the default layout is used.
+    
+    Args:
+        user_id (str): The ID of the user
+        
+    Returns:
+        int: The layout version after the delete
+    """
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM user_layouts WHERE user_id = ?", (user_id,))
+        version = _bump_layout_version(conn, user_id)
         conn.commit()
+    return version
 
 
 def get_default_layout() -> List[Dict[str, Any]]:
@@ -5,6 +5,7 @@ from typing import List, Dict, Optional, Any, Union
 import json
 from datetime import datetime
 from db.connection import get_connection
+from db.filter_query import build_where, build_order_by
 
 def get_user(user_id: str) -> Optional[Dict[str, Any]]:
     """
@@ -309,3 +310,168 @@ def get_admin_events(limit: int = 100, offset: int = 0,
             'limit': limit,
             'offset': offset
         }
+
+
+# Columns of the admin audit table that can be filtered and sorted on the
+# server: DataTable column id -> SQL expression
+AUDIT_TABLE_COLUMNS = {
+    "timestamp": "ae.timestamp",
+    "user_email": "u.email",
+    "event_type": "ae.event_type",
+    "target_type": "ae.target_type",
+    "details": "ae.metadata",
+    "ip_address": "ae.ip_address",
+}
+
+# Columns of the admin sessions table that can be filtered and sorted on
+# the server; the formatted duration can't be
+SESSION_TABLE_COLUMNS = {
+    "user_email": "u.email",
+    "login_time": "s.login_time",
+    "logout_time": "s.logout_time",
+    "ip_address": "s.ip_address",
+    "user_agent": "s.user_agent",
+    "is_active": "CASE WHEN s.is_active THEN 'Active' ELSE 'Inactive' END",
+}
+
+
+def _in_clause(column: str, values: List[Any]) -> str:
+    """Condition matching a column against a list of bound values."""
+    return f" AND {column} IN ({', '.join('?' for _ in values)})"
+
+
+def get_audit_log_page(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                       event_types: Optional[List[str]] = None,
+                       user_ids: Optional[List[str]] = None,
+                       search: Optional[str] = None,
+                       filter_query: Optional[str] = None,
+                       sort_by: Optional[List[Dict[str, str]]] = None,
+                       page_current: int = 0, page_size: int = 20) -> Dict[str, Any]:
+    """
+    Retrieve one page of admin events for the audit log table.
+    
+    Args:
+        start_date: Only events at or after this timestamp
+        end_date: Only events at or before this timestamp
+        event_types: Only these event types
+        user_ids: Only events by these admins
+        search: Text to look for in the user, event type or details
+        filter_query: The table's filter_query property
+        sort_by: The table's sort_by property
+        page_current: Zero-based page number
+        page_size: Events per page
+        
+    Returns:
+        dict: 'rows' (one dict per event, keyed by table column id) and
+        'total_count'
+        
+    Raises:
+        FilterQueryError: If the filter or sort expression is unsupported
+    """
+    condition, params = build_where(filter_query, AUDIT_TABLE_COLUMNS)
+    order_by = build_order_by(sort_by, AUDIT_TABLE_COLUMNS)
+    
+    where = f" WHERE {condition}"
+    if start_date:
+        where += " AND ae.timestamp >= ?"
+        params.append(start_date)
+    if end_date:
+        where += " AND ae.timestamp <= ?"
+        params.append(end_date)
+    if event_types:
+        where += _in_clause("ae.event_type", event_types)
+        params.extend(event_types)
+    if user_ids:
+        where += _in_clause("ae.user_id", user_ids)
+        params.extend(user_ids)
+    if search:
+        where += " AND (u.email LIKE ? OR ae.event_type LIKE ? OR ae.metadata LIKE ?)"
+        params.extend([f"%{search}%"] * 3)
+    
+    source = " FROM admin_events ae LEFT JOIN users u ON ae.user_id = u.user_id"
+    query = (
+        "SELECT " + ", ".join(f"{expr} AS {column}" for column, expr in AUDIT_TABLE_COLUMNS.items())
+        + source + where
+        + f" ORDER BY {order_by + ', ' if order_by else ''}ae.timestamp DESC LIMIT ? OFFSET ?"
+    )
+    
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        total_count = cursor.execute("SELECT COUNT(*)" + source + where, params).fetchone()[0]
+        cursor.execute(query, params + [page_size, page_current * page_size])
+        columns = [desc[0] for desc in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    return {'rows': rows, 'total_count': total_count}
+
+
+def _format_duration(login_time: Optional[str], logout_time: Optional[str]) -> str:
+    """Session length as e.g. '1h 15m'; open sessions count until now."""
+    if not login_time:
+        return ""
+    try:
+        start = datetime.fromisoformat(str(login_time))
+        end = datetime.fromisoformat(str(logout_time)) if logout_time else datetime.utcnow()
+    except ValueError:
+        return ""
+    minutes = max(0, int((end - start).total_seconds() // 60))
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+
+
+def get_session_page(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     user_ids: Optional[List[str]] = None,
+                     filter_query: Optional[str] = None,
+                     sort_by: Optional[List[Dict[str, str]]] = None,
+                     page_current: int = 0, page_size: int = 20) -> Dict[str, Any]:
+    """
+    Retrieve one page of user sessions for the session log table.
+    
+    Args:
+        start_date: Only sessions that started at or after this timestamp
+        end_date: Only sessions that started at or before this timestamp
+        user_ids: Only sessions of these users
+        filter_query: The table's filter_query property
+        sort_by: The table's sort_by property
+        page_current: Zero-based page number
+        page_size: Sessions per page
+        
+    Returns:
+        dict: 'rows' (one dict per session, keyed by table column id) and
+        'total_count'
+        
+    Raises:
+        FilterQueryError: If the filter or sort expression is unsupported
+    """
+    condition, params = build_where(filter_query, SESSION_TABLE_COLUMNS)
+    order_by = build_order_by(sort_by, SESSION_TABLE_COLUMNS)
+    
+    where = f" WHERE {condition}"
+    if start_date:
+        where += " AND s.login_time >= ?"
+        params.append(start_date)
+    if end_date:
+        where += " AND s.login_time <= ?"
+        params.append(end_date)
+    if user_ids:
+        where += _in_clause("s.user_id", user_ids)
+        params.extend(user_ids)
+    
+    source = " FROM user_sessions s LEFT JOIN users u ON s.user_id = u.user_id"
+    query = (
+        "SELECT " + ", ".join(f"{expr} AS {column}" for column, expr in SESSION_TABLE_COLUMNS.items())
+        + source + where
+        + f" ORDER BY {order_by + ', ' if order_by else ''}s.login_time DESC LIMIT ? OFFSET ?"
+    )
+    
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        total_count = cursor.execute("SELECT COUNT(*)" + source + where, params).fetchone()[0]
+        cursor.execute(query, params + [page_size, page_current * page_size])
+        columns = [desc[0] for desc in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    for row in rows:
+        row['duration'] = _format_duration(row['login_time'], row['logout_time'])
+    
+    return {'rows': rows, 'total_count': total_count}
@@ -6,7 +6,7 @@ for refreshing the dashboard's data from source to final presentation.
 """
 
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from pathlib import Path
 import sys
@@ -24,28 +24,48 @@ logger = logging.getLogger(__name__)
 # Import job logger
 sys.path.append(str(Path(__file__).parent.parent))
 from db.job_logger import log_job
+from etl.snapshots import write_snapshots, snapshots_available
+from etl.extract import load_sources, extract_sources
+from etl.validation import validate_staging_data, summarize_reports
+from cache.generation import bump_data_generation
 
-def import_raw_data() -> bool:
+def import_raw_data(
+    sources: Optional[List[Dict[str, Any]]] = None,
+    max_workers: Optional[int] = None
+) -> Dict[str, Any]:
     """
-    Import raw data from source systems.
+    Import raw data from the configured source systems.
+    
+    Sources are extracted concurrently into per-source staging tables. A
+    failing source is reported but does not stop the others.
+    
+    Args:
+        sources: Source definitions. If None, loads them from ETL_SOURCES.
+        max_workers: Maximum concurrent extractions (default: ETL_MAX_WORKERS)
     
     Returns:
-        bool: True if import was successful, False otherwise
+        dict: 'success' (True if at least one source loaded, or none are
+        configured) and the per-source results
     """
     logger.info("Starting raw data import")
-    # TODO: Implement actual data import logic
-    # Example:
-    # 1. Connect to source systems
-    # 2. Extract data
-    # 3. Save to staging area
-    # 4. Return success/failure
     
-    # Simulate work
-    import time
-    time.sleep(1)
+    if sources is None:
+        sources = load_sources()
     
-    logger.info("Completed raw data import")
-    return True
+    if not sources:
+        logger.info("No import sources configured; using existing data")
+        return {"success": True, "sources": []}
+    
+    results = extract_sources(sources, max_workers=max_workers)
+    failed = [r["name"] for r in results if r["status"] != "success"]
+    if failed:
+        logger.warning(f"Sources failed to import: {', '.join(failed)}")
+    
+    logger.info(
+        f"Completed raw data import: {len(results) - len(failed)} of "
+        f"{len(results)} sources, {sum(r['rows'] for r in results)} rows"
+    )
+    return {"success": len(failed) < len(results), "sources": results}
 
 def transform_staging_to_final() -> bool:
     """
@@ -90,6 +110,53 @@ def update_kpi_tables() -> bool:
     logger.info("Completed KPI table updates")
     return True
 
+def snapshot_final_tables() -> bool:
+    """
+    Write Parquet snapshots of the final tables for fast cold starts.
+    
+    Snapshots are a side artifact of the load, so failures are logged and
+    never fail the pipeline.
+    
+    Returns:
+        bool: True if the snapshots were written (or skipped because pyarrow
+        is not installed), False otherwise
+    """
+    if not snapshots_available():
+        logger.warning("pyarrow is not installed; skipping table snapshots")
+        return True
+    
+    logger.info("Starting table snapshots")
+    try:
+        write_snapshots()
+    except Exception as e:
+        logger.error(f"Failed to write table snapshots: {e}", exc_info=True)
+        return False
+    
+    logger.info("Completed table snapshots")
+    return True
+
+def warm_caches() -> Optional[Dict[str, Any]]:
+    """
+    Prewarm the dashboard caches for the most popular filter combinations.
+    
+    Warming is best effort: a failure is logged but does not fail the ETL.
+    
+    Returns:
+        dict: Warmup stats, or None if warming failed
+    """
+    # Import here so the ETL only loads the dashboard components when warming
+    from cache.prewarm import warm_popular_views
+    
+    try:
+        return warm_popular_views()
+    except Exception as e:
+        logger.warning(f"Cache prewarming failed: {e}", exc_info=True)
+        return None
+
+def _import_summary(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-source import results without the (separately logged) quality reports."""
+    return [{k: v for k, v in r.items() if k != "quality"} for r in results]
+
 def run_etl_pipeline() -> Dict[str, Any]:
     """
     Run the complete ETL pipeline.
@@ -99,13 +166,30 @@ def run_etl_pipeline() -> Dict[str, Any]:
     """
     job_name = "ETL_PIPELINE"
     start_time = datetime.utcnow()
+    quality_report = None
+    import_results = []
     
     logger.info("Starting ETL pipeline")
     
     try:
         # Import raw data
-        if not import_raw_data():
+        import_result = import_raw_data()
+        import_results = import_result["sources"]
+        if not import_result["success"]:
             raise Exception("Failed to import raw data")
+        
+        # Validate staged data before transforming it. Extracted sources were
+        # validated batch by batch during import; otherwise scan staging.
+        staged = [r for r in import_results if r["status"] == "success"]
+        if staged:
+            quality_report = summarize_reports(
+                {r["table"]: r["quality"] for r in staged},
+                sum(r["validation_seconds"] for r in staged)
+            )
+        else:
+            quality_report = validate_staging_data()
+        if not quality_report["passed"]:
+            raise Exception("Data quality validation failed")
             
         # Transform data
         if not transform_staging_to_final():
@@ -115,16 +199,37 @@ def run_etl_pipeline() -> Dict[str, Any]:
         if not update_kpi_tables():
             raise Exception("Failed to update KPI tables")
         
+        # Snapshot final tables; a failed snapshot only costs a slower cold start
+        snapshot_final_tables()
+        
+        # Publish the new data; generation-keyed caches stop matching old results
+        generation = bump_data_generation()
+        
+        # Compute the most used views against the new data before users ask
+        prewarm = warm_caches()
+        
         # Log successful completion
         duration = (datetime.utcnow() - start_time).total_seconds()
-        log_job(job_name, "SUCCESS", f"Completed in {duration:.2f} seconds")
+        log_job(
+            job_name, "SUCCESS", f"Completed in {duration:.2f} seconds",
+            details={
+                "quality": quality_report,
+                "import": _import_summary(import_results),
+                "data_generation": generation,
+                "prewarm": prewarm
+            }
+        )
         
         result = {
             "status": "success",
             "message": "ETL pipeline completed successfully",
             "duration_seconds": duration,
             "start_time": start_time.isoformat(),
-            "end_time": datetime.utcnow().isoformat()
+            "end_time": datetime.utcnow().isoformat(),
+            "quality": quality_report,
+            "import": _import_summary(import_results),
+            "data_generation": generation,
+            "prewarm": prewarm
         }
         
         logger.info(f"ETL pipeline completed in {duration:.2f} seconds")
@@ -134,7 +239,10 @@ def run_etl_pipeline() -> Dict[str, Any]:
         # Log the error
         duration = (datetime.utcnow() - start_time).total_seconds()
         error_msg = f"ETL pipeline failed after {duration:.2f} seconds: {str(e)}"
-        log_job(job_name, "FAILED", error_msg)
+        log_job(
+            job_name, "FAILED", error_msg,
+            details={"quality": quality_report, "import": _import_summary(import_results)}
+        )
         
         logger.error(error_msg, exc_info=True)
         
@@ -143,7 +251,9 @@ def run_etl_pipeline() -> Dict[str, Any]:
             "error": str(e),
             "duration_seconds": duration,
             "start_time": start_time.isoformat(),
-            "end_time": datetime.utcnow().isoformat()
+            "end_time": datetime.utcnow().isoformat(),
+            "quality": quality_report,
+            "import": _import_summary(import_results)
         }
 
 if __name__ == "__main__":
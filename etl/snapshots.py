@@ -0,0 +1,281 @@
+"""
+Columnar snapshots of the final dashboard tables.
+
+At the end of each ETL run the ``permits`` table and its rollups are written
+as compressed Parquet datasets under ``data/snapshots/``, partitioned by
+year. Worker processes and analytics code can memory-map a snapshot instead
+of re-scanning SQLite on startup.
+"""
+
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from db.connection import DB_DIR, get_connection
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = pc = ds = pq = None
+
+logger = logging.getLogger(__name__)
+
+# Root directory for all table snapshots
+SNAPSHOT_DIR = Path(DB_DIR) / "snapshots"
+
+# Rows fetched from SQLite per record batch
+SNAPSHOT_BATCH_SIZE = 50_000
+
+# Parquet codec; zstd gives a good size/speed trade-off for text-heavy rows
+SNAPSHOT_COMPRESSION = "zstd"
+
+# Name of the partition column added to every snapshot
+PARTITION_COLUMN = "year"
+
+# Directory name used for rows without a year (hive convention)
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Snapshot name -> query producing its rows. Every query must select a
+# ``year`` column, which is moved into the directory layout on write.
+SNAPSHOT_QUERIES = {
+    "permits": """
+        SELECT *, strftime('%Y', date_status) AS year
+        FROM permits
+    """,
+    "permit_rollups": """
+        SELECT
+            strftime('%Y', date_status) AS year,
+            strftime('%m', date_status) AS month,
+            action_by_dept,
+            status,
+            COUNT(*) AS permit_count,
+            COALESCE(SUM(CAST(REPLACE(valuation, '$', '') AS REAL)), 0) AS total_valuation
+        FROM permits
+        GROUP BY year, month, action_by_dept, status
+    """,
+}
+
+
+def snapshots_available() -> bool:
+    """
+    Check whether the optional pyarrow dependency is installed.
+
+    Returns:
+        bool: True if snapshots can be written and read
+    """
+    return pa is not None
+
+
+def _partitioning():
+    """Hive-style ``year=YYYY`` partitioning with the year kept as a string."""
+    return ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive")
+
+
+def _arrow_type(classes: Set[str]) -> "pa.DataType":
+    """Arrow type able to hold every SQLite storage class found in a column."""
+    if "text" in classes:
+        return pa.string()
+    if "blob" in classes:
+        return pa.binary()
+    if "real" in classes:
+        return pa.float64()
+    if "integer" in classes:
+        return pa.int64()
+    # Entirely NULL
+    return pa.string()
+
+
+def _column_types(conn, query: str, names: List[str]) -> List["pa.DataType"]:
+    """
+    Arrow types of a query's columns, from the values of every row.
+
+    SQLite columns are dynamically typed, so a column whose first rows are
+    integers may hold reals or text further down. One aggregate pass finds
+    the storage classes each column holds, and the type fits all of them.
+    """
+    aggregates = ", ".join(
+        'group_concat(DISTINCT typeof("{}"))'.format(name.replace('"', '""')) for name in names
+    )
+    row = conn.execute(f"SELECT {aggregates} FROM ({query})").fetchone()
+    return [_arrow_type(set((found or "").split(","))) for found in row]
+
+
+def _to_type(values: Sequence[Any], dtype: "pa.DataType") -> Sequence[Any]:
+    """Convert the values of a mixed column to the column's type."""
+    if dtype == pa.string():
+        return [
+            value if value is None or isinstance(value, str)
+            else value.decode("utf-8", "replace") if isinstance(value, bytes)
+            else str(value)
+            for value in values
+        ]
+    if dtype == pa.binary():
+        return [
+            value if value is None or isinstance(value, bytes) else str(value).encode("utf-8")
+            for value in values
+        ]
+    return values
+
+
+def _iter_record_batches(query: str, batch_size: int) -> Iterator["pa.RecordBatch"]:
+    """
+    Stream the result of a query as Arrow record batches.
+
+    The schema is derived from the whole result (see _column_types), so
+    every batch fits it; columns that are entirely NULL are typed as
+    strings.
+    """
+    with get_connection() as conn:
+        cursor = conn.execute(query)
+        names = [desc[0] for desc in cursor.description]
+        schema = pa.schema([
+            pa.field(name, dtype)
+            for name, dtype in zip(names, _column_types(conn, query, names))
+        ])
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+
+            columns = list(zip(*rows))
+            arrays = [
+                pa.array(_to_type(col, field.type), type=field.type)
+                for col, field in zip(columns, schema)
+            ]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _write_dataset(batches: Iterable["pa.RecordBatch"], target: Path) -> int:
+    """
+    Write record batches to a year-partitioned Parquet dataset.
+
+    Each year partition gets a single file with one row group per batch.
+    The dataset is written to a sibling staging directory and swapped into
+    place afterwards, so readers never observe a half-written snapshot.
+
+    Args:
+        batches: Record batches sharing one schema
+        target: Final dataset directory
+
+    Returns:
+        int: Number of rows written
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = target.with_name(f".{target.name}.staging-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+
+    writers = {}
+    row_count = 0
+    try:
+        for batch in batches:
+            table = pa.Table.from_batches([batch])
+            years = table.column(PARTITION_COLUMN)
+            data = table.drop_columns([PARTITION_COLUMN])
+
+            for year in pc.unique(years).to_pylist():
+                mask = pc.is_null(years) if year is None else pc.equal(years, year)
+                part = data.filter(mask)
+
+                if year not in writers:
+                    part_dir = staging / f"{PARTITION_COLUMN}={year or NULL_PARTITION}"
+                    part_dir.mkdir(parents=True, exist_ok=True)
+                    writers[year] = pq.ParquetWriter(
+                        str(part_dir / "part-0.parquet"),
+                        part.schema,
+                        compression=SNAPSHOT_COMPRESSION
+                    )
+                writers[year].write_table(part)
+
+            row_count += batch.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    if not writers:
+        # Nothing to write; drop any stale snapshot so readers fall back to SQLite
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.rmtree(target, ignore_errors=True)
+        return 0
+
+    # Swap the new snapshot into place. Files already memory-mapped by a
+    # reader stay valid after the old directory is removed.
+    previous = target.with_name(f".{target.name}.previous-{os.getpid()}")
+    if target.exists():
+        os.replace(target, previous)
+    os.replace(staging, target)
+    shutil.rmtree(previous, ignore_errors=True)
+
+    return row_count
+
+
+def write_snapshots(
+    names: Optional[List[str]] = None,
+    batch_size: int = SNAPSHOT_BATCH_SIZE
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Write Parquet snapshots of the final tables.
+
+    Args:
+        names: Snapshot names to write. If None, writes all of SNAPSHOT_QUERIES.
+        batch_size: Rows fetched from SQLite per record batch
+
+    Returns:
+        dict: Per-snapshot row counts and paths, keyed by snapshot name
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    if not snapshots_available():
+        raise RuntimeError("pyarrow is required to write table snapshots")
+
+    stats = {}
+    for name in names or list(SNAPSHOT_QUERIES):
+        target = SNAPSHOT_DIR / name
+        rows = _write_dataset(
+            _iter_record_batches(SNAPSHOT_QUERIES[name], batch_size),
+            target
+        )
+        stats[name] = {"rows": rows, "path": str(target)}
+        logger.info(f"Wrote snapshot '{name}' ({rows} rows) to {target}")
+
+    return stats
+
+
+def load_snapshot(
+    name: str,
+    years: Optional[List[Any]] = None,
+    columns: Optional[List[str]] = None
+) -> Optional["pa.Table"]:
+    """
+    Load a table snapshot, memory-mapping the underlying Parquet files.
+
+    Args:
+        name: Snapshot name (e.g. 'permits' or 'permit_rollups')
+        years: Only read these year partitions. If None, reads all years.
+        columns: Only read these columns. If None, reads all columns.
+
+    Returns:
+        pyarrow.Table: The snapshot, or None if it doesn't exist or pyarrow
+        is not installed
+    """
+    path = SNAPSHOT_DIR / name
+    if not snapshots_available() or not path.exists():
+        return None
+
+    filters = None
+    if years:
+        filters = [(PARTITION_COLUMN, "in", [str(y) for y in years])]
+
+    return pq.read_table(
+        str(path),
+        columns=columns,
+        filters=filters,
+        partitioning=_partitioning(),
+        memory_map=True,
+    )
@@ -0,0 +1,335 @@
+"""
+Data quality validation for staged ETL data.
+
+Validation runs between import and transform. Each batch is checked with
+vectorized pandas column operations (null rates, date ranges, valuation
+outliers, unknown statuses and departments) and the results are folded into
+a per-run quality report that is stored in ``job_runs.details``.
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from db.connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Rows validated per batch when scanning a staging table
+VALIDATION_BATCH_SIZE = int(os.getenv("ETL_BATCH_SIZE", "50000"))
+
+# Tables validated when none are given. The import currently lands rows
+# directly in the permits table.
+STAGING_TABLES = ["permits"]
+
+# Columns that must be populated on every row
+REQUIRED_COLUMNS = ["permit_number"]
+
+# Highest acceptable null rate for a required column before the run fails
+MAX_REQUIRED_NULL_RATE = 0.01
+
+# Columns parsed as dates, and the earliest plausible value
+DATE_COLUMNS = ["date_status", "date_filed", "date_issued", "date_completed"]
+MIN_VALID_DATE = pd.Timestamp("1900-01-01")
+
+# Valuations outside Q1 - k*IQR .. Q3 + k*IQR of their batch are outliers
+VALUATION_COLUMN = "valuation"
+OUTLIER_IQR_FACTOR = 3.0
+
+# Known code values; anything else is reported as unknown
+KNOWN_STATUSES = {
+    "Approved", "Pending", "Rejected", "In Review", "Draft", "Issued", "Denied"
+}
+KNOWN_DEPARTMENTS = {"Building", "Planning", "Fire", "Public Works", "Zoning"}
+
+# Number of distinct unknown values kept in the report per column
+MAX_UNKNOWN_VALUES = 20
+
+
+def _distinct_counts(values: pd.Series):
+    """
+    Factorize a column into its distinct values and their frequencies.
+
+    Returns:
+        tuple: (distinct values as a Series, count per distinct value, null count)
+    """
+    codes, uniques = pd.factorize(values)
+    present = codes[codes >= 0]
+    counts = np.bincount(present, minlength=len(uniques))
+    return pd.Series(uniques, dtype=object), counts, len(codes) - len(present)
+
+
+class DataQualityValidator:
+    """Accumulates data quality metrics over batches of staged rows."""
+
+    def __init__(self, source: str = "permits"):
+        """
+        Initialize an empty validator.
+
+        Args:
+            source: Name of the table or source being validated
+        """
+        self.source = source
+        self.rows = 0
+        self.columns_seen = set()
+        self.null_counts = Counter()
+        self.dates = {}
+        self.valuation = {
+            "count": 0, "sum": 0.0, "min": None, "max": None,
+            "non_numeric": 0, "negative": 0, "outliers": 0
+        }
+        self.unknown_statuses = Counter()
+        self.unknown_departments = Counter()
+        # Seconds spent in update(), to keep an eye on validation overhead
+        self.elapsed = 0.0
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Fold one batch of rows into the running metrics.
+
+        Date and code columns have few distinct values, so they are
+        factorized once and every check runs on the distinct values
+        weighted by their counts rather than on every row.
+
+        Args:
+            df: Batch of staged rows
+        """
+        if df.empty:
+            return
+
+        start = time.perf_counter()
+        self.rows += len(df)
+        self.columns_seen.update(df.columns)
+
+        for column in df.columns:
+            values = df[column]
+
+            if column in DATE_COLUMNS or column in ("status", "action_by_dept"):
+                uniques, counts, nulls = _distinct_counts(values)
+                self.null_counts[column] += nulls + int(counts[uniques == ""].sum())
+
+                if column in DATE_COLUMNS:
+                    self._check_dates(column, uniques, counts)
+                elif column == "status":
+                    self._count_unknown(uniques, counts, KNOWN_STATUSES, self.unknown_statuses)
+                else:
+                    self._count_unknown(uniques, counts, KNOWN_DEPARTMENTS, self.unknown_departments)
+                continue
+
+            nulls = int(values.isna().sum())
+            if values.dtype == object:
+                nulls += int((values.to_numpy() == "").sum())
+            self.null_counts[column] += nulls
+
+            if column == VALUATION_COLUMN:
+                self._check_valuation(values)
+
+        self.elapsed += time.perf_counter() - start
+
+    def _check_dates(self, column: str, uniques: pd.Series, counts: np.ndarray) -> None:
+        """Track the date range and count unparseable or implausible dates."""
+        parsed = pd.to_datetime(uniques, errors="coerce", format="ISO8601")
+        stats = self.dates.setdefault(
+            column, {"min": None, "max": None, "invalid": 0, "out_of_range": 0}
+        )
+
+        invalid = parsed.isna() & (uniques != "")
+        out_of_range = (parsed < MIN_VALID_DATE) | (parsed > pd.Timestamp.now())
+        stats["invalid"] += int(counts[invalid.to_numpy()].sum())
+        stats["out_of_range"] += int(counts[out_of_range.to_numpy()].sum())
+
+        batch_min, batch_max = parsed.min(), parsed.max()
+        if pd.notna(batch_min):
+            stats["min"] = batch_min if stats["min"] is None else min(stats["min"], batch_min)
+            stats["max"] = batch_max if stats["max"] is None else max(stats["max"], batch_max)
+
+    def _check_valuation(self, values: pd.Series) -> None:
+        """Track valuation totals and count non-numeric, negative and outlier values."""
+        if pd.api.types.is_numeric_dtype(values):
+            numeric = values.astype(float)
+        else:
+            cleaned = values.astype("string").str.replace(r"[$,]", "", regex=True)
+            numeric = pd.to_numeric(cleaned, errors="coerce")
+            self.valuation["non_numeric"] += int((numeric.isna() & values.notna()).sum())
+
+        numeric = numeric.dropna()
+        if numeric.empty:
+            return
+
+        stats = self.valuation
+        stats["count"] += len(numeric)
+        stats["sum"] += float(numeric.sum())
+        stats["negative"] += int((numeric < 0).sum())
+        batch_min, batch_max = float(numeric.min()), float(numeric.max())
+        stats["min"] = batch_min if stats["min"] is None else min(stats["min"], batch_min)
+        stats["max"] = batch_max if stats["max"] is None else max(stats["max"], batch_max)
+
+        q1, q3 = numeric.quantile([0.25, 0.75])
+        spread = OUTLIER_IQR_FACTOR * (q3 - q1)
+        stats["outliers"] += int(((numeric < q1 - spread) | (numeric > q3 + spread)).sum())
+
+    @staticmethod
+    def _count_unknown(uniques: pd.Series, counts: np.ndarray, known: set, counter: Counter) -> None:
+        """Count values that are present but not in the known set."""
+        unknown = (~uniques.isin(known) & (uniques != "")).to_numpy()
+        if unknown.any():
+            counter.update(dict(zip(uniques[unknown], counts[unknown].tolist())))
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Build the quality report for everything seen so far.
+
+        Returns:
+            dict: JSON-serializable report with a 'passed' flag and a list
+            of human-readable issues
+        """
+        rows = self.rows
+        null_rates = {
+            column: round(self.null_counts[column] / rows, 4) if rows else 0.0
+            for column in sorted(self.columns_seen)
+        }
+
+        issues = []
+        passed = True
+        for column in REQUIRED_COLUMNS:
+            if rows and column not in self.columns_seen:
+                issues.append(f"Required column '{column}' is missing")
+                passed = False
+            elif null_rates.get(column, 0.0) > MAX_REQUIRED_NULL_RATE:
+                issues.append(
+                    f"Required column '{column}' is {null_rates[column]:.1%} null"
+                )
+                passed = False
+
+        dates = {}
+        for column, stats in self.dates.items():
+            dates[column] = {
+                "min": stats["min"].date().isoformat() if stats["min"] is not None else None,
+                "max": stats["max"].date().isoformat() if stats["max"] is not None else None,
+                "invalid": stats["invalid"],
+                "out_of_range": stats["out_of_range"],
+            }
+            if stats["invalid"] or stats["out_of_range"]:
+                issues.append(
+                    f"{column}: {stats['invalid']} unparseable, "
+                    f"{stats['out_of_range']} out of range"
+                )
+
+        valuation = dict(self.valuation)
+        count = valuation.pop("count")
+        valuation["mean"] = round(valuation.pop("sum") / count, 2) if count else None
+        if valuation["negative"] or valuation["outliers"] or valuation["non_numeric"]:
+            issues.append(
+                f"valuation: {valuation['non_numeric']} non-numeric, "
+                f"{valuation['negative']} negative, {valuation['outliers']} outliers"
+            )
+
+        if self.unknown_statuses:
+            issues.append(f"{sum(self.unknown_statuses.values())} rows with unknown status")
+        if self.unknown_departments:
+            issues.append(f"{sum(self.unknown_departments.values())} rows with unknown department")
+
+        return {
+            "source": self.source,
+            "rows": rows,
+            "passed": passed,
+            "issues": issues,
+            "null_rates": null_rates,
+            "dates": dates,
+            "valuation": valuation,
+            "unknown_statuses": dict(self.unknown_statuses.most_common(MAX_UNKNOWN_VALUES)),
+            "unknown_departments": dict(self.unknown_departments.most_common(MAX_UNKNOWN_VALUES)),
+        }
+
+
+def _validated_columns(conn, table: str) -> List[str]:
+    """Columns of a table that the validator has checks for."""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    checked = set(REQUIRED_COLUMNS) | set(DATE_COLUMNS) | {
+        VALUATION_COLUMN, "status", "action_by_dept"
+    }
+    return [column for column in columns if column in checked]
+
+
+def validate_batches(batches: Iterable[pd.DataFrame], source: str) -> Dict[str, Any]:
+    """
+    Validate an iterable of DataFrame batches.
+
+    Args:
+        batches: Batches of staged rows
+        source: Name of the table or source being validated
+
+    Returns:
+        dict: Quality report for the source
+    """
+    validator = DataQualityValidator(source)
+    for batch in batches:
+        validator.update(batch)
+    return validator.report()
+
+
+def summarize_reports(reports: Dict[str, Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    """
+    Combine per-table reports into the run-level quality report.
+
+    Args:
+        reports: Quality reports keyed by table or source name
+        duration: Seconds spent validating
+
+    Returns:
+        dict: Overall 'passed' flag, duration and the per-table reports
+    """
+    passed = all(report["passed"] for report in reports.values())
+    logger.info(
+        f"Validated {sum(r['rows'] for r in reports.values())} rows "
+        f"in {duration:.2f} seconds ({'passed' if passed else 'failed'})"
+    )
+
+    return {
+        "passed": passed,
+        "duration_seconds": round(duration, 3),
+        "checked_at": datetime.utcnow().isoformat(),
+        "tables": reports,
+    }
+
+
+def validate_staging_data(
+    tables: Optional[List[str]] = None,
+    batch_size: int = VALIDATION_BATCH_SIZE
+) -> Dict[str, Any]:
+    """
+    Validate staged tables batch by batch.
+
+    Only the columns the validator checks are read, so the scan stays
+    narrow even on wide staging tables.
+
+    Args:
+        tables: Tables to validate. If None, validates STAGING_TABLES.
+        batch_size: Rows per batch
+
+    Returns:
+        dict: Overall 'passed' flag, duration and a report per table
+    """
+    start = time.perf_counter()
+    reports = {}
+
+    with get_connection() as conn:
+        for table in tables or STAGING_TABLES:
+            columns = _validated_columns(conn, table)
+            if not columns:
+                reports[table] = DataQualityValidator(table).report()
+                continue
+
+            query = f"SELECT {', '.join(columns)} FROM {table}"
+            reports[table] = validate_batches(
+                pd.read_sql_query(query, conn, chunksize=batch_size),
+                source=table
+            )
+
+    return summarize_reports(reports, time.perf_counter() - start)
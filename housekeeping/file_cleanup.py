@@ -10,6 +10,8 @@ import time
 from pathlib import Path
 from typing import List
 
+from components.export_utils import SHARED_EXPORT_DIR_NAME, export_mtime
+
 # Default export directory (relative to project root)
 EXPORT_DIR = Path("static/exports")
 
@@ -39,12 +41,14 @@ def delete_old_files(path: Path, days: int) -> List[str]:
     # Iterate through all items in the directory
     for item in path.iterdir():
         try:
-            # Check if item is a file and older than cutoff
-            if item.is_file() and item.stat().st_mtime < cutoff:
+            # Check if item is a file and older than cutoff; exports handed out
+            # as hardlinks are dated by their sidecar (see export_mtime)
+            if item.is_file() and export_mtime(item) < cutoff:
                 item.unlink()
                 deleted.append(str(item.relative_to(path)))
-            # If it's a directory, recurse into it
-            elif item.is_dir():
+            # If it's a directory, recurse into it; shared exports are only
+            # removed once unreferenced, by cleanup_old_exports
+            elif item.is_dir() and item.name != SHARED_EXPORT_DIR_NAME:
                 deleted.extend(delete_old_files(item, days))
         except Exception as e:
             print(f"[CLEANUP] Error processing {item}: {e}")
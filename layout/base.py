@@ -1,6 +1,7 @@
 from dash import dcc, html
 import dash_bootstrap_components as dbc
 from layout.sidebar import build_sidebar
+from layout.layout_manager import build_visibility_stores, build_layout_persistence_stores
 
 # Import for type hints
 from typing import Dict, Any, Optional
@@ -9,11 +10,29 @@ def serve_layout():
     """
     Main layout container for the dashboard.
     Includes user session management and the main content structure.
+    
+    Called on every page load. The filter options are read from a cache
+    keyed on the data generation, so this doesn't touch the database.
     """
     return dbc.Container([
         # Store user session data
         dcc.Store(id="current-user", storage_type='session'),
         
+        # Random ID of this browser session, set clientside; used to cancel
+        # superseded requests
+        dcc.Store(id="session-id", storage_type='session'),
+        
+        # Width of the trend chart in pixels, measured in the browser
+        dcc.Store(id="trend-chart-width"),
+        
+        # Whether each dashboard component is on screen, checked in the
+        # browser; data callbacks only fill visible components
+        *build_visibility_stores(),
+        
+        # Grid layout changes, buffered and debounced in the browser before
+        # they are saved
+        *build_layout_persistence_stores(),
+        
         # URL routing
         dcc.Location(id="url", refresh=False),
         
@@ -1,60 +1,225 @@
 """
 Layout manager for loading and saving dashboard layouts.
+
+Components are described by factories rather than built up front: only the
+components in the user's layout are constructed, as lightweight placeholders
+that the data callbacks fill once the component is visible. Built layouts
+are cached per user until a layout is saved or reset.
 """
+import logging
 from typing import List, Dict, Any, Optional
-from db.queries import get_user_layout, save_user_layout, get_default_layout
+from dash import dcc
+from cache.generation import get_layout_generation, bump_layout_generation
+from cache.memory import LRUCache
+from db.queries import (
+    get_user_layout, save_user_layout, get_default_layout, get_user_layout_version,
+    delete_user_layout, bump_user_layout_version, LAYOUT_FIELDS
+)
 from components.draggable import create_draggable_grid, create_dashboard_component
 from components.kpis import get_kpi_placeholders
 from components.charts import build_trend_chart, build_status_chart
 from components.datatable import build_permit_table
 
 
+logger = logging.getLogger(__name__)
+
+# Polling interval in milliseconds of the browser-side visibility check
+VISIBILITY_POLL_MS = 250
+
+# Grid layout changes are committed once the grid has been left alone for
+# LAYOUT_COMMIT_DELAY_TICKS ticks of LAYOUT_COMMIT_TICK_MS milliseconds
+LAYOUT_COMMIT_TICK_MS = 500
+LAYOUT_COMMIT_DELAY_TICKS = 3
+
+# Built layouts keyed by user ID, stored with the layout generation they
+# were last checked against; the results are shared between requests and
+# must be treated as read-only
+_layout_cache = LRUCache(max_entries=512)
+
+
 def get_layout_components() -> Dict[str, Dict[str, Any]]:
     """
     Define all available dashboard components with their metadata.
     
+    Each component has a ``factory`` that builds its placeholder content;
+    nothing is constructed until a layout uses the component.
+    
     Returns:
         dict: Dictionary of component metadata keyed by component ID
     """
     return {
         "kpi-1": {
             "title": "Key Performance Indicators",
-            "component": get_kpi_placeholders(),
+            "factory": get_kpi_placeholders,
             "width": 12,
             "height": 2,
             "className": "bg-light"
         },
         "chart-trend": {
             "title": "Permit Trends Over Time",
-            "component": build_trend_chart([]),
+            "factory": lambda: build_trend_chart([]),
             "width": 6,
             "height": 3
         },
         "chart-status": {
             "title": "Status Distribution",
-            "component": build_status_chart([]),
+            "factory": lambda: build_status_chart([]),
             "width": 6,
             "height": 3
         },
         "table-permits": {
             "title": "Permit Details",
-            "component": build_permit_table([]),
+            "factory": lambda: build_permit_table([]),
             "width": 12,
             "height": 4
         }
     }
 
 
+def visibility_store_id(component_id: str) -> str:
+    """
+    Get the ID of the Store holding a component's visibility.
+    
+    Args:
+        component_id: Dashboard component ID (e.g. 'chart-trend')
+        
+    Returns:
+        str: ID of the Store, set in the browser to True while the
+        component's card is on screen
+    """
+    return f"visible-{component_id}"
+
+
+def build_visibility_stores() -> List[Any]:
+    """
+    Build the visibility Stores of all dashboard components.
+    
+    They live outside the grid, so they exist whichever components the
+    user's layout contains.
+    
+    Returns:
+        list: A Store per component and the Interval that polls visibility
+    """
+    stores = [
+        dcc.Store(id=visibility_store_id(component_id), data=False)
+        for component_id in get_layout_components()
+    ]
+    stores.append(dcc.Interval(id="visibility-poll", interval=VISIBILITY_POLL_MS))
+    return stores
+
+
+def invalidate_layout_cache(user_id: Optional[str] = None) -> None:
+    """
+    Invalidate cached layout builds after a layout change.
+    
+    The layout generation is shared by all worker processes, so every
+    process notices the change on its next request. Only the changed
+    user's build is rebuilt: other users' builds are kept once their
+    layout version is found unchanged.
+    
+    Args:
+        user_id: User whose layout changed (for logging only)
+    """
+    generation = bump_layout_generation()
+    logger.debug(f"Layout cache invalidated for {user_id or 'all users'} (generation {generation})")
+
+
+def invalidate_user_layout(user_id: str) -> int:
+    """
+    Rebuild a user's layout after a change made outside their own saves.
+    
+    Cached builds are only dropped when the user's layout version moved,
+    so the version is bumped before the layout generation.
+    
+    Args:
+        user_id: User whose layout was overridden
+        
+    Returns:
+        int: The user's new layout version
+    """
+    version = bump_user_layout_version(user_id)
+    invalidate_layout_cache(user_id)
+    return version
+
+
+def build_layout_persistence_stores() -> List[Any]:
+    """
+    Build the Stores that buffer grid layout changes in the browser.
+    
+    Drag and resize steps only update ``layout-buffer``. Once the grid has
+    been quiet for a while, the buffered layout is copied to
+    ``layout-pending``, which is the only one the server listens to.
+    ``layout-saved`` holds the last saved layout and its version.
+    
+    Returns:
+        list: The Stores and the Interval driving the debounce
+    """
+    return [
+        dcc.Store(id="layout-buffer"),
+        dcc.Store(id="layout-debounce"),
+        dcc.Store(id="layout-pending"),
+        dcc.Store(id="layout-saved"),
+        dcc.Interval(id="layout-commit-timer", interval=LAYOUT_COMMIT_TICK_MS),
+    ]
+
+
+def normalize_layout(layout: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Reduce grid layout items to their persisted fields, ordered by ID.
+    
+    Args:
+        layout: Layout items as reported by the grid
+        
+    Returns:
+        list: Items with only i, x, y, w and h
+    """
+    items = [
+        {"i": item["i"], **{k: item[k] for k in LAYOUT_FIELDS}}
+        for item in layout or []
+        if all(k in item for k in ("i",) + LAYOUT_FIELDS)
+    ]
+    return sorted(items, key=lambda item: item["i"])
+
+
 def build_dashboard_layout(user_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Build the dashboard layout for a specific user.
     
+    Builds are cached per user, so page navigation neither queries the
+    saved layout nor rebuilds the components until the layout changes.
+    After any layout change (a new layout generation), a cached build is
+    kept if the user's own layout version is still the one it was built
+    from.
+    
     Args:
         user_id: Optional user ID to load saved layout for
         
     Returns:
         dict: Dictionary containing the layout and components
     """
+    layout_generation = get_layout_generation()
+    entry = _layout_cache.get(user_id)
+    if entry is not None:
+        checked_generation, result = entry
+        if checked_generation == layout_generation:
+            return result
+        # Some layout changed; only rebuild if it was this user's
+        current = get_user_layout_version(user_id) if user_id else 0
+        if result["version"] == current:
+            _layout_cache.set(user_id, (layout_generation, result))
+            return result
+    
+    result = _build_dashboard_layout(user_id)
+    _layout_cache.set(user_id, (layout_generation, result))
+    return result
+
+
+def _build_dashboard_layout(user_id: Optional[str]) -> Dict[str, Any]:
+    """Build the dashboard layout for a user without the cache."""
+    # Read before the layout: a save in between leaves an outdated version,
+    # which makes the next build read the layout again
+    version = get_user_layout_version(user_id) if user_id else 0
+    
     # Get saved layout or default layout
     saved_layout = get_user_layout(user_id) if user_id else []
     default_layout = get_default_layout()
@@ -78,7 +243,7 @@ def build_dashboard_layout(user_id: Optional[str] = None) -> Dict[str, Any]:
             component = create_dashboard_component(
                 component_id=component_id,
                 title=component_data["title"],
-                content=component_data["component"],
+                content=component_data["factory"](),
                 width=item.get("w", component_data.get("width", 6)),
                 height=item.get("h", component_data.get("height", 4)),
                 className=component_data.get("className", "")
@@ -101,7 +266,8 @@ def build_dashboard_layout(user_id: Optional[str] = None) -> Dict[str, Any]:
     return {
         "layout": layout_items,
         "components": component_instances,
-        "is_default": not bool(saved_layout)
+        "is_default": not bool(saved_layout),
+        "version": version
     }
 
 def save_dashboard_layout(user_id: str, layout: List[Dict[str, Any]]) -> bool:
@@ -120,11 +286,38 @@ def save_dashboard_layout(user_id: str, layout: List[Dict[str, Any]]) -> bool:
     
     try:
         save_user_layout(user_id, layout)
+        invalidate_layout_cache(user_id)
         return True
     except Exception as e:
         print(f"Error saving layout: {e}")
         return False
 
+
+def commit_dashboard_layout(
+    user_id: str,
+    layout: List[Dict[str, Any]],
+    expected_version: Optional[int]
+) -> int:
+    """
+    Persist grid layout changes as a diff against the saved layout.
+    
+    Args:
+        user_id: User ID to save layout for
+        layout: Current grid layout
+        expected_version: Version of the saved layout the changes are based on
+        
+    Returns:
+        int: The layout version after the save
+        
+    Raises:
+        LayoutConflictError: If the layout was changed elsewhere since
+            expected_version
+    """
+    version = save_user_layout(user_id, layout, expected_version)
+    if version != expected_version:
+        invalidate_layout_cache(user_id)
+    return version
+
 def reset_dashboard_layout(user_id: str) -> bool:
     """
     Reset the dashboard layout to default for a user.
@@ -140,10 +333,8 @@ def reset_dashboard_layout(user_id: str) -> bool:
     
     try:
         # Delete the user's layout to fall back to default
-        from db.connection import get_connection
-        with get_connection() as conn:
-            conn.execute("DELETE FROM user_layouts WHERE user_id = ?", (user_id,))
-            conn.commit()
+        delete_user_layout(user_id)
+        invalidate_layout_cache(user_id)
         return True
     except Exception as e:
         print(f"Error resetting layout: {e}")
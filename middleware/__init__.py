@@ -0,0 +1,6 @@
+"""
+HTTP middleware for the Permit Dashboard application.
+
+This package contains request/response hooks installed on the Flask server
+behind the Dash app.
+"""
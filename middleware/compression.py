@@ -0,0 +1,246 @@
+"""
+Response compression for the Dash server.
+
+Text responses (callback payloads, JavaScript, CSS, CSV) are compressed with
+brotli or gzip, whichever the client prefers; brotli is only offered when
+the optional ``brotli`` package is installed. Small responses are sent
+as-is, streamed responses are compressed chunk by chunk without buffering
+the body, and compressed static files are kept in memory so each bundle is
+compressed once per process. Export files can be stored with ``.br``/``.gz``
+siblings that are served instead of compressing on every download.
+"""
+import gzip
+import logging
+import mimetypes
+import os
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from flask import Flask, Response, request, send_from_directory
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from cache.memory import LRUCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Responses smaller than this many bytes are not worth compressing
+MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+# Levels for responses compressed per request; fast rather than smallest
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Levels for static files and precompressed exports, compressed only once
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+# Set to True to write compressed siblings of CSV exports
+PRECOMPRESS_EXPORTS = os.getenv("PRECOMPRESS_EXPORTS", "False").lower() in ("true", "1", "yes")
+
+# Content types that compress well
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+# URL prefixes of immutable static files whose compressed bodies are cached
+STATIC_PREFIXES = ("/_dash-component-suites/", "/assets/")
+
+# File suffix of each precompressed variant
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+_static_cache = LRUCache(max_entries=64)
+
+
+def available_encodings() -> List[str]:
+    """
+    Get the supported content codings, most preferred first.
+
+    Returns:
+        list: 'br' (if brotli is installed) and 'gzip'
+    """
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the content coding for an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Value of the request's Accept-Encoding header
+
+    Returns:
+        str: 'br' or 'gzip', or None if the client accepts neither
+    """
+    accepted = parse_accept_header(accept_encoding or "", Accept)
+    return accepted.best_match(available_encodings())
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """
+    Compress a complete body.
+
+    Args:
+        data: Uncompressed bytes
+        encoding: 'br' or 'gzip'
+        static: Use the slower, stronger levels meant for files compressed once
+
+    Returns:
+        bytes: Compressed bytes
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Compress a body chunk by chunk.
+
+    Args:
+        chunks: Uncompressed chunks
+        encoding: 'br' or 'gzip'
+
+    Yields:
+        bytes: Compressed chunks
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, finish = compressor.process, compressor.finish
+    else:
+        # wbits=31 writes a gzip header and trailer
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def _is_compressible(response: Response) -> bool:
+    """Check whether a response's content type compresses well."""
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def _compress_response(response: Response) -> Response:
+    """Compress the response if the client accepts it and it is worth it."""
+    if (
+        request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or "Content-Encoding" in response.headers
+        or not _is_compressible(response)
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding is None:
+        return response
+
+    length = response.content_length
+    if length is not None and length < MIN_SIZE:
+        return response
+
+    if request.path.startswith(STATIC_PREFIXES) and length is not None:
+        # Static files are sent as file passthroughs; the same path, size
+        # and modification time means the same file, compressed only once
+        key = (request.full_path, encoding, length, response.last_modified, response.get_etag()[0])
+        compressed = _static_cache.get(key)
+        if compressed is None:
+            response.direct_passthrough = False
+            compressed = compress(response.get_data(), encoding, static=True)
+            _static_cache.set(key, compressed)
+        elif hasattr(response.response, "close"):
+            response.response.close()
+        response.direct_passthrough = False
+        response.set_data(compressed)
+    elif response.is_streamed or response.direct_passthrough:
+        response.response = compress_stream(response.iter_encoded(), encoding)
+        response.direct_passthrough = False
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            return response
+        response.set_data(compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    # The ETag names the uncompressed representation; weak keeps it valid
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def precompress_file(path: str) -> List[str]:
+    """
+    Write compressed siblings (``.br``, ``.gz``) of a file.
+
+    Args:
+        path: File to compress
+
+    Returns:
+        list: Paths of the compressed variants written
+    """
+    source = Path(path)
+    data = source.read_bytes()
+    written = []
+    for encoding in available_encodings():
+        target = source.with_name(source.name + ENCODING_SUFFIXES[encoding])
+        target.write_bytes(compress(data, encoding, static=True))
+        written.append(str(target))
+    return written
+
+
+def send_precompressed(directory: str, filename: str, **kwargs) -> Response:
+    """
+    Send a file, using a precompressed sibling if the client accepts it.
+
+    Args:
+        directory: Directory containing the file
+        filename: Name of the file within the directory
+        **kwargs: Passed on to send_from_directory
+
+    Returns:
+        Response: The file response
+    """
+    source = Path(directory) / filename
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding and source.exists():
+        variant = source.with_name(source.name + ENCODING_SUFFIXES[encoding])
+        if variant.exists() and variant.stat().st_mtime >= source.stat().st_mtime:
+            kwargs.setdefault("download_name", filename)
+            kwargs.setdefault("mimetype", mimetypes.guess_type(filename)[0])
+            response = send_from_directory(directory, variant.name, **kwargs)
+            response.headers["Content-Encoding"] = encoding
+            response.vary.add("Accept-Encoding")
+            return response
+
+    return send_from_directory(directory, filename, **kwargs)
+
+
+def init_compression(server: Flask) -> None:
+    """
+    Install response compression on the Flask server.
+
+    Flask runs after-request hooks in reverse order of installation, so
+    install this before any hook that changes the response body or headers.
+
+    Args:
+        server: Flask server behind the Dash app
+    """
+    server.after_request(_compress_response)
+    logger.info(f"Response compression enabled ({', '.join(available_encodings())})")
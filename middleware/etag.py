@@ -0,0 +1,124 @@
+"""
+Conditional (ETag) caching of read-only Dash callback responses.
+
+The output of a read-only callback depends only on its inputs, on which of
+them triggered it (callbacks branch on ``ctx.triggered_id``) and on the data
+generation, so the ETag of a ``_dash-update-component`` response is derived
+from exactly those. A request carrying a matching ``If-None-Match``
+header gets ``304 Not Modified`` before the callback runs.
+
+Dash sends callback requests as POSTs, which browsers never revalidate on
+their own; ``assets/etag_cache.js`` keeps the last response per request
+body, sends its ETag back and replays the stored body on a 304.
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from flask import Flask, Response, g, request
+
+from cache.generation import get_data_generation
+
+logger = logging.getLogger(__name__)
+
+# Dash callback endpoint
+UPDATE_COMPONENT_PATH = "_dash-update-component"
+
+# Output ids (as sent by the Dash renderer) of callbacks whose response only
+# depends on their inputs and the data generation
+READ_ONLY_OUTPUTS = {
+    "kpi-totals.data",
+    "permit-trend-chart.figure",
+    "status-bar-chart.figure",
+    "..permit-table.data...permit-table.page_count...permit-table.page_current...permit-table-empty.style..",
+}
+
+# Inputs and states that don't affect a callback's output. The session ID
+# only identifies the browser for request cancellation.
+IGNORED_PROPS = {"session-id.data"}
+
+# Responses must be revalidated on every use; they may differ per user
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(payload: Dict[str, Any], generation: Optional[int] = None) -> Optional[str]:
+    """
+    Compute the ETag for a callback request.
+
+    Args:
+        payload: Decoded ``_dash-update-component`` request body
+        generation: Data generation (default: the current one)
+
+    Returns:
+        str: ETag value (unquoted), or None if the callback is not read-only
+    """
+    output = payload.get("output")
+    if output not in READ_ONLY_OUTPUTS:
+        return None
+
+    values = [
+        (item.get("id"), item.get("property"), item.get("value"))
+        for item in (payload.get("inputs") or []) + (payload.get("state") or [])
+        if isinstance(item, dict)
+        and f"{item.get('id')}.{item.get('property')}" not in IGNORED_PROPS
+    ]
+    changed = sorted(
+        str(prop_id) for prop_id in payload.get("changedPropIds") or []
+        if prop_id not in IGNORED_PROPS
+    )
+    if generation is None:
+        generation = get_data_generation()
+
+    key = json.dumps([output, values, changed, generation], sort_keys=True, default=str)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _is_callback_request() -> bool:
+    """Check whether the current request is a Dash callback request."""
+    return request.method == "POST" and request.path.endswith(UPDATE_COMPONENT_PATH)
+
+
+def _check_not_modified() -> Optional[Response]:
+    """Answer 304 if the client already has the response for this request."""
+    if not _is_callback_request():
+        return None
+
+    # Parsed once: Flask caches the body, and Dash's dispatch reuses it
+    payload = request.get_json(silent=True, cache=True)
+    etag = compute_etag(payload) if isinstance(payload, dict) else None
+    if etag is None:
+        return None
+
+    g.callback_etag = etag
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        return response
+    return None
+
+
+def _add_etag(response: Response) -> Response:
+    """Tag successful read-only callback responses with their ETag."""
+    etag = g.pop("callback_etag", None)
+    if etag and response.status_code == 200:
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def init_etag_caching(server: Flask, outputs: Optional[Iterable[str]] = None) -> None:
+    """
+    Install conditional caching of read-only callback responses.
+
+    Args:
+        server: Flask server behind the Dash app
+        outputs: Additional read-only output ids
+    """
+    if outputs:
+        READ_ONLY_OUTPUTS.update(outputs)
+
+    server.before_request(_check_not_modified)
+    server.after_request(_add_etag)
+    logger.info(f"ETag caching enabled for {len(READ_ONLY_OUTPUTS)} callback outputs")
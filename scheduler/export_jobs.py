@@ -0,0 +1,692 @@
+"""
+Background export jobs.
+
+Exports are queued in the ``export_jobs`` table and generated by a bounded
+pool of worker processes, so large files never tie up a Dash request
+thread and at most EXPORT_WORKERS exports run at once. Workers record the
+rows and bytes written in the job row, which the dashboard polls for
+progress and completion, and stop at the next chunk once a job is
+cancelled.
+
+The cap applies per web process; jobs queued beyond it wait in the table
+and survive restarts. A running job records the process that owns it, which
+refreshes the job's heartbeat while the worker runs; recover_export_jobs
+only requeues jobs whose owner is gone, so web processes starting next to
+live ones leave their jobs alone.
+
+Each job has a content key, a hash of everything its file depends on: the
+query, filters, masked columns, format and data generation (plus title and
+user for PDF reports). Completed files are shared under that key, and a
+request matching a shared file completes at once with a hardlink to it
+instead of being generated again.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from db.connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Exports generated at the same time by one web process
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+
+# Workers write progress (and check for cancellation) at most this often,
+# waiting this long for a write lock
+PROGRESS_EVERY_SECONDS = 1.0
+PROGRESS_BUSY_TIMEOUT_MS = 100
+
+# Owners refresh the heartbeat of their running jobs this often; a job
+# whose heartbeat is older than the stale limit has lost its owner
+HEARTBEAT_SECONDS = 15
+HEARTBEAT_STALE_SECONDS = 4 * HEARTBEAT_SECONDS
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS export_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    format TEXT NOT NULL,
+    base_name TEXT NOT NULL,
+    filters TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued',
+    total_rows INTEGER,
+    rows_written INTEGER NOT NULL DEFAULT 0,
+    bytes_written INTEGER NOT NULL DEFAULT 0,
+    file_path TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    content_key TEXT,
+    owner TEXT,
+    heartbeat_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_export_jobs_status ON export_jobs (status, id);
+"""
+
+# Columns added after the table was first released
+ADDED_COLUMNS = {"content_key": "TEXT", "owner": "TEXT", "heartbeat_at": "TEXT"}
+
+CREATE_CONTENT_KEY_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_export_jobs_content_key ON export_jobs (content_key, status);
+"""
+
+# File extension of each export format
+EXPORT_EXTENSIONS = {
+    "csv": "csv", "excel": "xlsx", "pdf": "pdf", "zip": "zip",
+    "parquet": "parquet", "arrow": "arrow",
+}
+
+JOB_COLUMNS = [
+    "id", "user_id", "role", "format", "base_name", "filters", "status",
+    "total_rows", "rows_written", "bytes_written", "file_path", "error",
+    "cancel_requested", "created_at", "started_at", "finished_at", "content_key",
+    "owner", "heartbeat_at",
+]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_active = set()
+_dispatch_lock = threading.Lock()
+_heartbeat: Optional[threading.Thread] = None
+
+
+class ExportCancelled(Exception):
+    """Raised in a worker when its job has been cancelled."""
+
+
+def _now() -> str:
+    """Timestamp stored in the job columns."""
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _ensure_table(conn) -> None:
+    """Create the export_jobs table if it doesn't exist yet."""
+    conn.executescript(CREATE_TABLE_SQL)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(export_jobs)")]
+    for column, column_type in ADDED_COLUMNS.items():
+        if column not in columns:
+            conn.execute(f"ALTER TABLE export_jobs ADD COLUMN {column} {column_type}")
+    conn.executescript(CREATE_CONTENT_KEY_INDEX_SQL)
+
+
+def _owner() -> str:
+    """Owner recorded on the jobs this process runs: host and process id."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_alive(owner: Optional[str], heartbeat_at: Optional[str]) -> bool:
+    """Whether a running job's owner may still be working on it."""
+    if not owner or not heartbeat_at:
+        return False
+    stale_before = (datetime.now() - timedelta(seconds=HEARTBEAT_STALE_SECONDS))
+    if heartbeat_at < stale_before.isoformat(timespec="seconds"):
+        return False
+
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        # Only the heartbeat tells about processes on other hosts
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (ValueError, PermissionError):
+        pass
+    return True
+
+
+def _row_to_job(row) -> Dict[str, Any]:
+    """Job dict from an export_jobs row."""
+    job = dict(zip(JOB_COLUMNS, row))
+    job["filters"] = json.loads(job["filters"] or "{}")
+    return job
+
+
+def _content_key(user_id: str, role: str, export_format: str, base_name: str,
+                 filters: Dict[str, Any]) -> str:
+    """Content key of an export; exports with the same key have the same file."""
+    from cache.generation import get_data_generation
+    from components.datatable import PERMIT_QUERY_COLUMNS
+    from components.export_utils import export_content_key, masked_columns
+    from db.queries import PERMIT_SELECT_SQL
+
+    parts = {
+        "query": PERMIT_SELECT_SQL,
+        "filters": {name: value or None for name, value in filters.items()},
+        "masked_columns": sorted(masked_columns(PERMIT_QUERY_COLUMNS, role)),
+        "format": export_format,
+        "generation": get_data_generation(),
+    }
+    if export_format in ("pdf", "zip"):
+        # PDF reports show their title and the user who exported them
+        parts.update(title=base_name, user_id=str(user_id))
+    return export_content_key(**parts)
+
+
+def _find_shared_job(conn, content_key: str, export_format: str) -> Optional[Dict[str, Any]]:
+    """Latest completed job with a content key, if its file is still shared."""
+    from components.export_utils import find_shared_export
+
+    shared_path = find_shared_export(content_key, EXPORT_EXTENSIONS[export_format])
+    if shared_path is None:
+        return None
+    row = conn.execute(
+        f"""
+        SELECT {', '.join(JOB_COLUMNS)} FROM export_jobs
+        WHERE content_key = ? AND status = ? ORDER BY id DESC LIMIT 1
+        """,
+        (content_key, COMPLETED)
+    ).fetchone()
+    if row is None:
+        return None
+    job = _row_to_job(row)
+    job["shared_path"] = shared_path
+    return job
+
+
+def submit_export_job(
+    user_id: str,
+    role: str,
+    export_format: str,
+    base_name: str,
+    filters: Dict[str, Any]
+) -> int:
+    """
+    Queue an export and start it if a worker is free.
+
+    If an identical export has been generated for the current data, the
+    job is completed at once with a hardlink to that file.
+
+    Args:
+        user_id: Owner of the export
+        role: Owner's role, which decides the masked columns
+        export_format: 'csv', 'excel', 'pdf', 'zip', 'parquet' or 'arrow'
+        base_name: Filename prefix
+        filters: Keyword arguments for db.queries.iter_permit_rows
+
+    Returns:
+        int: The job id
+    """
+    from components.export_utils import reuse_shared_export
+
+    content_key = _content_key(user_id, role, export_format, base_name, filters)
+    job = {
+        "user_id": str(user_id), "role": role, "format": export_format,
+        "base_name": base_name, "filters": filters, "status": QUEUED,
+        "total_rows": None, "rows_written": 0, "bytes_written": 0, "file_path": None,
+        "created_at": _now(), "started_at": None, "finished_at": None,
+        "content_key": content_key,
+    }
+
+    with get_connection() as conn:
+        _ensure_table(conn)
+        shared = _find_shared_job(conn, content_key, export_format)
+        if shared is not None:
+            try:
+                file_path = reuse_shared_export(shared["shared_path"], user_id, base_name)
+                job.update(
+                    status=COMPLETED, total_rows=shared["total_rows"],
+                    rows_written=shared["rows_written"], bytes_written=os.path.getsize(file_path),
+                    file_path=file_path, started_at=job["created_at"], finished_at=job["created_at"]
+                )
+            except OSError as e:
+                logger.warning(f"Could not reuse export of job {shared['id']}: {e}")
+
+        values = dict(job, filters=json.dumps(filters))
+        job_id = conn.execute(
+            f"""
+            INSERT INTO export_jobs ({', '.join(values)})
+            VALUES ({', '.join('?' * len(values))})
+            """,
+            list(values.values())
+        ).lastrowid
+        conn.commit()
+    job["id"] = job_id
+
+    if job["status"] == COMPLETED:
+        _log_completed(job, job["file_path"], job["rows_written"], reused_from=shared["id"])
+        logger.info(f"Export job {job_id} reused the file of job {shared['id']}")
+        return job_id
+
+    logger.info(f"Queued {export_format} export job {job_id} for user {user_id}")
+    _dispatch()
+    return job_id
+
+
+def get_export_job(job_id: int, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get an export job.
+
+    Args:
+        job_id: The job id
+        user_id: If given, only return the job if this user owns it
+
+    Returns:
+        dict: Job columns (filters decoded), or None if there is no such job
+    """
+    query = f"SELECT {', '.join(JOB_COLUMNS)} FROM export_jobs WHERE id = ?"
+    params = [job_id]
+    if user_id is not None:
+        query += " AND user_id = ?"
+        params.append(str(user_id))
+
+    with get_connection() as conn:
+        _ensure_table(conn)
+        row = conn.execute(query, params).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def cancel_export_job(job_id: int, user_id: str) -> bool:
+    """
+    Cancel a queued or running export.
+
+    Queued jobs are cancelled at once; running jobs stop at their next
+    progress check and remove their partial output.
+
+    Args:
+        job_id: The job id
+        user_id: The user asking; only the owner can cancel a job
+
+    Returns:
+        bool: True if the job was still queued or running
+    """
+    with get_connection() as conn:
+        _ensure_table(conn)
+        cancelled = conn.execute(
+            """
+            UPDATE export_jobs SET status = ?, finished_at = ?
+            WHERE id = ? AND user_id = ? AND status = ?
+            """,
+            (CANCELLED, _now(), job_id, str(user_id), QUEUED)
+        ).rowcount
+        requested = conn.execute(
+            """
+            UPDATE export_jobs SET cancel_requested = 1
+            WHERE id = ? AND user_id = ? AND status = ?
+            """,
+            (job_id, str(user_id), RUNNING)
+        ).rowcount
+        conn.commit()
+    return bool(cancelled or requested)
+
+
+def recover_export_jobs() -> int:
+    """
+    Requeue jobs left running by a stopped process and start queued jobs.
+
+    A running job is only requeued once its owner is gone: its heartbeat is
+    stale, or its owner is a process on this host that no longer exists.
+    Jobs of live processes, including other web workers, keep running.
+
+    Returns:
+        int: Number of jobs requeued
+    """
+    requeued = 0
+    with get_connection() as conn:
+        _ensure_table(conn)
+        running = conn.execute(
+            "SELECT id, owner, heartbeat_at FROM export_jobs WHERE status = ?", (RUNNING,)
+        ).fetchall()
+        for job_id, owner, heartbeat_at in running:
+            if _owner_alive(owner, heartbeat_at):
+                continue
+            # Guarded by the heartbeat read, in case the owner just wrote one
+            requeued += conn.execute(
+                """
+                UPDATE export_jobs
+                SET status = ?, rows_written = 0, bytes_written = 0, owner = NULL,
+                    heartbeat_at = NULL
+                WHERE id = ? AND status = ? AND heartbeat_at IS ?
+                """,
+                (QUEUED, job_id, RUNNING, heartbeat_at)
+            ).rowcount
+        conn.commit()
+
+    if requeued:
+        logger.info(f"Requeued {requeued} interrupted export jobs")
+    _dispatch()
+    return requeued
+
+
+def _claim_next_job() -> Optional[int]:
+    """Mark the oldest queued job as running and return its id."""
+    with get_connection() as conn:
+        _ensure_table(conn)
+        row = conn.execute(
+            """
+            UPDATE export_jobs SET status = ?, started_at = ?, owner = ?, heartbeat_at = ?
+            WHERE id = (
+                SELECT id FROM export_jobs WHERE status = ? ORDER BY id LIMIT 1
+            ) AND status = ?
+            RETURNING id
+            """,
+            (RUNNING, _now(), _owner(), _now(), QUEUED, QUEUED)
+        ).fetchone()
+        conn.commit()
+    return row[0] if row else None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """The worker pool, created on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=EXPORT_WORKERS)
+    return _pool
+
+
+def _beat() -> None:
+    """Refresh the heartbeat of this process's running jobs, forever."""
+    while True:
+        time.sleep(HEARTBEAT_SECONDS)
+        with _dispatch_lock:
+            active = sorted(_active)
+        if not active:
+            continue
+        try:
+            with get_connection() as conn:
+                conn.execute(
+                    f"""
+                    UPDATE export_jobs SET heartbeat_at = ?
+                    WHERE id IN ({', '.join('?' * len(active))}) AND status = ?
+                    """,
+                    [_now(), *active, RUNNING]
+                )
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"Failed to record export job heartbeat: {e}")
+
+
+def _start_heartbeat() -> None:
+    """Start the heartbeat thread of this process, once."""
+    global _heartbeat
+    if _heartbeat is None or not _heartbeat.is_alive():
+        _heartbeat = threading.Thread(target=_beat, name="export-heartbeat", daemon=True)
+        _heartbeat.start()
+
+
+def _dispatch() -> None:
+    """Hand queued jobs to the pool while it has free workers."""
+    from db import connection
+    from components import export_utils
+
+    _start_heartbeat()
+    with _dispatch_lock:
+        while len(_active) < EXPORT_WORKERS:
+            job_id = _claim_next_job()
+            if job_id is None:
+                break
+            _active.add(job_id)
+            future = _get_pool().submit(
+                run_export_job, job_id, connection.DB_PATH, str(export_utils.BASE_EXPORT_DIR)
+            )
+            future.add_done_callback(lambda f, job_id=job_id: _job_done(job_id, f))
+
+
+def _job_done(job_id: int, future: Future) -> None:
+    """Free the job's worker slot and start the next queued job."""
+    error = future.exception()
+    if error is not None:
+        # The worker died without recording an outcome
+        logger.error(f"Export job {job_id} crashed: {error}")
+        _finish(job_id, FAILED, error=str(error))
+
+    with _dispatch_lock:
+        _active.discard(job_id)
+    _dispatch()
+
+
+def _finish(job_id: int, status: str, **values: Any) -> None:
+    """Record a job's outcome, unless it already has one."""
+    assignments = ", ".join(f"{column} = ?" for column in values)
+    with get_connection() as conn:
+        conn.execute(
+            f"""
+            UPDATE export_jobs SET status = ?, finished_at = ?{', ' if values else ''}{assignments}
+            WHERE id = ? AND status = ?
+            """,
+            [status, _now(), *values.values(), job_id, RUNNING]
+        )
+        conn.commit()
+
+
+class _Progress:
+    """Rows and bytes written by a job, saved and checked periodically."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.rows = 0
+        self.bytes = 0
+        self._saved_at = 0.0
+
+    def track(self, chunks: Iterable[List[Any]]) -> Iterator[List[Any]]:
+        """Count the rows of each chunk, stopping if the job is cancelled."""
+        for rows in chunks:
+            yield rows
+            self.rows += len(rows)
+            self.save()
+
+    def watch(self, chunks: Iterable[List[Any]]) -> Iterator[List[Any]]:
+        """Pass chunks through, stopping if the job is cancelled, without counting rows."""
+        for rows in chunks:
+            yield rows
+            self.save()
+
+    def file_written(self, rows: int, nbytes: int) -> None:
+        """Progress callback for export_rows_to_csv and export_rows_to_arrow."""
+        self.bytes = nbytes
+
+    def zip_written(self, nbytes: int) -> None:
+        """Progress callback for export_members_to_zip."""
+        self.bytes = nbytes
+
+    def save(self, force: bool = False) -> None:
+        """Write progress to the job row and raise if it was cancelled."""
+        now = time.monotonic()
+        if not force and now - self._saved_at < PROGRESS_EVERY_SECONDS:
+            return
+        self._saved_at = now
+
+        with get_connection() as conn:
+            # Progress is best effort: without WAL, the job's own open read
+            # cursor can keep the database locked until the export is done
+            conn.execute(f"PRAGMA busy_timeout = {PROGRESS_BUSY_TIMEOUT_MS}")
+            try:
+                conn.execute(
+                    "UPDATE export_jobs SET rows_written = ?, bytes_written = ? WHERE id = ?",
+                    (self.rows, self.bytes, self.job_id)
+                )
+                conn.commit()
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                logger.debug(f"Skipped progress update of export job {self.job_id}: {e}")
+            cancelled = conn.execute(
+                "SELECT cancel_requested FROM export_jobs WHERE id = ?", (self.job_id,)
+            ).fetchone()[0]
+        if cancelled:
+            raise ExportCancelled(f"Export job {self.job_id} was cancelled")
+
+
+def _write_export(job: Dict[str, Any], progress: _Progress) -> str:
+    """
+    Generate a job's file.
+
+    Returns:
+        str: Path of the export
+    """
+    # Imported here: workers import this module before their setup runs
+    from components.datatable import PERMIT_QUERY_COLUMNS
+    from components.export_utils import (
+        ARROW_FORMATS, csv_member, export_members_to_zip, export_rows_to_arrow, export_rows_to_csv,
+        export_rows_to_excel, export_rows_to_pdf, pdf_member
+    )
+    from db.queries import iter_permit_rows
+
+    filters, user_id, role = job["filters"], job["user_id"], job["role"]
+    base_name, export_format = job["base_name"], job["format"]
+    title = f"{base_name.title()} Report"
+
+    def query():
+        # Runs the query when first read, not when the member is set up
+        yield from iter_permit_rows(**filters)
+
+    if export_format == "csv":
+        path, _ = export_rows_to_csv(
+            progress.track(iter_permit_rows(**filters)), PERMIT_QUERY_COLUMNS,
+            user_id, base_name, role, progress=progress.file_written
+        )
+        return path
+
+    if export_format == "excel":
+        path, _ = export_rows_to_excel(
+            progress.track(iter_permit_rows(**filters)), PERMIT_QUERY_COLUMNS,
+            user_id, base_name, role
+        )
+        return path
+
+    if export_format == "pdf":
+        path, _ = export_rows_to_pdf(
+            progress.track(iter_permit_rows(**filters)), PERMIT_QUERY_COLUMNS,
+            user_id, base_name, title, role, total_rows=job["total_rows"]
+        )
+        return path
+
+    if export_format in ARROW_FORMATS:
+        path, _ = export_rows_to_arrow(
+            progress.track(iter_permit_rows(**filters)), PERMIT_QUERY_COLUMNS,
+            user_id, base_name, export_format, role, progress=progress.file_written
+        )
+        return path
+
+    if export_format == "zip":
+        # Both members are generated and compressed straight into the archive;
+        # rows are counted once, but either member stops on cancellation
+        members = [
+            csv_member(f"{base_name}.csv", progress.track(query()), PERMIT_QUERY_COLUMNS, role),
+            pdf_member(f"{base_name}.pdf", progress.watch(query()), PERMIT_QUERY_COLUMNS,
+                       user_id, title, role, job["total_rows"]),
+        ]
+        return export_members_to_zip(members, user_id, base_name, progress=progress.zip_written)
+
+    raise ValueError(f"Unsupported format: {export_format}")
+
+
+def run_export_job(job_id: int, db_path: str, export_dir: str) -> str:
+    """
+    Generate one claimed export job; runs in a worker process.
+
+    The database and export paths are passed in because workers started
+    with the spawn method don't inherit the web process's settings.
+
+    Args:
+        job_id: A job claimed by _dispatch (status 'running')
+        db_path: Database file of the web process
+        export_dir: Base export directory of the web process
+
+    Returns:
+        str: The job's final status
+    """
+    from db import connection
+    from components.export_utils import set_export_dir
+    from db.queries import get_permit_page
+
+    connection.DB_PATH = db_path
+    set_export_dir(export_dir)
+
+    job = get_export_job(job_id)
+    if job is None or job["status"] != RUNNING:
+        return job["status"] if job else FAILED
+
+    progress = _Progress(job_id)
+    status, error = COMPLETED, None
+    try:
+        total = get_permit_page(**job["filters"], page_size=1)["total_count"]
+        with get_connection() as conn:
+            conn.execute("UPDATE export_jobs SET total_rows = ? WHERE id = ?", (total, job_id))
+            conn.commit()
+        job["total_rows"] = total
+
+        file_path = _write_export(job, progress)
+    except ExportCancelled:
+        logger.info(f"Export job {job_id} cancelled after {progress.rows} rows")
+        status = CANCELLED
+    except Exception as e:
+        logger.error(f"Export job {job_id} failed: {e}", exc_info=True)
+        status, error = FAILED, str(e)
+
+    # Recorded once the traceback, and the read cursors it references, are gone
+    if status == CANCELLED:
+        _finish(job_id, CANCELLED, rows_written=progress.rows)
+        return CANCELLED
+    if status == FAILED:
+        _finish(job_id, FAILED, error=error, rows_written=progress.rows)
+        return FAILED
+
+    _share(job, file_path)
+    _finish(
+        job_id, COMPLETED, file_path=file_path,
+        rows_written=progress.rows, bytes_written=os.path.getsize(file_path)
+    )
+    _log_completed(job, file_path, progress.rows)
+    logger.info(f"Export job {job_id} wrote {progress.rows} rows to {file_path}")
+    return COMPLETED
+
+
+def _share(job: Dict[str, Any], file_path: str) -> None:
+    """Share a job's file under its content key, unless the data changed meanwhile."""
+    from components.export_utils import share_export
+
+    key = job["content_key"]
+    if key is None:
+        return
+    try:
+        if _content_key(job["user_id"], job["role"], job["format"],
+                        job["base_name"], job["filters"]) != key:
+            logger.info(f"Not sharing export job {job['id']}: the data changed while it ran")
+            return
+        share_export(file_path, key)
+    except Exception as e:
+        # Sharing only saves later work; the job's own file is complete
+        logger.warning(f"Failed to share export job {job['id']}: {e}")
+
+
+def _log_completed(job: Dict[str, Any], file_path: str, row_count: int,
+                   reused_from: Optional[int] = None) -> None:
+    """Add a finished job to the export log, with the job it reused if any."""
+    from callbacks.export_callbacks import log_export
+
+    try:
+        log_export(None, {
+            'user_id': job["user_id"],
+            'format': job["format"],
+            'file_path': file_path,
+            'rows_exported': row_count,
+            'exported_at': _now(),
+            'metadata': {
+                'filename': job["base_name"],
+                'filters': job["filters"],
+                'role': job["role"],
+                'job_id': job["id"],
+                'content_key': job["content_key"],
+                'reused_from_job': reused_from,
+            }
+        })
+    except Exception:
+        # log_export has already logged the error; the file is still valid
+        pass
@@ -0,0 +1,147 @@
+"""
+Tests for Parquet and Arrow IPC exports.
+"""
+import io
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from flask import Flask
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from callbacks.export_callbacks import register_export_routes
+from components import export_utils
+from components.datatable import PERMIT_QUERY_COLUMNS
+from db import queries
+
+
+@pytest.fixture
+def permits_db(tmp_path):
+    """Point the app at a temporary database with 25 permits."""
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE permits ({', '.join(PERMIT_QUERY_COLUMNS)})")
+    conn.executemany(
+        "INSERT INTO permits (permit_number, status, valuation, date_filed, action_by_dept) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            (f"P-{i:02d}", "Approved" if i % 2 else "Pending", f"${i * 100}",
+             f"2024-{i % 12 + 1:02d}-01", "Fire" if i < 20 else "Zoning")
+            for i in range(25)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+    export_utils.set_export_dir(str(tmp_path / "exports"))
+    with patch("db.connection.DB_PATH", str(db_path)):
+        yield db_path
+
+
+def test_parquet_written_in_row_groups(permits_db):
+    """Each batch of rows becomes one row group, with typed columns."""
+    chunks = queries.iter_permit_rows(dept="Fire", chunk_size=3)
+    data = b"".join(export_utils.iter_arrow(chunks, PERMIT_QUERY_COLUMNS, "parquet",
+                                            role="admin", batch_rows=8))
+
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert [parquet.metadata.row_group(i).num_rows
+            for i in range(parquet.num_row_groups)] == [8, 8, 4]
+
+    table = parquet.read()
+    assert table.column_names == PERMIT_QUERY_COLUMNS
+    assert table.schema.field("valuation").type == pa.float64()
+    assert table.schema.field("permit_type").type == pa.string()
+    assert sorted(table.column("valuation").to_pylist()) == [i * 100.0 for i in range(20)]
+
+
+def test_types_do_not_depend_on_first_batch(permits_db):
+    """Columns keep their declared types whatever the first rows hold."""
+    conn = sqlite3.connect(permits_db)
+    conn.execute("UPDATE permits SET valuation = NULL, address = NULL WHERE permit_number < 'P-08'")
+    conn.execute("UPDATE permits SET address = 42 WHERE permit_number >= 'P-08'")
+    conn.commit()
+    conn.close()
+
+    chunks = queries.iter_permit_rows(dept="Fire", chunk_size=3)
+    data = b"".join(export_utils.iter_arrow(chunks, PERMIT_QUERY_COLUMNS, "parquet",
+                                            role="admin", batch_rows=8))
+
+    table = pq.read_table(io.BytesIO(data))
+    assert table.num_rows == 20
+    assert table.schema.field("valuation").type == pa.float64()
+    assert table.schema.field("address").type == pa.string()
+    addresses = table.column("address").to_pylist()
+    assert addresses.count(None) == 8 and addresses.count("42") == 12
+
+
+def test_arrow_file_reads_with_pandas(permits_db):
+    """Arrow IPC exports are Feather files with the role's columns masked."""
+    chunks = queries.iter_permit_rows(dept="Zoning")
+    with patch.dict(export_utils.COLUMN_MASKS, {"viewer": ["contractor"]}):
+        path, rows = export_utils.export_rows_to_arrow(
+            chunks, PERMIT_QUERY_COLUMNS, "7", "permits", "arrow", role="viewer"
+        )
+
+    assert rows == 5
+    assert path.endswith(".arrow")
+    df = pd.read_feather(path)
+    assert len(df) == 5
+    assert "contractor" not in df.columns
+    assert set(df["action_by_dept"]) == {"Zoning"}
+
+
+def test_empty_result_has_schema(permits_db):
+    """An export without rows is still a valid file with every column."""
+    chunks = queries.iter_permit_rows(dept="Parks")
+    path, rows = export_utils.export_rows_to_arrow(
+        chunks, PERMIT_QUERY_COLUMNS, "7", "permits", "parquet", role="admin"
+    )
+
+    assert rows == 0
+    table = pq.read_table(path)
+    assert table.num_rows == 0
+    assert table.column_names == PERMIT_QUERY_COLUMNS
+    assert table.schema.field("valuation").type == pa.float64()
+
+
+@pytest.mark.parametrize("extension", ["parquet", "arrow"])
+def test_stream_route_columnar(permits_db, extension):
+    """The streaming route serves the filtered permits as Parquet or Arrow."""
+    server = Flask(__name__)
+    server.secret_key = "test"
+    register_export_routes(server)
+    client = server.test_client()
+    with client.session_transaction() as sess:
+        sess["user"] = {"user_id": "7", "role": "admin"}
+
+    response = client.get(f"/exports/stream/permits.{extension}",
+                          query_string={"dept": "Fire", "filter_query": "{Status} = Pending"})
+    assert response.status_code == 200
+    assert response.mimetype == export_utils.ARROW_FORMATS[extension][1]
+
+    data = io.BytesIO(response.get_data())
+    df = pd.read_parquet(data) if extension == "parquet" else pd.read_feather(data)
+    assert len(df) == 10
+    assert set(df["status"]) == {"Pending"}
+
+
+def test_stream_route_needs_pyarrow(permits_db):
+    """Without pyarrow the columnar downloads are not available."""
+    server = Flask(__name__)
+    server.secret_key = "test"
+    register_export_routes(server)
+    client = server.test_client()
+    with client.session_transaction() as sess:
+        sess["user"] = {"user_id": "7", "role": "admin"}
+
+    with patch("callbacks.export_callbacks.arrow_available", return_value=False):
+        assert client.get("/exports/stream/permits.parquet").status_code == 501
@@ -0,0 +1,93 @@
+"""
+Tests for cancelling superseded dashboard requests.
+"""
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from dash.exceptions import PreventUpdate
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db import cancellation
+from db.connection import get_connection
+
+# Counts far enough to run for several seconds unless interrupted
+SLOW_QUERY = """
+WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter WHERE n < 100000000)
+SELECT COUNT(*) FROM counter
+"""
+
+
+@pytest.fixture(autouse=True)
+def temp_db(tmp_path):
+    """Use a throwaway database file."""
+    with patch("db.connection.DB_PATH", str(tmp_path / "app.db")):
+        yield
+
+
+def cancellable_slow_query(started):
+    """Make a callback cancellable under the name 'slow' and signal when it runs."""
+    def decorator(func):
+        def signalled():
+            started.set()
+            return func()
+        return cancellation.cancellable("slow")(signalled)
+    return decorator
+
+
+def test_newer_request_aborts_running_query():
+    """Starting a newer request interrupts the older one's query."""
+    started = threading.Event()
+    outcome = {}
+
+    @cancellable_slow_query(started)
+    def slow_callback():
+        with get_connection() as conn:
+            return conn.execute(SLOW_QUERY).fetchone()
+
+    def run():
+        try:
+            outcome["result"] = slow_callback("session-a")
+        except PreventUpdate:
+            outcome["result"] = "cancelled"
+
+    worker = threading.Thread(target=run)
+    worker.start()
+    assert started.wait(5)
+
+    token = cancellation.begin_request("session-a", "slow")
+    cancellation.end_request(token)
+
+    worker.join(10)
+    assert not worker.is_alive()
+    assert outcome["result"] == "cancelled"
+
+
+def test_requests_only_supersede_same_session_and_callback():
+    """Other sessions and other callbacks are not made stale."""
+    token = cancellation.begin_request("session-b", "trend")
+    try:
+        for session, name in [("session-c", "trend"), ("session-b", "kpis")]:
+            cancellation.end_request(cancellation.begin_request(session, name))
+        assert not cancellation.is_stale()
+
+        cancellation.end_request(cancellation.begin_request("session-b", "trend"))
+        assert cancellation.is_stale()
+    finally:
+        cancellation.end_request(token)
+
+
+def test_untracked_work_is_never_cancelled():
+    """Without a session ID the callback runs normally, as do background queries."""
+    @cancellation.cancellable("count")
+    def count():
+        with get_connection() as conn:
+            return conn.execute("SELECT 1").fetchone()[0]
+
+    assert count(None) == 1
+    assert count("session-d") == 1
+    assert cancellation.is_stale() is False
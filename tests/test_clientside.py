@@ -0,0 +1,107 @@
+"""
+Tests that clientside callbacks match their Python reference implementations.
+"""
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dash import no_update
+
+from callbacks.clientside import get_clientside_callbacks, kpi_text, month_options, debounce_layout
+
+# Grid layout as reported by the grid, and the same layout as saved
+GRID = [
+    {"i": "table-permits", "x": 0, "y": 5, "w": 12, "h": 4, "moved": False, "static": False},
+    {"i": "kpi-1", "x": 0, "y": 0, "w": 12, "h": 2, "minW": 2},
+]
+SAVED = [
+    {"i": "kpi-1", "x": 0, "y": 0, "w": 12, "h": 2},
+    {"i": "table-permits", "x": 0, "y": 5, "w": 12, "h": 4},
+]
+
+# Arguments each callback is checked with
+CASES = {
+    "month_options": [[None], [""], ["2024"]],
+    "kpi_text": [
+        [None],
+        [{"total_permits": 0, "total_valuation": 0.0, "department_count": 0}],
+        [{"total_permits": 1234567, "total_valuation": 9876543.215, "department_count": 5}],
+        [{"total_permits": 3, "total_valuation": 0.5, "department_count": 1}],
+    ],
+    "session_id": [["/", "existing-session"]],
+    "trend_chart_width": [[{"autosize": True}, None], [None, 1024]],
+    "component_visibility": [[None, False, False, False, False], [3, True, False, True, None]],
+    "buffer_layout": [[[{"i": "kpi-1", "x": 0, "y": 0, "w": 12, "h": 2}], None], [[], {"seq": 4}]],
+    "debounce_layout": [
+        [1, None, None, None],
+        [2, {"seq": 3, "layout": GRID}, None, None],
+        [3, {"seq": 3, "layout": GRID}, {"seq": 3, "ticks": 2, "done": False}, None],
+        [4, {"seq": 3, "layout": GRID}, {"seq": 3, "ticks": 3, "done": True}, None],
+        [5, {"seq": 4, "layout": GRID}, {"seq": 4, "ticks": 2, "done": False},
+         {"version": 2, "layout": SAVED}],
+        [6, {"seq": 5, "layout": GRID[:1]}, {"seq": 5, "ticks": 2, "done": False},
+         {"version": 2, "layout": SAVED}],
+    ],
+}
+
+
+def run_js(source, args):
+    """Call a JavaScript callback function with node and return its result."""
+    script = f"console.log(JSON.stringify(({source}).apply(null, {json.dumps(args)})));"
+    output = subprocess.run(
+        ["node", "-e", script], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output)
+
+
+def test_every_callback_has_cases():
+    """New clientside callbacks must be added to the consistency checks."""
+    assert set(get_clientside_callbacks()) == set(CASES)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_javascript_matches_python(name):
+    """The browser and server versions produce the same outputs."""
+    entry = get_clientside_callbacks()[name]
+    for args in CASES[name]:
+        # no_update is null when the JavaScript runs outside the browser
+        result = entry["function"](*args)
+        expected = json.loads(json.dumps(result, default=lambda value: None))
+        assert run_js(entry["source"], args) == expected
+
+
+def test_reference_implementations():
+    """Spot-check the Python versions."""
+    options, disabled = month_options("2024")
+    assert disabled is False
+    assert options[0] == {"label": "January", "value": "01"}
+    assert month_options(None) == ([], True)
+
+    assert kpi_text({"total_permits": 1500, "total_valuation": "2500.5", "department_count": 2}) == (
+        "1,500", "$2,500.50", "2"
+    )
+
+
+def test_layout_commit_is_debounced():
+    """A buffered layout is released once, after the grid has been quiet."""
+    buffer = {"seq": 1, "layout": GRID}
+    state, pending = debounce_layout(1, buffer, None, None)
+    assert pending is no_update
+
+    state, pending = debounce_layout(2, buffer, state, None)
+    state, pending = debounce_layout(3, buffer, state, None)
+    assert pending == {"seq": 1, "layout": SAVED}
+    assert debounce_layout(4, buffer, state, None) == (no_update, no_update)
+
+    # Unchanged layouts aren't sent at all
+    saved = {"version": 1, "layout": SAVED}
+    state, pending = debounce_layout(5, buffer, {"seq": 1, "ticks": 2, "done": False}, saved)
+    assert pending is no_update
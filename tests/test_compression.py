@@ -0,0 +1,128 @@
+"""
+Tests for response compression on the Flask server.
+"""
+import gzip
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from flask import Flask, Response, jsonify
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from middleware import compression
+
+ROWS = [{"permit_number": f"PER-{i}", "status": "Approved", "valuation": i * 100} for i in range(500)]
+
+
+@pytest.fixture
+def client(tmp_path):
+    """A Flask app with compression and a few test routes."""
+    server = Flask(__name__)
+
+    @server.route("/table")
+    def table():
+        return jsonify(ROWS)
+
+    @server.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    @server.route("/stream")
+    def stream():
+        return Response((f"PER-{i},Approved\n" for i in range(5000)), mimetype="text/csv")
+
+    @server.route("/exports/<path:filename>")
+    def export(filename):
+        return compression.send_precompressed(str(tmp_path), filename, as_attachment=True)
+
+    compression.init_compression(server)
+    test_client = server.test_client()
+    test_client.export_dir = tmp_path
+    return test_client
+
+
+def test_large_payload_is_gzipped(client):
+    """Large JSON shrinks several-fold and decodes back to the same data."""
+    response = client.get("/table", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    body = gzip.decompress(response.data)
+    assert json.loads(body) == ROWS
+    assert len(response.data) * 4 < len(body)
+
+
+def test_brotli_preferred_when_available(client):
+    """Brotli is chosen when both codings are accepted and brotli is installed."""
+    brotli = pytest.importorskip("brotli")
+    response = client.get("/table", headers={"Accept-Encoding": "gzip, deflate, br"})
+
+    assert response.headers["Content-Encoding"] == "br"
+    assert json.loads(brotli.decompress(response.data)) == ROWS
+
+
+def test_small_or_unaccepted_responses_untouched(client):
+    """Responses under the threshold, or without Accept-Encoding, are sent as-is."""
+    assert "Content-Encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "Content-Encoding" not in client.get("/table").headers
+
+
+def test_streamed_response_compressed_incrementally(client):
+    """Streamed bodies are compressed without a Content-Length."""
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    lines = gzip.decompress(response.data).decode().splitlines()
+    assert len(lines) == 5000 and lines[-1] == "PER-4999,Approved"
+
+
+def test_precompressed_export_served(client):
+    """A fresh .gz sibling is sent instead of the original file."""
+    export = client.export_dir / "permits.csv"
+    export.write_text("permit_number,status\n" + "PER-1,Approved\n" * 1000)
+    compression.precompress_file(str(export))
+
+    response = client.get("/exports/permits.csv", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "permits.csv" in response.headers["Content-Disposition"]
+    assert gzip.decompress(response.data).decode() == export.read_text()
+    response.close()
+
+
+def test_static_files_compressed_once(tmp_path):
+    """Asset files are compressed on first request and again only when they change."""
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    script = assets / "app.js"
+    script.write_text("console.log('permits');\n" * 500)
+
+    server = Flask(__name__, static_folder=str(assets), static_url_path="/assets")
+    compression.init_compression(server)
+    client = server.test_client()
+
+    def fetch():
+        response = client.get("/assets/app.js", headers={"Accept-Encoding": "gzip"})
+        body = gzip.decompress(response.data).decode()
+        response.close()
+        return response, body
+
+    with patch.object(compression, "_static_cache", compression.LRUCache(max_entries=4)), \
+            patch.object(compression, "compress", wraps=compression.compress) as compress:
+        first, body = fetch()
+        second, _ = fetch()
+        assert compress.call_count == 1
+        assert first.headers["Content-Encoding"] == second.headers["Content-Encoding"] == "gzip"
+        assert body == script.read_text()
+
+        script.write_text("console.log('updated');\n" * 500)
+        os.utime(script, (first.last_modified.timestamp() + 10,) * 2)
+        _, body = fetch()
+        assert compress.call_count == 2
+        assert body == script.read_text()
@@ -0,0 +1,114 @@
+"""
+Tests for the shared on-disk result cache.
+"""
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import disk, generation
+from cache.memory import memoize_by_generation
+
+
+@pytest.fixture(autouse=True)
+def temp_files(tmp_path):
+    """Keep the generation counter and cache files in a temporary directory."""
+    with patch("db.connection.DB_PATH", str(tmp_path / "app.db")), \
+            patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        yield tmp_path
+
+
+def test_entries_are_shared_between_instances(temp_files):
+    """A value written through one instance is read by another (another worker)."""
+    writer = disk.DiskCache(temp_files / "cache.db")
+    reader = disk.DiskCache(temp_files / "cache.db")
+
+    writer.set("answer", {"rows": [(1, "a")]}, 0)
+
+    assert reader.get("answer") == {"rows": [(1, "a")]}
+    assert reader.get("missing") is None
+    assert reader.stats()["hits"] == 1
+    assert reader.stats()["misses"] == 1
+    assert reader.stats()["entries"] == 1
+
+
+def test_expired_and_outdated_entries_miss(temp_files):
+    """Entries past their TTL or from an older data generation are ignored."""
+    cache = disk.DiskCache(temp_files / "cache.db", ttl=60)
+    cache.set("short", 1, 0, ttl=1)
+    cache.set("long", 2, 0)
+
+    with patch("cache.disk.time.time", return_value=disk.time.time() + 5):
+        assert cache.get("short") is None
+        assert cache.get("long") == 2
+
+    generation.bump_data_generation()
+    assert cache.get("long") is None
+    assert cache.evict() == 2
+
+
+def test_value_keeps_generation_it_was_computed_for(temp_files):
+    """A value computed before a bump is stored for its own generation."""
+    cache = disk.DiskCache(temp_files / "cache.db")
+    computed_for = generation.get_data_generation()
+    generation.bump_data_generation()
+    cache.set("figure", "old", computed_for)
+
+    assert cache.get("figure") is None
+    assert cache.get("figure", computed_for) == "old"
+
+
+def test_eviction_keeps_cache_under_size_limit(temp_files):
+    """The least recently used entries are evicted first."""
+    cache = disk.DiskCache(temp_files / "cache.db", max_bytes=3000)
+    with patch("cache.disk.time.time") as clock:
+        for i in range(5):
+            clock.return_value = 1000.0 + i
+            cache.set(f"key-{i}", "x" * 1000, 0)
+        clock.return_value = 1010.0
+        cache.evict()
+
+        assert cache.get("key-0") is None
+        assert cache.get("key-1") is None
+        assert cache.get("key-4") is not None
+        assert cache.stats()["bytes"] <= 3000
+
+
+def test_memoized_results_reused_across_processes(temp_files):
+    """A fresh in-process cache (a new worker) is filled from the disk cache."""
+    calls = []
+
+    @memoize_by_generation()
+    def expensive(year):
+        calls.append(year)
+        return [(year, 42)]
+
+    assert expensive("2024") == [("2024", 42)]
+    expensive.cache.clear()
+    assert expensive("2024") == [("2024", 42)]
+    assert calls == ["2024"]
+
+
+def test_result_computed_during_bump_is_not_served_as_new(temp_files):
+    """A result that started before an ETL bump is stored for the old generation."""
+    calls = []
+
+    @memoize_by_generation()
+    def expensive(year):
+        calls.append(year)
+        if len(calls) == 1:
+            # New data lands while the old data is being read
+            generation.bump_data_generation()
+        return [(year, len(calls))]
+
+    assert expensive("2024") == [("2024", 1)]
+
+    # Neither the in-process nor the shared entry counts for the new generation
+    assert expensive("2024") == [("2024", 2)]
+    expensive.cache.clear()
+    assert expensive("2024") == [("2024", 2)]
+    assert len(calls) == 2
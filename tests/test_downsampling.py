@@ -0,0 +1,99 @@
+"""
+Tests for trend series downsampling and zoom handling.
+"""
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import generation
+from components import downsampling
+
+
+def daily_rows(days, start=date(2020, 1, 1)):
+    """(date, count) rows with a single spike in the middle."""
+    rows = [((start + timedelta(days=i)).isoformat(), 5 + i % 3) for i in range(days)]
+    rows[days // 2] = (rows[days // 2][0], 500)
+    return rows
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    """LTTB returns the requested number of points, including the extremes."""
+    rows = daily_rows(2000)
+    sampled = downsampling.downsample_rows(rows, 100)
+
+    assert len(sampled) == 100
+    assert sampled[0] == rows[0] and sampled[-1] == rows[-1]
+    assert max(count for _, count in sampled) == 500
+    assert [d for d, _ in sampled] == sorted(d for d, _ in sampled)
+
+
+def test_short_series_unchanged():
+    """Series that already fit are returned as they are."""
+    rows = daily_rows(30)
+    assert downsampling.downsample_rows(rows, 100) == rows
+    assert list(downsampling.lttb(np.arange(5), np.arange(5), 10)) == [0, 1, 2, 3, 4]
+
+
+def test_missing_days_are_zero_filled():
+    """Days without permits count as zero, so dips survive downsampling."""
+    rows = [("2020-01-01", 3), ("2020-01-04", 2), ("2020-01-05", 1)]
+    assert downsampling.fill_missing_days(rows) == [
+        ("2020-01-01", 3), ("2020-01-02", 0), ("2020-01-03", 0), ("2020-01-04", 2), ("2020-01-05", 1)
+    ]
+    assert downsampling.fill_missing_days([]) == []
+
+    # A quiet month inside a busy series is kept as a dip
+    busy = [(day, count) for day, count in daily_rows(600) if not "2020-06-01" <= day < "2020-07-01"]
+    sampled = downsampling.downsample_rows(downsampling.fill_missing_days(busy), 100)
+    assert min(count for _, count in sampled) == 0
+
+
+def test_points_follow_chart_width():
+    """Wider charts get more points, within bounds."""
+    assert downsampling.max_points_for_width(None) == 400
+    assert downsampling.max_points_for_width(1600) == 800
+    assert downsampling.max_points_for_width(10) == downsampling.MIN_POINTS
+
+    # Similar widths share a point count, and so cached figures
+    assert downsampling.max_points_for_width(1130) == downsampling.max_points_for_width(1200) == 600
+
+
+def test_zoom_range_parsing():
+    """Both relayoutData range forms are understood; other events are not zooms."""
+    assert downsampling.zoom_range({
+        "xaxis.range[0]": "2021-03-04 10:00:00.0000", "xaxis.range[1]": "2021-05-01"
+    }) == ("2021-03-04", "2021-05-01")
+    assert downsampling.zoom_range({"xaxis.range": ["2021-01-01", "2021-02-01"]}) == (
+        "2021-01-01", "2021-02-01"
+    )
+    assert downsampling.zoom_range({"autosize": True}) is None
+    assert downsampling.is_zoom_reset({"xaxis.autorange": True})
+
+
+def test_zoomed_series_has_daily_resolution(tmp_path):
+    """The full range is downsampled; a zoomed range is queried per day."""
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE permits (date_status TEXT, action_by_dept TEXT)")
+    conn.executemany(
+        "INSERT INTO permits VALUES (?, 'Fire')",
+        [(day,) for day, count in daily_rows(1500) for _ in range(count % 4 + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+    with patch("db.connection.DB_PATH", str(db_path)), \
+            patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        full = downsampling.get_trend_series(width=400)
+        zoomed = downsampling.get_trend_series(width=400, visible=("2021-01-01", "2021-01-31"))
+
+    assert len(full) == 200
+    assert len(zoomed) == 31
+    assert zoomed[0][0] == "2021-01-01" and zoomed[-1][0] == "2021-01-31"
@@ -0,0 +1,102 @@
+"""
+Tests for ETag handling of read-only Dash callback responses.
+"""
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from dash import Dash, Input, Output, State, dcc, html
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import generation
+from middleware import etag
+
+
+@pytest.fixture
+def client(tmp_path):
+    """A small Dash app with one read-only callback, counting its calls."""
+    app = Dash(__name__)
+    app.layout = html.Div([
+        dcc.Input(id="year"),
+        dcc.Store(id="session-id"),
+        html.Div(id="total"),
+    ])
+    calls = []
+
+    @app.callback(Output("total", "children"), Input("year", "value"), State("session-id", "data"))
+    def show_total(year, session_id):
+        calls.append(year)
+        return f"Total for {year}"
+
+    with patch.object(etag, "READ_ONLY_OUTPUTS", set(etag.READ_ONLY_OUTPUTS)), \
+            patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        etag.init_etag_caching(app.server, outputs=["total.children"])
+        test_client = app.server.test_client()
+        test_client.calls = calls
+        yield test_client
+
+
+def post_update(client, year, session_id="session-1", headers=None, changed=("year.value",)):
+    """Send a callback request as the Dash renderer does."""
+    return client.post("/_dash-update-component", json={
+        "output": "total.children",
+        "outputs": {"id": "total", "property": "children"},
+        "inputs": [{"id": "year", "property": "value", "value": year}],
+        "state": [{"id": "session-id", "property": "data", "value": session_id}],
+        "changedPropIds": list(changed),
+    }, headers=headers or {})
+
+
+def test_repeated_request_is_not_modified(client):
+    """A matching If-None-Match skips the callback and returns 304."""
+    first = post_update(client, "2024")
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    tag = first.headers["ETag"]
+
+    # The session ID is ignored, so other sessions can revalidate too
+    second = post_update(client, "2024", session_id="session-2", headers={"If-None-Match": tag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == tag
+    assert client.calls == ["2024"]
+
+
+def test_etag_changes_with_inputs_and_generation(client):
+    """Different inputs or new data produce a different ETag."""
+    tag = post_update(client, "2024").headers["ETag"]
+
+    assert post_update(client, "2023", headers={"If-None-Match": tag}).status_code == 200
+
+    generation.bump_data_generation()
+    refreshed = post_update(client, "2024", headers={"If-None-Match": tag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != tag
+
+
+def test_etag_changes_with_trigger(client):
+    """The same inputs fired by a different trigger are a different response."""
+    tag = post_update(client, "2024").headers["ETag"]
+
+    initial = post_update(client, "2024", changed=(), headers={"If-None-Match": tag})
+    assert initial.status_code == 200
+    assert initial.headers["ETag"] != tag
+
+    # The ignored session ID doesn't count as a trigger either
+    resent = post_update(client, "2024", changed=("year.value", "session-id.data"),
+                         headers={"If-None-Match": tag})
+    assert resent.status_code == 304
+
+
+def test_body_parsed_once(client):
+    """The ETag check and the callback share one parse of the request body."""
+    with patch.object(client.application.json, "loads", wraps=client.application.json.loads) as loads:
+        assert post_update(client, "2024").status_code == 200
+    assert loads.call_count == 1
+
+
+def test_other_callbacks_are_not_tagged():
+    """Callbacks outside READ_ONLY_OUTPUTS never get an ETag."""
+    assert etag.compute_etag({"output": "layout-toast.is_open", "inputs": []}) is None
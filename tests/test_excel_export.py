@@ -0,0 +1,69 @@
+"""
+Tests for the write-only Excel export.
+"""
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from components import export_utils
+
+
+def test_rows_split_across_sheets(tmp_path):
+    """Rows past a sheet's limit continue on a new sheet with its own header."""
+    export_utils.set_export_dir(str(tmp_path))
+    chunks = [[(f"P-{i}", i * 10.0) for i in range(start, start + 3)] for start in (0, 3, 6)]
+
+    with patch.object(export_utils, "EXCEL_MAX_ROWS", 5):
+        path, row_count = export_utils.export_rows_to_excel(
+            chunks, ["permit_number", "valuation"], "7", "permits", role="admin"
+        )
+
+    workbook = load_workbook(path)
+    assert row_count == 9
+    assert workbook.sheetnames == ["Data", "Data 2", "Data 3"]
+    sheets = [list(sheet.values) for sheet in workbook.worksheets]
+    assert [len(rows) for rows in sheets] == [5, 5, 2]
+    assert all(rows[0] == ("permit_number", "valuation") for rows in sheets)
+    assert sheets[2][1] == ("P-8", 80.0)
+
+
+def test_widths_past_26_columns(tmp_path):
+    """Columns beyond Z get their own letters and sampled widths."""
+    export_utils.set_export_dir(str(tmp_path))
+    columns = [f"c{i}" for i in range(30)]
+    row = tuple("x" * (i + 1) for i in range(30))
+
+    path, _ = export_utils.export_rows_to_excel([[row]], columns, "7", role="admin")
+
+    sheet = load_workbook(path)["Data"]
+    assert sheet["AD1"].value == "c29"
+    assert sheet.column_dimensions["A"].width == 4
+    assert sheet.column_dimensions["AD"].width == 32
+    assert sheet.column_dimensions["Z"].width == 28
+
+
+def test_masked_columns_and_missing_values(tmp_path):
+    """Masked columns are dropped and missing values stay empty."""
+    export_utils.set_export_dir(str(tmp_path))
+    df = pd.DataFrame({"permit_number": ["P-1", "P-2"], "salary": [1, 2],
+                       "valuation": [100.0, None]})
+
+    path = export_utils.export_to_excel(export_utils.mask_sensitive_columns(df, "user"), "7")
+
+    rows = list(load_workbook(path)["Data"].values)
+    assert rows == [("permit_number", "valuation"), ("P-1", 100), ("P-2", None)]
+
+
+def test_empty_export_has_header(tmp_path):
+    """An export without rows still has its header."""
+    export_utils.set_export_dir(str(tmp_path))
+    path, row_count = export_utils.export_rows_to_excel(iter([]), ["a", "b"], "7", role="admin")
+
+    assert row_count == 0
+    assert list(load_workbook(path)["Data"].values) == [("a", "b")]
@@ -0,0 +1,181 @@
+"""
+Tests for sharing identical exports by content key.
+"""
+import os
+import sqlite3
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import generation
+from components import export_utils
+from components.datatable import PERMIT_QUERY_COLUMNS
+from scheduler import export_jobs
+
+
+class HeldPool:
+    """Executor stand-in that records jobs without running them."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, func, job_id, *args):
+        self.submitted.append(job_id)
+        return Future()
+
+
+@pytest.fixture
+def export_db(tmp_path):
+    """Temporary database with 30 permits, an export directory and a held pool."""
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE permits ({', '.join(PERMIT_QUERY_COLUMNS)})")
+    conn.executemany(
+        "INSERT INTO permits (permit_number, date_filed, action_by_dept) VALUES (?, ?, 'Fire')",
+        [(f"P-{i}", f"2024-01-{i % 28 + 1:02d}") for i in range(30)]
+    )
+    conn.commit()
+    conn.close()
+
+    export_utils.set_export_dir(str(tmp_path / "exports"))
+    pool = HeldPool()
+    with patch("db.connection.DB_PATH", str(db_path)), \
+            patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"), \
+            patch.object(export_jobs, "_get_pool", return_value=pool):
+        yield pool
+
+    export_jobs._active.clear()
+
+
+def export(pool, user_id="7", role="user", export_format="csv", filters=None):
+    """Submit an export and run it in this process if it was queued."""
+    job_id = export_jobs.submit_export_job(
+        user_id, role, export_format, "permits", filters or {"dept": "Fire"}
+    )
+    if job_id in pool.submitted:
+        export_jobs.run_export_job(
+            job_id, export_utils.BASE_EXPORT_DIR.parent / "app.db", str(export_utils.BASE_EXPORT_DIR)
+        )
+        export_jobs._active.discard(job_id)
+    return export_jobs.get_export_job(job_id)
+
+
+def test_identical_export_reuses_file(export_db):
+    """A second identical request is completed with a hardlink, not a new job run."""
+    first = export(export_db, user_id="7")
+    second = export(export_db, user_id="8")
+
+    assert export_db.submitted == [first["id"]]
+    assert second["status"] == export_jobs.COMPLETED
+    assert second["content_key"] == first["content_key"]
+    assert second["rows_written"] == first["rows_written"] == 30
+    assert Path(second["file_path"]).parent.name == "8"
+    assert os.path.samefile(first["file_path"], second["file_path"])
+
+    # Original, shared copy and the second user's link
+    assert Path(first["file_path"]).stat().st_nlink == 3
+
+
+def test_different_requests_are_not_shared(export_db):
+    """Filters, format and data generation all change the key."""
+    keys = {export(export_db)["content_key"]}
+    keys.add(export(export_db, filters={"dept": "Zoning"})["content_key"])
+    keys.add(export(export_db, export_format="excel")["content_key"])
+    generation.bump_data_generation()
+    keys.add(export(export_db)["content_key"])
+
+    assert len(keys) == 4
+    assert len(export_db.submitted) == 4
+
+
+def test_key_follows_masked_columns(export_db):
+    """Roles share exports when they mask the same permit columns."""
+    user_key = export(export_db, role="user")["content_key"]
+    assert export(export_db, role="viewer")["content_key"] == user_key
+
+    with patch.dict(export_utils.COLUMN_MASKS, {"viewer": ["contractor"]}):
+        assert export(export_db, role="viewer")["content_key"] != user_key
+
+
+def test_pdf_exports_are_shared_per_user(export_db):
+    """PDF reports name their user, so other users get their own file."""
+    first = export(export_db, user_id="7", export_format="pdf")
+    assert export(export_db, user_id="8", export_format="pdf")["content_key"] != first["content_key"]
+    assert export(export_db, user_id="7", export_format="pdf")["content_key"] == first["content_key"]
+    assert len(export_db.submitted) == 2
+
+
+def test_copies_without_hardlink_support(export_db):
+    """Where hardlinks fail, the shared file is copied instead."""
+    with patch("components.export_utils.os.link", side_effect=OSError("not supported")):
+        first = export(export_db, user_id="7")
+        second = export(export_db, user_id="8")
+
+    assert export_db.submitted == [first["id"]]
+    assert not os.path.samefile(first["file_path"], second["file_path"])
+    assert Path(first["file_path"]).read_bytes() == Path(second["file_path"]).read_bytes()
+
+
+def test_cleanup_keeps_referenced_shared_files(export_db):
+    """Shared files are only removed once no user export links to them."""
+    first = export(export_db, user_id="7")
+    second = export(export_db, user_id="8")
+    shared = export_utils.find_shared_export(first["content_key"], "csv")
+
+    # Hardlinks share their age, so this ages every link; the second user's
+    # copy and the shared entry are also dated by when they were handed out
+    old = time.time() - 40 * 86400
+    for path in (shared, *export_utils.BASE_EXPORT_DIR.rglob(f"*{export_utils.LINKED_AT_SUFFIX}")):
+        os.utime(path, (old, old))
+
+    # A user's export that can't be removed still references the data
+    unlink = Path.unlink
+
+    def failing_unlink(path, *args, **kwargs):
+        if str(path) == second["file_path"]:
+            raise PermissionError("in use")
+        return unlink(path, *args, **kwargs)
+
+    with patch.object(Path, "unlink", autospec=True, side_effect=failing_unlink):
+        export_utils.cleanup_old_exports(days=30)
+    assert not Path(first["file_path"]).exists()
+    assert shared.exists()
+
+    # Once the last link is gone the shared file goes too
+    export_utils.cleanup_old_exports(days=30)
+    assert not Path(second["file_path"]).exists()
+    assert not shared.exists()
+    assert list(export_utils.BASE_EXPORT_DIR.rglob(f"*{export_utils.LINKED_AT_SUFFIX}")) == []
+    assert export(export_db, user_id="9")["id"] in export_db.submitted
+
+
+def test_reuse_dates_only_the_new_copy(export_db):
+    """A reused export expires counting from its hand-out; older copies don't get younger."""
+    from housekeeping.file_cleanup import delete_old_files
+
+    first = export(export_db, user_id="7")
+    old = time.time() - 40 * 86400
+    os.utime(first["file_path"], (old, old))
+
+    second = export(export_db, user_id="8")
+    assert Path(second["file_path"]).stat().st_mtime == old
+    export_utils.cleanup_old_exports(days=30)
+
+    assert not Path(first["file_path"]).exists()
+    assert Path(second["file_path"]).exists()
+    assert export_utils.find_shared_export(first["content_key"], "csv") is not None
+
+    # The scheduled housekeeping cleanup reads the same dates, and leaves
+    # shared entries that are still linked alone
+    shared = export_utils.find_shared_export(first["content_key"], "csv")
+    os.utime(shared.with_name(shared.name + export_utils.LINKED_AT_SUFFIX), (old, old))
+    delete_old_files(export_utils.BASE_EXPORT_DIR, 30)
+    assert Path(second["file_path"]).exists()
+    assert shared.exists()
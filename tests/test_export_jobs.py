@@ -0,0 +1,210 @@
+"""
+Tests for the background export job queue.
+"""
+import sqlite3
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from callbacks.export_callbacks import export_job_status
+from cache import generation
+from components import export_utils
+from components.datatable import PERMIT_QUERY_COLUMNS
+from scheduler import export_jobs
+
+
+class HeldPool:
+    """Executor stand-in whose jobs never finish."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, func, job_id, *args):
+        self.submitted.append(job_id)
+        return Future()
+
+
+def pool_future_done():
+    """A future for a worker that returned normally."""
+    future = Future()
+    future.set_result(export_jobs.COMPLETED)
+    return future
+
+
+@pytest.fixture
+def export_db(tmp_path):
+    """Temporary database with 30 permits and an export directory."""
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE permits ({', '.join(PERMIT_QUERY_COLUMNS)})")
+    conn.executemany(
+        "INSERT INTO permits (permit_number, date_filed, action_by_dept) VALUES (?, ?, 'Fire')",
+        [(f"P-{i}", f"2024-01-{i % 28 + 1:02d}") for i in range(30)]
+    )
+    conn.commit()
+    conn.close()
+
+    export_utils.set_export_dir(str(tmp_path / "exports"))
+    with patch("db.connection.DB_PATH", str(db_path)), \
+            patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        yield tmp_path
+
+    if export_jobs._pool is not None:
+        export_jobs._pool.shutdown()
+        export_jobs._pool = None
+    export_jobs._active.clear()
+
+
+def wait_for(job_id, timeout=30):
+    """Poll a job until it finishes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = export_jobs.get_export_job(job_id)
+        if job["status"] in export_jobs.FINISHED_STATUSES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Export job {job_id} did not finish")
+
+
+def test_job_runs_in_worker_process(export_db):
+    """A queued CSV export is written by a worker with its progress recorded."""
+    job_id = export_jobs.submit_export_job("7", "admin", "csv", "permits", {"dept": "Fire"})
+    job = wait_for(job_id)
+
+    assert job["status"] == export_jobs.COMPLETED
+    assert job["total_rows"] == job["rows_written"] == 30
+    assert job["bytes_written"] == Path(job["file_path"]).stat().st_size > 0
+    assert Path(job["file_path"]).parent == export_db / "exports" / "7"
+
+    status, href, link_style, stop_polling, _ = export_job_status(job)
+    assert href.endswith(Path(job["file_path"]).name)
+    assert stop_polling and link_style["display"] == "inline-block"
+
+
+def test_concurrent_jobs_are_capped(export_db):
+    """Jobs beyond the worker limit wait in the queue, and can be cancelled there."""
+    pool = HeldPool()
+    with patch.object(export_jobs, "EXPORT_WORKERS", 1), \
+            patch.object(export_jobs, "_get_pool", return_value=pool):
+        ids = [export_jobs.submit_export_job("7", "user", "pdf", "permits", {})
+               for _ in range(3)]
+
+        statuses = [export_jobs.get_export_job(i)["status"] for i in ids]
+        assert pool.submitted == ids[:1]
+        assert statuses == ["running", "queued", "queued"]
+
+        # Only the owner can cancel; queued jobs are cancelled at once
+        assert not export_jobs.cancel_export_job(ids[1], "8")
+        assert export_jobs.cancel_export_job(ids[1], "7")
+        assert export_jobs.get_export_job(ids[1])["status"] == export_jobs.CANCELLED
+
+        # Running jobs are asked to stop
+        assert export_jobs.cancel_export_job(ids[0], "7")
+        assert export_jobs.get_export_job(ids[0])["cancel_requested"] == 1
+
+        # A finished job frees its slot for the next queued one
+        export_jobs._job_done(ids[0], pool_future_done())
+        assert pool.submitted == [ids[0], ids[2]]
+
+
+def test_cancelled_job_removes_partial_file(export_db):
+    """A worker stops at its next progress check and leaves no file behind."""
+    with patch.object(export_jobs, "_get_pool", return_value=HeldPool()):
+        job_id = export_jobs.submit_export_job("7", "admin", "csv", "permits", {})
+    export_jobs.cancel_export_job(job_id, "7")
+
+    with patch.object(export_jobs, "PROGRESS_EVERY_SECONDS", 0):
+        status = export_jobs.run_export_job(
+            job_id, str(export_db / "app.db"), str(export_db / "exports")
+        )
+
+    assert status == export_jobs.CANCELLED
+    assert export_jobs.get_export_job(job_id)["status"] == export_jobs.CANCELLED
+    assert list((export_db / "exports" / "7").iterdir()) == []
+
+
+def test_cancel_stops_zip_pdf_render(export_db):
+    """Cancelling a ZIP export also stops the PDF member while it renders."""
+    with patch.object(export_jobs, "_get_pool", return_value=HeldPool()):
+        job_id = export_jobs.submit_export_job("7", "admin", "zip", "permits", {})
+    export_jobs.cancel_export_job(job_id, "7")
+
+    # Only the PDF member reads rows
+    def empty_member(arcname, *args):
+        return arcname, lambda: iter([b""])
+
+    with patch.object(export_jobs, "PROGRESS_EVERY_SECONDS", 0), \
+            patch.object(export_utils, "csv_member", empty_member):
+        status = export_jobs.run_export_job(
+            job_id, str(export_db / "app.db"), str(export_db / "exports")
+        )
+
+    assert status == export_jobs.CANCELLED
+    assert list((export_db / "exports" / "7").iterdir()) == []
+
+
+def set_job_owner(tmp_path, job_id, owner, heartbeat_at):
+    """Make a running job look like it belongs to another process."""
+    conn = sqlite3.connect(tmp_path / "app.db")
+    conn.execute("UPDATE export_jobs SET owner = ?, heartbeat_at = ? WHERE id = ?",
+                 (owner, heartbeat_at, job_id))
+    conn.commit()
+    conn.close()
+
+
+def test_interrupted_jobs_are_requeued(export_db):
+    """Jobs whose owner stopped sending heartbeats go back to the queue."""
+    with patch.object(export_jobs, "_get_pool", return_value=HeldPool()):
+        job_id = export_jobs.submit_export_job("7", "admin", "excel", "permits", {})
+    export_jobs._active.clear()
+    assert export_jobs.get_export_job(job_id)["owner"] == export_jobs._owner()
+    set_job_owner(export_db, job_id, "other-host:123", "2024-01-01T00:00:00")
+
+    pool = HeldPool()
+    with patch.object(export_jobs, "_get_pool", return_value=pool):
+        assert export_jobs.recover_export_jobs() == 1
+    assert pool.submitted == [job_id]
+    assert export_jobs.get_export_job(job_id)["owner"] == export_jobs._owner()
+
+
+def test_jobs_of_live_processes_are_not_requeued(export_db):
+    """A starting web process leaves the jobs of live processes running."""
+    with patch.object(export_jobs, "_get_pool", return_value=HeldPool()), \
+            patch.object(export_jobs, "EXPORT_WORKERS", 3):
+        live = export_jobs.submit_export_job("7", "admin", "csv", "permits", {})
+        remote = export_jobs.submit_export_job("7", "admin", "pdf", "permits", {})
+        dead = export_jobs.submit_export_job("7", "admin", "excel", "permits", {})
+    export_jobs._active.clear()
+
+    now = export_jobs._now()
+    set_job_owner(export_db, remote, "other-host:123", now)
+    # A process id that can't exist on this host
+    set_job_owner(export_db, dead, f"{export_jobs.socket.gethostname()}:{2 ** 22 + 1}", now)
+
+    pool = HeldPool()
+    with patch.object(export_jobs, "_get_pool", return_value=pool):
+        assert export_jobs.recover_export_jobs() == 1
+    assert pool.submitted == [dead]
+    assert export_jobs.get_export_job(live)["status"] == export_jobs.RUNNING
+    assert export_jobs.get_export_job(remote)["status"] == export_jobs.RUNNING
+
+
+def test_parquet_job(export_db):
+    """Parquet exports run through the job queue like the other formats."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    with patch.object(export_jobs, "_get_pool", return_value=HeldPool()):
+        job_id = export_jobs.submit_export_job("7", "admin", "parquet", "permits", {})
+
+    status = export_jobs.run_export_job(job_id, str(export_db / "app.db"), str(export_db / "exports"))
+    job = export_jobs.get_export_job(job_id)
+
+    assert status == export_jobs.COMPLETED
+    assert job["file_path"].endswith(".parquet")
+    assert job["rows_written"] == pq.read_table(job["file_path"]).num_rows == 30
@@ -0,0 +1,92 @@
+"""
+Tests for multi-source extraction into staging tables.
+"""
+import json
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from etl.extract import extract_sources, load_sources, staging_table_name
+from etl.refresh_pipeline import import_raw_data
+
+
+@pytest.fixture
+def test_db(tmp_path):
+    """Point database connections at an empty temporary database."""
+    db_path = tmp_path / "app.db"
+    sqlite3.connect(db_path).close()
+    with patch("db.connection.DB_PATH", str(db_path)):
+        yield db_path
+
+
+def write_csv(path, rows):
+    """Write permit rows to a CSV source file."""
+    lines = ["permit_number,valuation,status,date_status,action_by_dept"]
+    lines += [",".join(row) for row in rows]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_staging_table_name():
+    """Source names are normalized into safe table names."""
+    assert staging_table_name("Public Works") == "stg_public_works"
+
+
+def test_failing_source_is_isolated(test_db, tmp_path):
+    """A broken source is reported without affecting the others."""
+    sources = [
+        {"name": "fire", "path": write_csv(tmp_path / "fire.csv", [
+            ("F-1", "100", "Approved", "2024-01-01", "Fire"),
+            ("F-2", "200", "Pending", "2024-01-02", "Fire"),
+        ])},
+        {"name": "missing", "path": str(tmp_path / "missing.csv")},
+        {"name": "zoning", "path": write_csv(tmp_path / "zoning.csv", [
+            ("Z-1", "300", "Issued", "2024-02-01", "Zoning"),
+        ])},
+    ]
+
+    results = extract_sources(sources, max_workers=3, batch_size=1)
+    by_name = {r["name"]: r for r in results}
+
+    assert [r["name"] for r in results] == ["fire", "missing", "zoning"]
+    assert by_name["fire"]["status"] == "success"
+    assert by_name["fire"]["rows"] == 2
+    assert by_name["fire"]["quality"]["rows"] == 2
+    assert by_name["missing"]["status"] == "failed"
+    assert by_name["missing"]["error"]
+
+    conn = sqlite3.connect(test_db)
+    assert conn.execute("SELECT COUNT(*) FROM stg_fire").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM stg_zoning").fetchone()[0] == 1
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    assert "stg_missing" not in tables
+    assert "stg_missing__loading" not in tables
+
+
+def test_import_raw_data_from_config(test_db, tmp_path):
+    """Sources listed in the ETL_SOURCES file are imported."""
+    config = tmp_path / "sources.json"
+    config.write_text(json.dumps([
+        {"name": "fire", "path": write_csv(tmp_path / "fire.csv", [
+            ("F-1", "100", "Approved", "2024-01-01", "Fire"),
+        ])},
+    ]))
+
+    with patch.dict("os.environ", {"ETL_SOURCES": str(config)}):
+        assert [s["name"] for s in load_sources()] == ["fire"]
+        result = import_raw_data()
+
+    assert result["success"] is True
+    assert result["sources"][0]["rows"] == 1
+
+
+def test_import_raw_data_without_sources(test_db):
+    """With nothing configured the import is a successful no-op."""
+    with patch.dict("os.environ", {"ETL_SOURCES": ""}):
+        assert import_raw_data() == {"success": True, "sources": []}
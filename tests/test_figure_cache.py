@@ -0,0 +1,95 @@
+"""
+Tests for the serialized figure cache used by the dashboard charts.
+"""
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import generation
+from components import charts
+
+
+def setup_function():
+    """Start every test with an empty figure cache."""
+    charts._figure_cache.clear()
+
+
+def test_repeat_views_reuse_serialized_figure(tmp_path):
+    """The same rows in the same generation return the cached dict."""
+    rows = [("2024-01", 5), ("2024-02", 7)]
+    with patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        first = charts.get_trend_figure(rows)
+        second = charts.get_trend_figure(list(rows))
+
+    assert first is second
+    assert first["data"][0]["y"] == [5, 7]
+    assert charts._figure_cache.stats()["hits"] == 1
+
+
+def test_new_generation_rebuilds_figure(tmp_path):
+    """Bumping the data generation invalidates cached figures."""
+    rows = [("Approved", 3), ("Pending", 1)]
+    with patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        first = charts.get_status_figure(rows)
+        assert generation.bump_data_generation() == 1
+        second = charts.get_status_figure(rows)
+
+    assert first is not second
+    assert first == second
+
+
+def test_chart_components_use_cached_figures(tmp_path):
+    """The Graph components carry the cached figure dicts."""
+    with patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        graph = charts.build_trend_chart([("2024-01", 5)])
+        assert graph.figure is charts.get_trend_figure([("2024-01", 5)])
+
+
+def test_figure_patch_sends_only_trace_arrays(tmp_path):
+    """A partial update assigns the trace arrays and title of the cached figure."""
+    rows = [("Pending", 2), ("Approved", 5), ("Unheard Of", 1)]
+    with patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        update = charts.figure_patch("status", rows).to_plotly_json()
+        figure = charts.get_status_figure(rows)
+
+    assigned = {
+        tuple(op["location"]): op["params"]["value"] for op in update["operations"]
+    }
+    assert assigned == {
+        ("data", 0, "x"): [1, 2, 5],
+        ("data", 0, "y"): ["Unheard Of", "Pending", "Approved"],
+        ("data", 0, "marker", "color"): figure["data"][0]["marker"]["color"],
+        ("layout", "title", "text"): "Permit Status Distribution",
+    }
+
+
+def test_empty_figures_keep_their_trace(tmp_path):
+    """Figures without rows still have the single trace that patches target."""
+    with patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        for figure in (charts.get_trend_figure([]), charts.get_status_figure([])):
+            assert len(figure["data"]) == 1
+            assert figure["layout"]["title"]["text"] == "No Data Available"
+
+
+def test_figure_built_during_bump_is_not_served_as_new(tmp_path):
+    """A figure that started before an ETL bump is cached for the old generation."""
+    rows = [("2024-01", 5)]
+    builds = []
+
+    def build(rows):
+        builds.append(rows)
+        if len(builds) == 1:
+            generation.bump_data_generation()
+        return charts._build_trend_figure(rows)
+
+    with patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"), \
+            patch("db.connection.DB_PATH", str(tmp_path / "app.db")):
+        charts._cached_figure("trend", rows, build)
+        charts._cached_figure("trend", rows, build)
+        charts._figure_cache.clear()
+        charts._cached_figure("trend", rows, build)
+
+    assert len(builds) == 2
@@ -0,0 +1,43 @@
+"""
+Tests for the cached sidebar filter options.
+"""
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import generation
+from cache.generation import bump_data_generation
+from db.queries import get_filter_options
+from layout.base import serve_layout
+
+
+def test_options_cached_until_next_generation(tmp_path):
+    """Page loads reuse the options; an ETL run (new generation) refreshes them."""
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE vw_filters (year TEXT, month TEXT, action_by_dept TEXT)")
+    conn.execute("INSERT INTO vw_filters VALUES ('2023', '01', 'Fire')")
+    conn.commit()
+
+    with patch("db.connection.DB_PATH", str(db_path)), \
+            patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        get_filter_options.cache.clear()
+        assert get_filter_options("year") == ["2023"]
+
+        conn.execute("INSERT INTO vw_filters VALUES ('2024', '02', 'Building')")
+        conn.commit()
+        misses = get_filter_options.cache.stats()["misses"]
+        serve_layout()
+        serve_layout()
+        assert get_filter_options("year") == ["2023"]
+        # Only the first page load reads month and department options
+        assert get_filter_options.cache.stats()["misses"] - misses == 2
+
+        bump_data_generation()
+        assert get_filter_options("year") == ["2023", "2024"]
+
+    conn.close()
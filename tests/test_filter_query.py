@@ -0,0 +1,202 @@
+"""
+Tests for translating DataTable filter and sort expressions into SQL.
+"""
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import generation
+from components.datatable import TABLE_COLUMNS
+from db import queries, user_queries
+from db.filter_query import (
+    FilterQueryError, build_order_by, build_where, page_count, parse_filter_query
+)
+
+COLUMNS = {"Status": "status", "Valuation": "valuation", "Date": "date_filed", "Permit Number": "permit_number"}
+
+
+def test_parse_native_filter_syntax():
+    """Terms produced by the DataTable filter row are understood."""
+    terms = parse_filter_query(
+        '{Status} scontains App && {Valuation} >= 1000 && {Date} datestartswith "2024-01"'
+        " && {Permit Number} is blank && {Status} i= 'in review'"
+    )
+
+    assert [(t.column, t.operator, t.value, t.case_sensitive) for t in terms] == [
+        ("Status", "contains", "App", True),
+        ("Valuation", ">=", 1000, None),
+        ("Date", "datestartswith", "2024-01", None),
+        ("Permit Number", "is blank", None, None),
+        ("Status", "=", "in review", False),
+    ]
+
+
+def test_quoted_values_may_contain_operators():
+    """&& inside quotes is part of the value."""
+    terms = parse_filter_query('{Status} contains "a && b" && {Valuation} lt 5')
+    assert [t.value for t in terms] == ["a && b", 5]
+
+
+def test_where_clause_is_parameterized():
+    """Values are bound, never interpolated."""
+    condition, params = build_where(
+        "{Status} = \"x'; DROP TABLE permits; --\" && {Date} datestartswith 2024-01 "
+        "&& {Status} icontains 50%",
+        COLUMNS
+    )
+
+    assert "DROP" not in condition
+    assert condition == (
+        "status = ? AND (date_filed >= ? AND date_filed < ?) AND status LIKE ? ESCAPE '\\'"
+    )
+    assert params == ["x'; DROP TABLE permits; --", "2024-01", "2024-02", "%50\\%%"]
+
+
+def test_contains_is_case_sensitive_by_default():
+    """Only the i prefix makes contains ignore case, as in the browser."""
+    assert build_where("{Status} contains App", COLUMNS) == ("instr(status, ?) > 0", ["App"])
+    assert build_where("{Status} scontains App", COLUMNS) == ("instr(status, ?) > 0", ["App"])
+    assert build_where("{Status} icontains App", COLUMNS)[0] == "status LIKE ? ESCAPE '\\'"
+
+
+def test_unknown_columns_and_syntax_rejected():
+    """Only whitelisted columns reach the SQL; unsupported syntax raises."""
+    with pytest.raises(FilterQueryError):
+        build_where("{id; DROP TABLE permits} = 1", COLUMNS)
+    with pytest.raises(FilterQueryError):
+        build_where("{Status} = a || {Status} = b", COLUMNS)
+    with pytest.raises(FilterQueryError):
+        build_order_by([{"column_id": "Status", "direction": "sideways"}], COLUMNS)
+
+    assert build_where("", COLUMNS) == ("1=1", [])
+    assert build_order_by(
+        [{"column_id": "Valuation", "direction": "desc"}, {"column_id": "Status", "direction": "asc"}],
+        COLUMNS
+    ) == "valuation DESC, status ASC"
+    assert page_count(0, 10) == 1 and page_count(21, 10) == 3
+
+
+def test_every_permit_table_column_is_whitelisted():
+    """The table's columns and the server-side whitelist stay in sync."""
+    assert set(TABLE_COLUMNS) == set(queries.PERMIT_TABLE_COLUMNS)
+
+
+def test_date_prefix_uses_index(tmp_path):
+    """Date prefixes become ranges that SQLite can answer from an index."""
+    conn = sqlite3.connect(tmp_path / "plan.db")
+    conn.execute("CREATE TABLE permits (status TEXT, date_filed TEXT)")
+    conn.execute("CREATE INDEX idx_date ON permits (date_filed)")
+    condition, params = build_where("{Date} datestartswith 2024-01", COLUMNS)
+
+    plan = conn.execute(f"EXPLAIN QUERY PLAN SELECT * FROM permits WHERE {condition}", params).fetchall()
+    assert "idx_date" in " ".join(str(row[-1]) for row in plan)
+    conn.close()
+
+
+def test_permit_page_filters_sorts_and_pages(tmp_path):
+    """Only the requested page of matching permits is returned."""
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        CREATE TABLE permits (
+            permit_number TEXT, permit_type TEXT, permit_subtype TEXT, status TEXT,
+            description TEXT, valuation TEXT, date_filed TEXT, date_issued TEXT,
+            date_completed TEXT, action_by_dept TEXT, address TEXT, contractor TEXT
+        )
+        """
+    )
+    conn.executemany(
+        "INSERT INTO permits (permit_number, status, valuation, date_filed, action_by_dept) "
+        "VALUES (?, ?, ?, ?, 'Fire')",
+        [(f"P-{i:03d}", "Approved" if i % 2 else "Pending", str(i * 100), f"2024-01-{i % 28 + 1:02d}")
+         for i in range(1, 101)]
+    )
+    conn.commit()
+    conn.close()
+
+    with patch("db.connection.DB_PATH", str(db_path)), \
+            patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        page = queries.get_permit_page(
+            dept="Fire",
+            filter_query="{Status} s= Approved && {Valuation} > 5000",
+            sort_by=[{"column_id": "Valuation", "direction": "desc"}],
+            page_current=1,
+            page_size=10,
+        )
+
+    assert page["total_count"] == 25
+    assert [row[0] for row in page["rows"]] == [f"P-{i:03d}" for i in range(79, 59, -2)]
+
+
+def test_audit_log_page(tmp_path):
+    """The audit log query combines the panel filters with the table's."""
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript((Path(__file__).parent.parent / "schema" / "schema.sql").read_text())
+    conn.executemany(
+        "INSERT INTO admin_events (user_id, event_type, timestamp, metadata) VALUES (?, ?, ?, ?)",
+        [("admin@localhost", "user_updated" if i % 3 else "role_changed", f"2024-05-{i:02d} 10:00:00", None)
+         for i in range(1, 31)]
+    )
+    conn.commit()
+    conn.close()
+
+    with patch("db.connection.DB_PATH", str(db_path)):
+        page = user_queries.get_audit_log_page(
+            start_date="2024-05-10 00:00:00",
+            filter_query="{event_type} = role_changed && {user_email} icontains ADMIN",
+            sort_by=[{"column_id": "timestamp", "direction": "asc"}],
+            page_size=3,
+        )
+
+    assert page["total_count"] == 7
+    assert [row["timestamp"][:10] for row in page["rows"]] == ["2024-05-12", "2024-05-15", "2024-05-18"]
+    assert page["rows"][0]["user_email"] == "admin@localhost"
+
+
+def test_audit_log_view_logged_once(tmp_path):
+    """Opening the audit log is logged once, not for every page or sort change."""
+    import dash
+    from dash._callback_context import context_value
+    from dash._utils import AttributeDict
+    from components.admin import audit_log
+
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript((Path(__file__).parent.parent / "schema" / "schema.sql").read_text())
+    conn.execute("INSERT INTO users (user_id, email, provider) VALUES ('system', 'system', 'local')")
+    conn.executemany(
+        "INSERT INTO admin_events (user_id, event_type, timestamp) VALUES ('admin@localhost', 'login', ?)",
+        [(f"2024-05-{i:02d} 10:00:00",) for i in range(1, 5)]
+    )
+    conn.commit()
+    conn.close()
+
+    app = dash.Dash(__name__)
+    audit_log.register_callbacks(app)
+    load = next(
+        entry["callback"].__wrapped__ for key, entry in app.callback_map.items()
+        if "audit-table.data" in key
+    )
+
+    def trigger(prop_id, page_current=0, sort_by=None):
+        context_value.set(AttributeDict(triggered_inputs=[{"prop_id": prop_id, "value": 1}]))
+        with app.server.test_request_context():
+            rows, *_ = load(1, None, None, None, None, None, page_current, 20, "", sort_by or [])
+        return rows
+
+    with patch("db.connection.DB_PATH", str(db_path)):
+        # The view's own event isn't part of the page it loads
+        assert len(trigger("refresh-audit-btn.n_clicks")) == 4
+        trigger("audit-table.page_current", page_current=1)
+        trigger("audit-table.sort_by", sort_by=[{"column_id": "timestamp", "direction": "asc"}])
+        events = user_queries.get_audit_log_page(event_types=["view_audit_log"])
+
+    assert events["total_count"] == 1
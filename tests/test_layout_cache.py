@@ -0,0 +1,102 @@
+"""
+Tests for the per-user dashboard layout cache.
+"""
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import generation
+from cache.memory import LRUCache
+from layout import layout_manager
+
+SAVED = [{"i": "kpi-1", "x": 0, "y": 0, "w": 12, "h": 2}]
+
+
+@pytest.fixture
+def saved_layouts(tmp_path):
+    """Isolated layout cache and generation, with mocked layout queries."""
+    versions = {"alice": 1, "bob": 1}
+
+    def bump(user_id, *args, **kwargs):
+        versions[user_id] += 1
+        return versions[user_id]
+
+    with patch.object(generation, "LAYOUT_GENERATION_FILE", tmp_path / "layout_generation"), \
+            patch.object(layout_manager, "_layout_cache", LRUCache()), \
+            patch.object(layout_manager, "get_user_layout", return_value=SAVED) as query, \
+            patch.object(layout_manager, "get_user_layout_version", side_effect=versions.get), \
+            patch.object(layout_manager, "save_user_layout", side_effect=bump), \
+            patch.object(layout_manager, "bump_user_layout_version", side_effect=bump):
+        yield query
+
+
+def test_repeated_builds_are_cached(saved_layouts):
+    """Navigating again doesn't re-query or rebuild the user's layout."""
+    first = layout_manager.build_dashboard_layout("alice")
+    second = layout_manager.build_dashboard_layout("alice")
+
+    assert second is first
+    assert saved_layouts.call_count == 1
+
+    layout_manager.build_dashboard_layout("bob")
+    assert saved_layouts.call_count == 2
+
+
+def test_save_invalidates_cached_build(saved_layouts):
+    """Saving a layout makes the next build read it again."""
+    first = layout_manager.build_dashboard_layout("alice")
+    assert layout_manager.save_dashboard_layout("alice", SAVED)
+
+    assert layout_manager.build_dashboard_layout("alice") is not first
+    assert saved_layouts.call_count == 2
+
+
+def test_invalidation_is_seen_by_other_processes(saved_layouts):
+    """The layout generation file is the shared invalidation signal."""
+    layout_manager.build_dashboard_layout("alice")
+
+    # Another worker process saves alice's layout and bumps the generation
+    layout_manager.save_user_layout("alice", SAVED)
+    generation.LAYOUT_GENERATION_FILE.write_text("7")
+
+    layout_manager.build_dashboard_layout("alice")
+    assert saved_layouts.call_count == 2
+
+
+def test_other_users_builds_survive_a_save(saved_layouts):
+    """A save only rebuilds the layout of the user who saved."""
+    bob = layout_manager.build_dashboard_layout("bob")
+    layout_manager.build_dashboard_layout("alice")
+    assert layout_manager.save_dashboard_layout("alice", SAVED)
+
+    assert layout_manager.build_dashboard_layout("bob") is bob
+    layout_manager.build_dashboard_layout("alice")
+    assert saved_layouts.call_count == 3
+
+
+def test_admin_override_rebuilds_the_users_layout(saved_layouts):
+    """An admin layout override drops the user's cached build, but no one else's."""
+    import dash
+    from components.admin import layout_overrides
+
+    app = dash.Dash(__name__)
+    layout_overrides.register_callbacks(app)
+    save_layout = next(
+        entry["callback"].__wrapped__ for key, entry in app.callback_map.items()
+        if "layout-notification.is_open" in key
+    )
+
+    alice = layout_manager.build_dashboard_layout("alice")
+    bob = layout_manager.build_dashboard_layout("bob")
+    with patch.object(layout_overrides, "log_admin_event"):
+        is_open, *_ = save_layout(1, "alice", SAVED)
+
+    assert is_open
+    assert layout_manager.build_dashboard_layout("alice") is not alice
+    assert layout_manager.build_dashboard_layout("bob") is bob
+    assert saved_layouts.call_count == 3
@@ -71,7 +71,7 @@ class TestLayoutPersistence:
         # Save layout
         with patch('db.connection.DB_PATH', TEST_DB):
             result = save_user_layout(self.test_user, self.test_layout)
-            assert result is None  # save_user_layout doesn't return anything
+            assert result == 1  # the first save creates version 1
             
             # Retrieve layout
             saved_layout = get_user_layout(self.test_user)
@@ -0,0 +1,148 @@
+"""
+Tests for diff-based, versioned layout saves.
+"""
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import generation
+from cache.memory import LRUCache
+from db.migrations import run_migrations
+from db.queries import (
+    LayoutConflictError, delete_user_layout, get_user_layout, get_user_layout_version,
+    save_user_layout
+)
+from layout import layout_manager
+from layout.layout_manager import commit_dashboard_layout
+
+LAYOUT = [
+    {"i": "kpi-1", "x": 0, "y": 0, "w": 12, "h": 2},
+    {"i": "chart-trend", "x": 0, "y": 2, "w": 6, "h": 3},
+]
+
+
+@pytest.fixture
+def layout_db(tmp_path):
+    """A database with the layout tables from the migrations."""
+    db_path = tmp_path / "app.db"
+    run_migrations(str(db_path))
+    conn = sqlite3.connect(db_path)
+    # Record which components each save writes
+    conn.executescript("""
+        CREATE TABLE writes (component_id TEXT);
+        CREATE TRIGGER layout_insert AFTER INSERT ON user_layouts
+        BEGIN INSERT INTO writes VALUES (NEW.component_id); END;
+        CREATE TRIGGER layout_update AFTER UPDATE ON user_layouts
+        BEGIN INSERT INTO writes VALUES (NEW.component_id); END;
+    """)
+    conn.close()
+
+    with patch("db.connection.DB_PATH", str(db_path)), \
+            patch.object(generation, "LAYOUT_GENERATION_FILE", tmp_path / "layout_generation"), \
+            patch.object(layout_manager, "_layout_cache", LRUCache()):
+        yield db_path
+
+
+def written(db_path):
+    """Components written since the last call."""
+    conn = sqlite3.connect(db_path)
+    rows = [row[0] for row in conn.execute("SELECT component_id FROM writes")]
+    conn.execute("DELETE FROM writes")
+    conn.commit()
+    conn.close()
+    return sorted(rows)
+
+
+def test_first_save_creates_version_one(layout_db):
+    """Saving stores the layout and starts the version at 1."""
+    assert get_user_layout_version("alice") == 0
+    assert save_user_layout("alice", LAYOUT, expected_version=0) == 1
+    assert sorted(get_user_layout("alice"), key=lambda item: item["i"]) == sorted(
+        LAYOUT, key=lambda item: item["i"]
+    )
+
+
+def test_unchanged_layout_is_not_written(layout_db):
+    """Saving the same layout again writes nothing and keeps the version."""
+    save_user_layout("alice", LAYOUT)
+    written(layout_db)
+
+    assert save_user_layout("alice", [dict(item, moved=False) for item in LAYOUT], 1) == 1
+    assert written(layout_db) == []
+
+
+def test_only_changed_components_are_written(layout_db):
+    """Moved components are upserted and dropped ones deleted."""
+    save_user_layout("alice", LAYOUT)
+    written(layout_db)
+    moved = [{"i": "kpi-1", "x": 0, "y": 4, "w": 12, "h": 2}]
+
+    assert save_user_layout("alice", moved, expected_version=1) == 2
+    assert written(layout_db) == ["kpi-1"]
+    assert get_user_layout("alice") == moved
+
+
+def test_stale_save_is_rejected(layout_db):
+    """A save based on an outdated version raises and changes nothing."""
+    save_user_layout("alice", LAYOUT)
+    save_user_layout("alice", LAYOUT[:1], expected_version=1)
+
+    with pytest.raises(LayoutConflictError) as excinfo:
+        save_user_layout("alice", LAYOUT, expected_version=1)
+
+    assert excinfo.value.current == 2
+    assert get_user_layout("alice") == LAYOUT[:1]
+
+
+def test_delete_bumps_version(layout_db):
+    """Resetting to the default layout counts as a change."""
+    save_user_layout("alice", LAYOUT)
+    assert delete_user_layout("alice") == 2
+    assert get_user_layout("alice") == []
+
+
+def layout_actions(triggered):
+    """The layout callback, called as if ``triggered`` had fired."""
+    import dash
+    from dash._callback_context import context_value
+    from dash._utils import AttributeDict
+    from callbacks.layout_callbacks import register_layout_callbacks
+
+    app = dash.Dash(__name__)
+    register_layout_callbacks(app)
+    callback = next(
+        entry["callback"].__wrapped__ for key, entry in app.callback_map.items()
+        if "layout-saved.data" in key
+    )
+    context_value.set(AttributeDict(
+        triggered_inputs=[{"prop_id": triggered, "value": 1}]
+    ))
+    return callback
+
+
+def test_stale_page_save_is_rejected(layout_db):
+    """A page loaded before another window saved can't overwrite that save."""
+    save_user_layout("alice", LAYOUT)
+    user = {"user_id": "alice"}
+
+    # Page load: the version shown is remembered
+    load = layout_actions("current-user.modified_timestamp")
+    *_, saved = load(None, None, None, 1, user, None, None)
+    assert saved["version"] == 1
+
+    # Another window saves in the meantime
+    commit_dashboard_layout("alice", LAYOUT[:1], expected_version=1)
+
+    # The stale page's save is rejected and the latest layout is shown
+    save = layout_actions("save-layout-btn.n_clicks")
+    layout, _, message, status_class, saved = save(1, None, None, 1, user, LAYOUT, saved)
+    assert status_class == "text-warning"
+    assert saved["version"] == 2
+    assert [item["i"] for item in layout] == ["kpi-1"]
+    assert get_user_layout("alice") == LAYOUT[:1]
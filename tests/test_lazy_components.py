@@ -0,0 +1,52 @@
+"""
+Tests for lazy construction of dashboard grid components.
+"""
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache.memory import LRUCache
+from layout import layout_manager
+
+KPI_ONLY = [{"i": "kpi-1", "x": 0, "y": 0, "w": 12, "h": 2}]
+
+
+def test_listing_components_builds_nothing():
+    """Component metadata is available without constructing any content."""
+    with patch.object(layout_manager, "build_trend_chart") as trend, \
+            patch.object(layout_manager, "build_status_chart") as status, \
+            patch.object(layout_manager, "build_permit_table") as table:
+        components = layout_manager.get_layout_components()
+
+    assert set(components) == {"kpi-1", "chart-trend", "chart-status", "table-permits"}
+    assert all(callable(c["factory"]) for c in components.values())
+    assert not (trend.called or status.called or table.called)
+
+
+def test_only_components_in_layout_are_built():
+    """Components missing from the user's layout are never constructed."""
+    with patch.object(layout_manager, "get_user_layout", return_value=KPI_ONLY), \
+            patch.object(layout_manager, "get_default_layout", return_value=[]), \
+            patch.object(layout_manager, "_layout_cache", LRUCache()), \
+            patch.object(layout_manager, "get_user_layout_version", return_value=0), \
+            patch.object(layout_manager, "build_trend_chart") as trend, \
+            patch.object(layout_manager, "build_permit_table") as table:
+        result = layout_manager.build_dashboard_layout("user-1")
+
+    assert [item["i"] for item in result["layout"]] == ["kpi-1"]
+    assert len(result["components"]) == 1
+    assert not trend.called and not table.called
+
+
+def test_visibility_stores_cover_every_component():
+    """Each component has a hidden-by-default Store outside the grid."""
+    stores = layout_manager.build_visibility_stores()
+    ids = {store.id for store in stores}
+
+    for component_id in layout_manager.get_layout_components():
+        assert layout_manager.visibility_store_id(component_id) in ids
+    assert "visibility-poll" in ids
+    assert all(store.data is False for store in stores if store.id != "visibility-poll")
@@ -0,0 +1,113 @@
+"""
+Tests for the paginated PDF report renderer.
+"""
+import io
+import re
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fpdf import FPDF
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from components import export_utils, pdf_report
+
+COLUMNS = ["permit_number", "status", "description"]
+
+
+def rows(count):
+    """Permit-like rows, one chunk per 25 rows."""
+    data = [(f"P-{i}", "Approved", "Replace roof " * (i % 5)) for i in range(count)]
+    return [data[i:i + 25] for i in range(0, count, 25)]
+
+
+def page_count(pdf_bytes):
+    """Number of pages in a rendered PDF."""
+    return len(re.findall(rb"/Type /Page\b(?!s)", pdf_bytes))
+
+
+def test_layout_fits_the_page():
+    """Narrow tables stay portrait; wide ones turn landscape and are scaled to fit."""
+    narrow = pdf_report.compute_layout(COLUMNS, rows(10)[0])
+    assert narrow.orientation == "P"
+    assert narrow.rows_per_page > narrow.rows_first_page > 0
+    assert all(pdf_report.MIN_COLUMN_WIDTH <= w <= pdf_report.MAX_COLUMN_WIDTH
+               for w in narrow.column_widths)
+
+    header = [f"column_{i}" for i in range(20)]
+    wide = pdf_report.compute_layout(header, [tuple("x" * 30 for _ in header)])
+    assert wide.orientation == "L"
+    right = wide.column_x[-1] + wide.column_widths[-1]
+    assert right == pytest.approx(297 - pdf_report.MARGIN)
+
+
+def test_cells_are_cut_to_the_column():
+    """Long values are shortened with an ellipsis and kept to latin-1."""
+    assert pdf_report._format("abcdefghij", 6) == "abc..."
+    assert pdf_report._format(None, 6) == ""
+    assert pdf_report._format("café ✓", 10) == "café ?"
+
+
+def test_pages_repeat_the_header():
+    """Rows are split into pages, each starting with the header row."""
+    layout = pdf_report.compute_layout(COLUMNS, rows(100)[0])
+    expected_pages = 1 + -(-(100 - layout.rows_first_page) // layout.rows_per_page)
+
+    drawn = []
+    with patch.object(pdf_report._ReportPDF, "text", autospec=True,
+                      side_effect=lambda pdf, x, y, text: drawn.append(text) or FPDF.text(pdf, x, y, text)):
+        output = io.BytesIO()
+        row_count = pdf_report.write_table_report(output, COLUMNS, rows(100), "Permits", "7", 100)
+
+    assert row_count == 100
+    assert page_count(output.getvalue()) == expected_pages
+    assert drawn.count("permit_number") == expected_pages
+    assert [text for text in drawn if text.startswith("P-")] == [f"P-{i}" for i in range(100)]
+
+
+def test_empty_report_has_one_page():
+    """A report without rows is a single page with the header."""
+    output = io.BytesIO()
+    assert pdf_report.write_table_report(output, COLUMNS, [], "Permits", "7") == 0
+    assert page_count(output.getvalue()) == 1
+
+
+def test_parallel_rendering_needs_pypdf():
+    """Without pypdf, parallel rendering falls back to this process."""
+    output = io.BytesIO()
+    with patch.object(pdf_report, "PdfWriter", None):
+        pdf_report.write_table_report(output, COLUMNS, rows(60), "Permits", "7", workers=4)
+    assert output.getvalue().startswith(b"%PDF")
+
+
+def test_parallel_page_ranges_are_merged():
+    """Page ranges rendered by workers are merged in order."""
+    pypdf = pytest.importorskip("pypdf")
+    with patch.object(pdf_report, "PAGES_PER_PART", 2):
+        output = io.BytesIO()
+        pdf_report.write_table_report(output, COLUMNS, rows(300), "Permits", "7", workers=2)
+        serial = io.BytesIO()
+        pdf_report.write_table_report(serial, COLUMNS, rows(300), "Permits", "7", workers=1)
+
+    merged = pypdf.PdfReader(io.BytesIO(output.getvalue()))
+    assert len(merged.pages) == page_count(serial.getvalue())
+    assert "Page 3" in merged.pages[2].extract_text()
+
+
+def test_export_to_pdf_masks_columns(tmp_path):
+    """Masked columns are left out of PDF exports."""
+    export_utils.set_export_dir(str(tmp_path))
+    rendered = {}
+
+    def render(output, header, chunks, *args):
+        rendered["header"], rendered["chunks"] = header, list(chunks)
+        return 1
+
+    with patch.object(export_utils, "write_table_report", side_effect=render):
+        export_utils.export_rows_to_pdf([[("P-1", 1000)]], ["permit_number", "salary"], "7",
+                                        role="user")
+
+    assert rendered == {"header": ["permit_number"], "chunks": [[["P-1"]]]}
@@ -0,0 +1,38 @@
+"""
+Tests for permit table records and column formats.
+"""
+from pathlib import Path
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from components.datatable import build_permit_table, permit_table_records
+
+
+def permit_row(number, valuation, date_filed):
+    """A row in get_filtered_permits column order."""
+    return (number, "Building", None, "Approved", "New roof", valuation, date_filed,
+            None, None, "Fire", "1 Main St", "ACME")
+
+
+def test_records_carry_raw_values():
+    """Valuations stay numbers, dates keep their date part, gaps are null."""
+    records = permit_table_records([
+        permit_row("P-1", 1234.5, "2024-03-05 10:11:12"),
+        permit_row("P-2", None, None),
+    ])
+
+    assert records[0]["Valuation"] == 1234.5
+    assert records[0]["Date"] == "2024-03-05"
+    assert records[1]["Valuation"] is None and records[1]["Date"] is None
+    assert records[0]["Permit Number"] == "P-1" and records[0]["Department"] == "Fire"
+
+
+def test_valuation_formatted_in_browser():
+    """The valuation column declares a money format instead of preformatted text."""
+    table = build_permit_table([]).children[1]
+    valuation = next(column for column in table.columns if column["id"] == "Valuation")
+
+    assert valuation["type"] == "numeric"
+    assert valuation["format"].to_plotly_json()["specifier"] == "$,.2f"
@@ -0,0 +1,155 @@
+"""
+Tests for filter popularity tracking and post-ETL cache prewarming.
+"""
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache import generation, prewarm
+from components import charts, downsampling
+from db import queries
+
+
+@pytest.fixture
+def dashboard_db(tmp_path):
+    """Point the app at a temporary database with a few permits."""
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE permits (
+            permit_number TEXT, permit_type TEXT, permit_subtype TEXT, status TEXT,
+            description TEXT, valuation TEXT, date_status TEXT, date_filed TEXT,
+            date_issued TEXT, date_completed TEXT, action_by_dept TEXT,
+            address TEXT, contractor TEXT
+        )
+    """)
+    conn.executemany(
+        """
+        INSERT INTO permits (permit_number, status, valuation, date_status,
+                             date_filed, action_by_dept)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [
+            ("P-1", "Approved", "100", "2024-01-05", "2024-01-02", "Fire"),
+            ("P-2", "Pending", "200", "2024-02-10", "2024-02-01", "Zoning"),
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+    with patch("db.connection.DB_PATH", str(db_path)), \
+            patch.object(generation, "GENERATION_FILE", tmp_path / "data_generation"):
+        prewarm._pending.clear()
+        charts._figure_cache.clear()
+        for func in (queries.get_kpi_totals, queries.get_permit_trends,
+                     queries.get_status_distribution, queries._get_permit_page):
+            func.cache.clear()
+        yield db_path
+
+
+def test_popular_filters_ranked_by_usage(dashboard_db):
+    """Buffered selections are flushed and ranked by total hits."""
+    for _ in range(3):
+        prewarm.record_filter_usage("2024", None, "Fire")
+    prewarm.record_filter_usage("2024", "01", None)
+    prewarm.record_filter_usage(None, None, None)
+
+    assert prewarm.flush_filter_usage() == 3
+    prewarm.record_filter_usage("2024", "01", None)
+    prewarm.flush_filter_usage()
+
+    assert prewarm.get_popular_filters(limit=2) == [
+        ("2024", None, "Fire"),
+        ("2024", "01", None),
+    ]
+
+
+def test_only_filter_changes_are_counted(dashboard_db):
+    """Page loads, visibility changes and zooms don't count as selections."""
+    import dash
+    from dash._callback_context import context_value
+    from dash._utils import AttributeDict
+    from callbacks.visual_callbacks import register_visual_callbacks
+    from layout.layout_manager import visibility_store_id
+
+    app = dash.Dash(__name__)
+    register_visual_callbacks(app)
+    update_trend_chart = next(
+        entry["callback"].__wrapped__ for key, entry in app.callback_map.items()
+        if key == "permit-trend-chart.figure"
+    )
+
+    zoom = {"xaxis.range[0]": "2024-01-01", "xaxis.range[1]": "2024-01-31"}
+    triggers = {
+        None: "Parks",
+        f"{visibility_store_id('chart-trend')}.data": "Zoning",
+        "permit-trend-chart.relayoutData": "Police",
+        "filter-department.value": "Fire",
+    }
+    for triggered, dept in triggers.items():
+        inputs = [{"prop_id": triggered, "value": 1}] if triggered else []
+        context_value.set(AttributeDict(triggered_inputs=inputs))
+        update_trend_chart("2024", None, dept, zoom, True, 800, None)
+
+    prewarm.flush_filter_usage()
+    assert prewarm.get_popular_filters(limit=5) == [("2024", None, "Fire")]
+
+
+def test_warm_popular_views_fills_caches(dashboard_db):
+    """Warming computes queries and figures for the popular views."""
+    prewarm.record_filter_usage("2024", None, "Fire")
+
+    stats = prewarm.warm_popular_views(limit=5)
+
+    assert stats["views"] == 2
+    assert stats["failed"] == 0
+
+    # Later requests for a warmed view are served from the caches
+    query_hits = queries.get_permit_trends.cache.stats()["hits"]
+    figure_hits = charts._figure_cache.stats()["hits"]
+    trends = downsampling.get_trend_series("2024", None, "Fire")
+    charts.get_trend_figure(trends)
+
+    assert queries.get_permit_trends.cache.stats()["hits"] == query_hits + 1
+    assert charts._figure_cache.stats()["hits"] == figure_hits + 1
+
+
+def test_warmed_trend_matches_measured_widths(dashboard_db):
+    """Long trends are warmed for the widths the browser reports."""
+    conn = sqlite3.connect(dashboard_db)
+    conn.executemany(
+        "INSERT INTO permits (permit_number, date_status, action_by_dept) VALUES (?, date('2020-01-01', ?), 'Fire')",
+        [(f"L-{i}", f"+{i} days") for i in range(3000)]
+    )
+    conn.commit()
+    conn.close()
+
+    prewarm.warm_view()
+    query_hits = queries.get_permit_trends.cache.stats()["hits"]
+    figure_hits = charts._figure_cache.stats()["hits"]
+
+    for width in (760, 1130, 1650):
+        charts.get_trend_figure(downsampling.get_trend_series(width=width))
+
+    assert queries.get_permit_trends.cache.stats()["hits"] == query_hits + 3
+    assert charts._figure_cache.stats()["hits"] == figure_hits + 3
+
+
+def test_query_cache_follows_data_generation(dashboard_db):
+    """A new data generation makes the queries hit the database again."""
+    assert queries.get_kpi_totals()["total_permits"] == 2
+
+    conn = sqlite3.connect(dashboard_db)
+    conn.execute("DELETE FROM permits WHERE permit_number = 'P-2'")
+    conn.commit()
+    conn.close()
+
+    assert queries.get_kpi_totals()["total_permits"] == 2
+    generation.bump_data_generation()
+    assert queries.get_kpi_totals()["total_permits"] == 1
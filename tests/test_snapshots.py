@@ -0,0 +1,98 @@
+"""
+Tests for the Parquet table snapshots written at the end of the ETL.
+"""
+import pytest
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+pytest.importorskip("pyarrow")
+
+from etl import snapshots
+
+
+@pytest.fixture
+def snapshot_env(tmp_path):
+    """Point the snapshot module at a temporary database and directory."""
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+    CREATE TABLE permits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        permit_number TEXT NOT NULL,
+        description TEXT,
+        valuation REAL,
+        status TEXT,
+        date_status DATE,
+        action_by_dept TEXT
+    )
+    """)
+    conn.executemany(
+        """
+        INSERT INTO permits (permit_number, valuation, status, date_status, action_by_dept)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [
+            ("PER-1", 100.0, "Approved", "2023-01-15", "Fire"),
+            ("PER-2", 250.0, "Pending", "2023-02-01", "Zoning"),
+            ("PER-3", 75.5, "Approved", "2024-03-10", "Fire"),
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+    with patch("db.connection.DB_PATH", str(db_path)), \
+         patch.object(snapshots, "SNAPSHOT_DIR", tmp_path / "snapshots"):
+        yield tmp_path / "snapshots"
+
+
+def test_write_snapshots_partitions_by_year(snapshot_env):
+    """Each year gets its own partition directory."""
+    stats = snapshots.write_snapshots(batch_size=2)
+
+    assert stats["permits"]["rows"] == 3
+    partitions = sorted(p.name for p in (snapshot_env / "permits").iterdir())
+    assert partitions == ["year=2023", "year=2024"]
+
+
+def test_load_snapshot_filters_years(snapshot_env):
+    """Loading a subset of years only returns rows from those partitions."""
+    snapshots.write_snapshots()
+
+    table = snapshots.load_snapshot("permits", years=[2023])
+    assert table.num_rows == 2
+    assert set(table.column("permit_number").to_pylist()) == {"PER-1", "PER-2"}
+
+    rollups = snapshots.load_snapshot("permit_rollups").to_pylist()
+    fire_2023 = [r for r in rollups if r["year"] == "2023" and r["action_by_dept"] == "Fire"]
+    assert fire_2023[0]["permit_count"] == 1
+    assert fire_2023[0]["total_valuation"] == 100.0
+
+
+def test_load_missing_snapshot_returns_none(snapshot_env):
+    """A snapshot that was never written reads as None."""
+    assert snapshots.load_snapshot("permits") is None
+
+
+def test_mixed_type_columns_fit_every_batch(snapshot_env, tmp_path):
+    """Values of other storage classes after the first batch don't break the schema."""
+    conn = sqlite3.connect(tmp_path / "app.db")
+    conn.execute(
+        "INSERT INTO permits (permit_number, valuation, date_status) VALUES (?, ?, ?)",
+        ("PER-4", "n/a", "2024-04-01")
+    )
+    conn.commit()
+    conn.close()
+
+    snapshots.write_snapshots(["permits"], batch_size=1)
+    table = snapshots.load_snapshot("permits")
+
+    assert table.schema.field("valuation").type == snapshots.pa.string()
+    assert table.schema.field("id").type == snapshots.pa.int64()
+    values = dict(zip(table.column("permit_number").to_pylist(),
+                      table.column("valuation").to_pylist()))
+    assert values == {"PER-1": "100.0", "PER-2": "250.0", "PER-3": "75.5", "PER-4": "n/a"}
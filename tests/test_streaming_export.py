@@ -0,0 +1,141 @@
+"""
+Tests for exports streamed from the database cursor.
+"""
+import csv
+import io
+import json
+import sqlite3
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from callbacks.export_callbacks import register_export_routes
+from components import export_utils
+from components.datatable import PERMIT_QUERY_COLUMNS
+from db import queries
+from db.filter_query import FilterQueryError
+
+
+@pytest.fixture
+def permits_db(tmp_path):
+    """Point the app at a temporary database with 25 permits."""
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE permits ({', '.join(PERMIT_QUERY_COLUMNS)})")
+    conn.executemany(
+        "INSERT INTO permits (permit_number, status, valuation, date_filed, action_by_dept) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            (f"P-{i:02d}", "Approved" if i % 2 else "Pending", f"${i * 100}",
+             f"2024-{i % 12 + 1:02d}-01", "Fire" if i < 20 else "Zoning")
+            for i in range(25)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+    with patch("db.connection.DB_PATH", str(db_path)):
+        yield db_path
+
+
+def test_rows_arrive_in_chunks(permits_db):
+    """The cursor is read in fetchmany chunks with the filters applied."""
+    chunks = list(queries.iter_permit_rows(dept="Fire", chunk_size=8))
+
+    assert [len(chunk) for chunk in chunks] == [8, 8, 4]
+    assert all(row[9] == "Fire" for chunk in chunks for row in chunk)
+
+    sorted_chunks = queries.iter_permit_rows(
+        filter_query="{Status} = Pending",
+        sort_by=[{"column_id": "Permit Number", "direction": "asc"}],
+        chunk_size=100
+    )
+    numbers = [row[0] for chunk in sorted_chunks for row in chunk]
+    assert numbers == [f"P-{i:02d}" for i in range(0, 25, 2)]
+
+
+def test_invalid_filter_raises_before_streaming(permits_db):
+    """Unsupported table filters are rejected when the iterator is created."""
+    with pytest.raises(FilterQueryError):
+        queries.iter_permit_rows(filter_query="{ssn} = 1")
+
+
+def test_csv_written_from_chunks(permits_db, tmp_path):
+    """Chunked CSV export matches the query and counts its rows."""
+    export_utils.set_export_dir(str(tmp_path / "exports"))
+    path, row_count = export_utils.export_rows_to_csv(
+        queries.iter_permit_rows(dept="Zoning", chunk_size=2),
+        PERMIT_QUERY_COLUMNS, "7", "permits", role="admin"
+    )
+
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert row_count == len(rows) == 5
+    assert list(rows[0]) == PERMIT_QUERY_COLUMNS
+    assert {row["permit_number"] for row in rows} == {f"P-{i}" for i in range(20, 25)}
+    # Newest filing first; valuations lose their currency symbol
+    assert (rows[0]["permit_number"], rows[0]["valuation"]) == ("P-23", "2300.0")
+
+
+def test_csv_masks_columns_by_role():
+    """Columns masked for a role are left out of the streamed CSV."""
+    columns = ["permit_number", "salary"]
+    text = "".join(export_utils.iter_csv([[("P-1", 100)], [("P-2", 200)]], columns, "user"))
+
+    assert text.splitlines() == ["permit_number", "P-1", "P-2"]
+
+
+def test_stream_route(permits_db):
+    """The route streams filtered permits and requires a signed-in user."""
+    server = Flask(__name__)
+    server.secret_key = "test"
+    register_export_routes(server)
+    client = server.test_client()
+
+    assert client.get("/exports/stream/permits.csv").status_code == 401
+
+    with client.session_transaction() as sess:
+        sess["user"] = {"user_id": "7", "role": "user"}
+
+    response = client.get("/exports/stream/permits.csv", query_string={
+        "dept": "Fire",
+        "sort_by": json.dumps([{"column_id": "Permit Number", "direction": "desc"}]),
+    })
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    assert "attachment" in response.headers["Content-Disposition"]
+
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == PERMIT_QUERY_COLUMNS
+    assert len(rows) == 21
+    assert rows[1][0] == "P-19"
+
+    bad = client.get("/exports/stream/permits.csv", query_string={"filter_query": "{x} = 1"})
+    assert bad.status_code == 400
+
+
+def test_stream_route_zip(permits_db):
+    """The ZIP download holds the filtered CSV and a PDF report."""
+    server = Flask(__name__)
+    server.secret_key = "test"
+    register_export_routes(server)
+    client = server.test_client()
+    with client.session_transaction() as sess:
+        sess["user"] = {"user_id": "7", "role": "admin"}
+
+    response = client.get("/exports/stream/permits.zip", query_string={"dept": "Zoning"})
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+
+    with zipfile.ZipFile(io.BytesIO(response.get_data())) as archive:
+        assert archive.namelist() == ["permits.csv", "permits.pdf"]
+        assert len(archive.read("permits.csv").decode().splitlines()) == 6
+        assert archive.read("permits.pdf").startswith(b"%PDF")
@@ -0,0 +1,77 @@
+"""
+Tests for the ETL data quality validation stage.
+"""
+import pandas as pd
+
+# Add parent directory to path for imports
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from etl.validation import DataQualityValidator, validate_batches
+
+
+def make_batch(**overrides):
+    """Build a small, clean batch of permit rows."""
+    data = {
+        "permit_number": ["PER-1", "PER-2", "PER-3", "PER-4"],
+        "valuation": [1000.0, 1200.0, 1100.0, 900.0],
+        "status": ["Approved", "Pending", "Issued", "Denied"],
+        "date_status": ["2024-01-05", "2024-02-10", "2024-03-15", "2024-04-20"],
+        "action_by_dept": ["Fire", "Zoning", "Building", "Planning"],
+    }
+    data.update(overrides)
+    return pd.DataFrame(data)
+
+
+def test_clean_batch_passes():
+    """A clean batch produces a passing report with no issues."""
+    report = validate_batches([make_batch()], source="permits")
+
+    assert report["passed"] is True
+    assert report["issues"] == []
+    assert report["rows"] == 4
+    assert report["dates"]["date_status"] == {
+        "min": "2024-01-05", "max": "2024-04-20", "invalid": 0, "out_of_range": 0
+    }
+
+
+def test_metrics_accumulate_across_batches():
+    """Counts and ranges are combined over all batches."""
+    validator = DataQualityValidator()
+    validator.update(make_batch())
+    validator.update(make_batch(
+        status=["Approved", "Lost", "Lost", "Mystery"],
+        date_status=["1850-01-01", "not a date", None, "2023-06-01"],
+    ))
+    report = validator.report()
+
+    assert report["rows"] == 8
+    assert report["unknown_statuses"] == {"Lost": 2, "Mystery": 1}
+    assert report["dates"]["date_status"]["min"] == "1850-01-01"
+    assert report["dates"]["date_status"]["invalid"] == 1
+    assert report["dates"]["date_status"]["out_of_range"] == 1
+    assert report["null_rates"]["date_status"] == 0.125
+
+
+def test_valuation_checks():
+    """Currency strings are parsed; negatives and outliers are counted."""
+    report = validate_batches([make_batch(
+        valuation=["$1,000", "-50", "abc", "$9,999,999"],
+    ), make_batch()], source="permits")
+
+    valuation = report["valuation"]
+    assert valuation["non_numeric"] == 1
+    assert valuation["negative"] == 1
+    assert valuation["max"] == 9999999.0
+
+
+def test_missing_required_values_fail():
+    """Too many null permit numbers fails the report."""
+    report = validate_batches(
+        [make_batch(permit_number=["PER-1", None, "", "PER-4"])],
+        source="permits"
+    )
+
+    assert report["passed"] is False
+    assert report["null_rates"]["permit_number"] == 0.5
@@ -0,0 +1,90 @@
+"""
+Tests for streamed ZIP exports.
+"""
+import io
+import threading
+import zipfile
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from components import export_utils
+
+CHUNKS = [[(f"P-{i}", "Approved", i * 10.0) for i in range(start, start + 50)]
+          for start in range(0, 500, 50)]
+COLUMNS = ["permit_number", "status", "valuation"]
+
+
+def members():
+    return [
+        export_utils.csv_member("permits.csv", CHUNKS, COLUMNS, role="admin"),
+        ("notes.txt", lambda: [b"line\n" * 1000, b"end"]),
+    ]
+
+
+def read_zip(data):
+    """Member name -> content of an archive."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        return {info.filename: archive.read(info) for info in archive.infolist()}
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_members_streamed_into_archive(workers):
+    """Members are generated and compressed into one stream, in order."""
+    pieces = list(export_utils.iter_zip(members(), workers=workers))
+
+    contents = read_zip(b"".join(pieces))
+    assert list(contents) == ["permits.csv", "notes.txt"]
+    lines = contents["permits.csv"].decode().splitlines()
+    assert lines[0] == ",".join(COLUMNS) and lines[1] == "P-0,Approved,0.0"
+    assert len(lines) == 501
+    assert contents["notes.txt"].endswith(b"end")
+    assert len(pieces) > 1
+
+
+def test_compression_level_applies():
+    """The deflate level is configurable; level 0 stores members uncompressed."""
+    stored = b"".join(export_utils.iter_zip(members(), compresslevel=0))
+    compressed = b"".join(export_utils.iter_zip(members()))
+    assert read_zip(stored) == read_zip(compressed)
+    assert len(compressed) < len(stored) / 4
+
+
+def test_member_errors_reach_the_writer():
+    """A failing member fails the archive, also when generated in a thread."""
+    def broken():
+        yield b"partial"
+        raise RuntimeError("query failed")
+
+    for workers in (1, 2):
+        with pytest.raises(RuntimeError, match="query failed"):
+            b"".join(export_utils.iter_zip(members() + [("broken.csv", broken)], workers=workers))
+
+
+def test_abandoned_stream_stops_producers():
+    """Closing the stream early doesn't leave producer threads blocked."""
+    def endless():
+        while True:
+            yield b"x" * 65536
+
+    before = threading.active_count()
+    stream = export_utils.iter_zip([("a.bin", endless), ("b.bin", endless)], workers=2)
+    next(stream)
+    stream.close()
+    assert threading.active_count() == before
+
+
+def test_zip_file_written_without_intermediate_files(tmp_path):
+    """Only the archive lands in the user's export directory."""
+    export_utils.set_export_dir(str(tmp_path))
+    written = []
+    path = export_utils.export_members_to_zip(members(), "7", "permits", progress=written.append)
+
+    assert [p.name for p in (tmp_path / "7").iterdir()] == [Path(path).name]
+    assert written[-1] == Path(path).stat().st_size
+    assert set(read_zip(Path(path).read_bytes())) == {"permits.csv", "notes.txt"}